@@ -8,6 +8,7 @@ from flask import Blueprint, Response, current_app, jsonify, make_response, requ
 from werkzeug.exceptions import RequestEntityTooLarge
 
 from sim8051 import AssemblyError, ExecutionError, SessionStore, ValidationError
+from sim8051.session import set_snapshot_tokens
 
 sandbox_api = Blueprint("sandbox_api", __name__)
 _SESSION_COOKIE = "hexlogic_session"
@@ -27,6 +28,7 @@ def _get_session():
     existing = request.cookies.get(_SESSION_COOKIE)
     session = _session_store().get(existing)
     created = existing != session.session_id
+    set_snapshot_tokens(request.args.get("memory_since"), request.args.get("trace_since"))
     return session, created
 
 
@@ -139,7 +141,8 @@ def _require_breakpoints(data: dict[str, Any], key: str = "pcs") -> list[int | d
             condition = item.get("condition")
             if condition is not None and not isinstance(condition, str):
                 raise ValidationError("Breakpoint condition must be a string", context={"field": "condition"})
-            result.append({"pc": pc, "condition": condition, "enabled": bool(item.get("enabled", True))})
+            ignore_count = _coerce_int(item.get("ignore_count", 0), field="ignore_count", minimum=0)
+            result.append({"pc": pc, "condition": condition, "enabled": bool(item.get("enabled", True)), "ignore_count": ignore_count})
         else:
             result.append(_coerce_int(item, field=key, minimum=0, maximum=0xFFFFFFFF))
     return result
@@ -169,27 +172,42 @@ def _replace_session(session) -> None:
     _session_store().save(session)
 
 
+def _get_failed_session():
+    # The route may have mutated a cached live session before raising; drop it so the error response and
+    # later requests see the last saved state.
+    _session_store().discard(request.cookies.get(_SESSION_COOKIE))
+    return _get_session()
+
+
+@sandbox_api.teardown_request
+def _discard_session_after_unhandled_error(exc):
+    # Handled API errors discard through `_get_failed_session`; anything else escaping a route may still have
+    # left the cached live session half-changed and unsaved.
+    if exc is not None:
+        _session_store().discard(request.cookies.get(_SESSION_COOKIE))
+
+
 @sandbox_api.errorhandler(AssemblyError)
 def _handle_assembly_error(exc: AssemblyError):
-    session, created = _get_session()
+    session, created = _get_failed_session()
     return _error("assembly", str(exc), context={"line": exc.line}, session_id=session.session_id, status=400, created_session=created)
 
 
 @sandbox_api.errorhandler(ExecutionError)
 def _handle_execution_error(exc: ExecutionError):
-    session, created = _get_session()
+    session, created = _get_failed_session()
     return _error("execution", str(exc), context={"pc": exc.pc}, session_id=session.session_id, status=400, created_session=created)
 
 
 @sandbox_api.errorhandler(ValidationError)
 def _handle_validation_error(exc: ValidationError):
-    session, created = _get_session()
+    session, created = _get_failed_session()
     return _error("validation", str(exc), context=exc.context, session_id=session.session_id, status=400, created_session=created)
 
 
 @sandbox_api.errorhandler(RequestEntityTooLarge)
 def _handle_payload_too_large(_exc):
-    session, created = _get_session()
+    session, created = _get_failed_session()
     return _error("validation", "Request payload too large", context={}, session_id=session.session_id, status=413, created_session=created)
 
 
@@ -333,6 +351,15 @@ def step_back():
     return _json(payload, created)
 
 
+@sandbox_api.route("/api/v2/reverse-continue", methods=["POST"])
+def reverse_continue():
+    session, created = _get_session()
+    payload = session.reverse_continue()
+    payload["session_id"] = session.session_id
+    _save_session(session)
+    return _json(payload, created)
+
+
 @sandbox_api.route("/api/v2/run", methods=["POST"])
 def run():
     session, created = _get_session()
@@ -341,6 +368,7 @@ def run():
     payload = session.run(
         max_steps=_require_int(data, "max_steps", default=1000, minimum=1, maximum=max_limit),
         speed_multiplier=_require_float(data, "speed_multiplier", default=1.0, minimum=0.1, maximum=10.0),
+        capture=data.get("capture"),
     )
     metrics = _metrics()
     if metrics is not None:
@@ -375,6 +403,14 @@ def watchpoints():
         target = item.get("target", item.get("address", item.get("register")))
         if target is None:
             raise ValidationError("Watchpoint target is required", context={"field": "target"})
+        access = str(item.get("access", "write"))
+        if access not in {"write", "read", "access"}:
+            raise ValidationError("Unsupported watchpoint access", context={"access": access})
+        if space == "register" and (access != "write" or item.get("end") is not None):
+            raise ValidationError("Register watchpoints only support change triggers", context={"space": space})
+        for key in ("end", "equals", "crosses"):
+            if item.get(key) is not None:
+                _coerce_int(item[key], field=key, minimum=0, maximum=0xFFFFFFFF)
     payload = session.set_watchpoints(watchpoints)
     _save_session(session)
     return _json(payload, created)
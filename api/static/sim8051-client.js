@@ -6,7 +6,14 @@ export class SimulatorApiError extends Error {
   }
 }
 
+const MEMORY_VIEWS = { iram: "iram", sfr: "sfr", code: "rom", xram: "xram_sample" };
+
 export class Sim8051Client {
+  #memoryVersion = "";
+  #memoryRegions = {};
+  #traceVersion = "";
+  #trace = [];
+
   constructor({ baseUrl = "/api/v2" } = {}) {
     this.baseUrl = baseUrl.replace(/\/$/, "");
   }
@@ -43,6 +50,10 @@ export class Sim8051Client {
     return this.#request("POST", "/step-back");
   }
 
+  reverseContinue() {
+    return this.#request("POST", "/reverse-continue");
+  }
+
   run(maxSteps = 1000, speedMultiplier = 1) {
     return this.#request("POST", "/run", { max_steps: maxSteps, speed_multiplier: speedMultiplier });
   }
@@ -137,7 +148,10 @@ export class Sim8051Client {
 
   async #request(method, path, body) {
     const requestStartedAtMs = window.performance?.now?.() ?? Date.now();
-    const response = await fetch(`${this.baseUrl}${path}`, {
+    const separator = path.includes("?") ? "&" : "?";
+    const since = `memory_since=${encodeURIComponent(this.#memoryVersion)}&trace_since=${encodeURIComponent(this.#traceVersion)}`;
+    const url = `${this.baseUrl}${path}${separator}${since}`;
+    const response = await fetch(url, {
       method,
       headers: body ? { "Content-Type": "application/json" } : undefined,
       credentials: "same-origin",
@@ -160,6 +174,60 @@ export class Sim8051Client {
       const error = payload?.error ?? {};
       throw new SimulatorApiError(error.message || response.statusText, error);
     }
+    this.#applyMemory(payload);
+    this.#applyMemory(payload?.state);
+    this.#applyTrace(payload);
+    this.#applyTrace(payload?.state);
     return payload;
   }
+
+  #applyTrace(snapshot) {
+    const delta = snapshot?.trace_delta;
+    if (!delta || typeof delta !== "object" || !Array.isArray(delta.entries)) {
+      return;
+    }
+    this.#trace = delta.full ? delta.entries.slice() : this.#trace.concat(delta.entries);
+    if (delta.limit && this.#trace.length > delta.limit) {
+      this.#trace = this.#trace.slice(-delta.limit);
+    }
+    this.#traceVersion = delta.version;
+    snapshot.trace = this.#trace.slice();
+  }
+
+  #applyMemory(snapshot) {
+    const memory = snapshot?.memory;
+    if (!memory || typeof memory !== "object" || !memory.regions) {
+      return;
+    }
+    if (memory.full) {
+      this.#memoryRegions = {};
+    }
+    for (const [space, region] of Object.entries(memory.regions)) {
+      let current = this.#memoryRegions[space];
+      if (!current || current.bytes.length !== region.size) {
+        const bytes = new Uint8Array(region.size);
+        if (current) {
+          bytes.set(current.bytes.subarray(0, region.size));
+        }
+        current = { base: region.base, bytes };
+        this.#memoryRegions[space] = current;
+      }
+      for (const [offset, hex] of region.pages) {
+        for (let index = 0; index < hex.length; index += 2) {
+          current.bytes[offset + index / 2] = parseInt(hex.slice(index, index + 2), 16);
+        }
+      }
+    }
+    this.#memoryVersion = memory.version;
+    for (const [space, key] of Object.entries(MEMORY_VIEWS)) {
+      const current = this.#memoryRegions[space];
+      const view = {};
+      if (current) {
+        current.bytes.forEach((value, index) => {
+          view[current.base + index] = value;
+        });
+      }
+      snapshot[key] = view;
+    }
+  }
 }
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from array import array
+
+PSW_CY = 0x80
+PSW_AC = 0x40
+PSW_OV = 0x04
+PSW_P = 0x01
+ARITHMETIC_FLAGS = PSW_CY | PSW_AC | PSW_OV | PSW_P
+
+PARITY = bytes(bin(value).count("1") & 0x01 for value in range(256))
+
+
+def _add_entry(left: int, right: int, carry_in: int) -> int:
+    total = left + right + carry_in
+    result = total & 0xFF
+    flags = PARITY[result]
+    if total > 0xFF:
+        flags |= PSW_CY
+    if (left & 0x0F) + (right & 0x0F) + carry_in > 0x0F:
+        flags |= PSW_AC
+    if ~(left ^ right) & (left ^ result) & 0x80:
+        flags |= PSW_OV
+    return result | (flags << 8)
+
+
+def _subb_entry(left: int, right: int, borrow: int) -> int:
+    total = left - right - borrow
+    result = total & 0xFF
+    flags = PARITY[result]
+    if total < 0:
+        flags |= PSW_CY
+    if (left & 0x0F) < (right & 0x0F) + borrow:
+        flags |= PSW_AC
+    if (left ^ right) & (left ^ result) & 0x80:
+        flags |= PSW_OV
+    return result | (flags << 8)
+
+
+# Indexed by (carry << 16) | (A << 8) | operand; entries hold the result in the low byte and the
+# CY/AC/OV/P bits of PSW in the high byte.
+ADD_TABLE = array("H", [_add_entry(left, right, carry) for carry in (0, 1) for left in range(256) for right in range(256)])
+SUBB_TABLE = array("H", [_subb_entry(left, right, borrow) for borrow in (0, 1) for left in range(256) for right in range(256)])
@@ -4,15 +4,41 @@ from abc import ABC, abstractmethod
 import ast
 from collections import deque
 from dataclasses import dataclass, field
+import itertools
 import logging
+import operator
 import os
 import time
 from typing import Callable
 
 from .exceptions import ValidationError
 from .model import Breakpoint, ProgramImage, ReverseDelta, RunResult, TraceEntry, Watchpoint
+from .reverse import PERSISTED_HISTORY_DEPTH, Checkpoint, ExternalInput, ReverseHistory
 
 _DEBUG_TIMING = os.environ.get("HEXLOGIC_DEBUG_TIMING", "").strip().lower() in {"1", "true", "yes", "on"}
+# What one executed instruction hands back: a recorded `TraceEntry` with register diff, an unrecorded
+# `TraceEntry`, a plain payload dict, or nothing at all (cycles, PC and the change journal still advance).
+CAPTURE_FULL = "full"
+CAPTURE_COMPACT = "compact"
+CAPTURE_PAYLOAD = "payload"
+CAPTURE_COUNTERS = "counters"
+_CONDITION_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+}
+_CONDITION_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: lambda left, right: int(left) < int(right),
+    ast.LtE: lambda left, right: int(left) <= int(right),
+    ast.Gt: lambda left, right: int(left) > int(right),
+    ast.GtE: lambda left, right: int(left) >= int(right),
+}
 
 
 @dataclass
@@ -20,7 +46,11 @@ class DebuggerState:
     breakpoints: dict[int, Breakpoint] = field(default_factory=dict)
     watchpoints: list[Watchpoint] = field(default_factory=list)
     trace: deque[TraceEntry] = field(default_factory=lambda: deque(maxlen=512))
-    history: deque[ReverseDelta] = field(default_factory=lambda: deque(maxlen=512))
+    # `trace_sequence` counts appended entries; `trace_generation` changes whenever entries are taken back,
+    # so a client's trace cursor tells whether it can simply append the newer entries.
+    trace_sequence: int = 0
+    trace_generation: int = 0
+    history: ReverseHistory = field(default_factory=ReverseHistory)
     call_stack: list[int] = field(default_factory=list)
 
 
@@ -40,7 +70,10 @@ class BaseCPU(ABC):
         self.debug_mode = False
         self.max_cycles_per_request = 1_000_000
         self.max_run_seconds = 0.5
-        self.max_history_entries = 512
+        self._replaying = False
+        self._register_watches: frozenset[str] = frozenset()
+        self._breakpoint_pcs: frozenset[int] = frozenset()
+        self._listing_text_by_address: dict[int, str] = {}
 
     def set_clock_hz(self, clock_hz: int) -> None:
         self.clock_hz = max(1, int(clock_hz))
@@ -85,51 +118,133 @@ class BaseCPU(ABC):
             self.logger.debug("run_audit=%s", payload)
 
     def set_breakpoints(self, pcs: list[int | dict]) -> None:
+        previous = self.debugger.breakpoints
         breakpoints: dict[int, Breakpoint] = {}
         for item in pcs:
             if isinstance(item, dict):
                 pc = int(item.get("pc", 0))
+                condition = (str(item["condition"]).strip() or None) if item.get("condition") is not None else None
+                existing = previous.get(pc)
+                kept_hits = existing.hit_count if existing is not None and existing.condition == condition else 0
                 breakpoints[pc] = Breakpoint(
                     pc=pc,
-                    condition=(str(item["condition"]).strip() or None) if "condition" in item else None,
+                    condition=condition,
                     enabled=bool(item.get("enabled", True)),
+                    ignore_count=max(0, int(item.get("ignore_count", 0) or 0)),
+                    hit_count=max(0, int(item.get("hit_count", kept_hits) or 0)),
+                    predicate=self._compile_condition(condition) if condition else None,
                 )
             else:
                 pc = int(item)
-                breakpoints[pc] = Breakpoint(pc=pc)
+                existing = previous.get(pc)
+                breakpoints[pc] = Breakpoint(pc=pc, hit_count=existing.hit_count if existing is not None and existing.condition is None else 0)
         self.debugger.breakpoints = breakpoints
+        # Fast paths stop wherever a breakpoint could fire; the run loop then evaluates it.
+        stops = frozenset(pc for pc, breakpoint in breakpoints.items() if breakpoint.enabled)
+        if stops != self._breakpoint_pcs:
+            self._breakpoint_pcs = stops
+            self._breakpoint_pcs_changed()
+
+    def _breakpoint_pcs_changed(self) -> None:
+        return None
 
     def set_watchpoints(self, watchpoints: list[Watchpoint]) -> None:
         self.debugger.watchpoints = watchpoints[:]
-
-    def _check_watchpoints(self, trace: TraceEntry) -> bool:
-        if not self.debugger.watchpoints:
-            return False
-        for watch in self.debugger.watchpoints:
-            if not watch.enabled:
-                continue
-            if watch.space == "register":
-                if str(watch.target).upper() in trace.register_diff:
-                    return True
-                continue
-            for address, _, _ in trace.changes.get(watch.space, []):
-                if address == int(watch.target):
-                    return True
-        return False
+        active = [watch for watch in watchpoints if watch.enabled]
+        # Register watches need the per-step register diff; everything else is indexed inside MemoryMap.
+        self._register_watches = frozenset(str(watch.target).upper() for watch in active if watch.space == "register")
+        self.memory.set_watchpoints(watch for watch in active if watch.space != "register")
+
+    def _clear_watch_hits(self) -> None:
+        self.memory.watch_hits.clear()
+
+    def _check_watchpoints(self, trace: TraceEntry | dict | None = None) -> bool:
+        hits = self.memory.watch_hits
+        triggered = bool(hits)
+        if triggered:
+            hits.clear()
+        if self._register_watches and isinstance(trace, TraceEntry):
+            triggered = triggered or not self._register_watches.isdisjoint(trace.register_diff)
+        return triggered
 
     def _record_trace(self, trace: TraceEntry) -> None:
+        if self._replaying:
+            return
         self.debugger.trace.append(trace)
+        self.debugger.trace_sequence += 1
         if self.debug_mode:
             self.logger.debug("pc=0x%04X opcode=0x%02X mnemonic=%s cycles=%s", trace.pc, trace.opcode, trace.mnemonic, trace.cycles)
 
+    def _drop_trace_tail(self, count: int) -> None:
+        dropped = min(count, len(self.debugger.trace))
+        if dropped <= 0:
+            return
+        for _ in range(dropped):
+            self.debugger.trace.pop()
+        self.debugger.trace_sequence -= dropped
+        self.debugger.trace_generation += 1
+
+    @staticmethod
+    def _trace_payload(item: TraceEntry) -> dict:
+        return {
+            "pc": item.pc,
+            "opcode": item.opcode,
+            "mnemonic": item.mnemonic,
+            "bytes": item.bytes_,
+            "cycles": item.cycles,
+            "line": item.line,
+            "text": item.text,
+            "register_diff": item.register_diff,
+            "interrupt": item.interrupt,
+        }
+
+    def snapshot_trace(self, since: str | None = None) -> dict:
+        """Trace entries appended after the `since` cursor, or the whole trace when the cursor is stale."""
+        debugger = self.debugger
+        trace = debugger.trace
+        prefix = f"{self.memory.snapshot_epoch}.{debugger.trace_generation}"
+        held, _, raw_sequence = str(since or "").rpartition(".")
+        missing = debugger.trace_sequence - int(raw_sequence) if held == prefix and raw_sequence.isdigit() else -1
+        full = not 0 <= missing <= len(trace)
+        if full:
+            entries = list(trace)
+        else:
+            entries = list(itertools.islice(trace, len(trace) - missing, None))
+        return {
+            "version": f"{prefix}.{debugger.trace_sequence}",
+            "full": full,
+            "limit": trace.maxlen,
+            "entries": [self._trace_payload(item) for item in entries],
+        }
+
+    def snapshot_memory(self, since: str | None = None) -> dict:
+        return self.memory.snapshot_regions(self._snapshot_memory_limits(), since)
+
+    def _snapshot_memory_limits(self) -> dict[str, int]:
+        return {}
+
     def compact_execution_allowed(self) -> bool:
-        return not self.debug_mode and not self.debugger.watchpoints
+        return not self.debug_mode and not self._register_watches
 
     def step_compact(self) -> TraceEntry:
         return self._step_impl_compact()
 
     def step_compact_payload(self) -> dict:
-        trace = self.step_compact()
+        return self._step_core(CAPTURE_PAYLOAD)
+
+    def step_counters(self) -> None:
+        self._step_core(CAPTURE_COUNTERS)
+
+    def _step_core(self, capture: str) -> TraceEntry | dict | None:
+        """Execute one instruction and return what the `capture` policy asks for.
+
+        Architectures override this with their single execution kernel; the default reduces a full trace.
+        """
+        trace = self._step_impl()
+        if capture == CAPTURE_COUNTERS:
+            return None
+        if capture != CAPTURE_PAYLOAD:
+            return trace
         return {
             "pc": trace.pc,
             "opcode": trace.opcode,
@@ -142,6 +257,35 @@ class BaseCPU(ABC):
             "interrupt": trace.interrupt,
         }
 
+    def _compact_capture(self, capture: str, pc: int, opcode: int, mnemonic: str, bytes_: list[int], cycles: int) -> TraceEntry | dict:
+        changes = self.memory.consume_change_view()
+        line = self.program.address_to_line.get(pc) if self.program else None
+        text = self._listing_text_by_address.get(pc) if self.program else None
+        if capture == CAPTURE_PAYLOAD:
+            return {
+                "pc": pc,
+                "opcode": opcode,
+                "mnemonic": mnemonic,
+                "bytes": bytes_,
+                "cycles": cycles,
+                "line": line,
+                "text": text,
+                "changes": changes,
+                "interrupt": self.last_interrupt,
+            }
+        return TraceEntry(
+            pc=pc,
+            opcode=opcode,
+            mnemonic=mnemonic,
+            bytes_=bytes_,
+            cycles=cycles,
+            line=line,
+            text=text,
+            changes=changes,
+            register_diff={},
+            interrupt=self.last_interrupt,
+        )
+
     def hardware_tick_snapshot(self) -> dict:
         hardware_snapshot = getattr(self, "hardware_snapshot", None)
         if callable(hardware_snapshot):
@@ -157,27 +301,78 @@ class BaseCPU(ABC):
     def try_fast_realtime_slice(self, *, max_steps: int, max_cycles: int) -> dict | None:
         return None
 
+    def sync_peripherals(self) -> dict[str, list[tuple[int, int, int]]]:
+        return {}
+
     def step(self) -> TraceEntry:
-        return self._step_with_history()
+        trace = self._step_with_history()
+        self._clear_watch_hits()
+        return trace
 
     def step_into(self) -> TraceEntry:
         return self._step_with_history()
 
     def step_back(self) -> ReverseDelta | None:
-        if not self.debugger.history:
+        history = self.debugger.history
+        if not history.matches(self._history_anchor()) or not len(history):
             return None
-        delta = self.debugger.history.pop()
-        self._restore_reverse_delta(delta)
+        target = history.position - 1
+        self._replay_to(target)
+        before = self._capture_checkpoint()
+        self._replaying = True
+        try:
+            trace = self._step_impl()
+        finally:
+            self._replaying = False
+        after = (self.cycles, self.halted, self.last_error, self.last_interrupt, self.debugger.call_stack[:])
+        self._restore_checkpoint(before)
+        delta = ReverseDelta(
+            trace=trace,
+            cycles_before=int(before["cycles"]),
+            cycles_after=int(after[0]),
+            halted_before=bool(before["halted"]),
+            halted_after=bool(after[1]),
+            last_error_before=before["last_error"],
+            last_error_after=after[2],
+            last_interrupt_before=before["last_interrupt"],
+            last_interrupt_after=after[3],
+            call_stack_before=list(before["call_stack"]),
+            call_stack_after=after[4],
+            extra_before={},
+            extra_after={},
+        )
         if self.debugger.trace and self.debugger.trace[-1].pc == delta.trace.pc and self.debugger.trace[-1].opcode == delta.trace.opcode:
-            self.debugger.trace.pop()
+            self._drop_trace_tail(1)
         return delta
 
+    def reverse_continue(self) -> tuple[str, int]:
+        """Run backwards to the most recent breakpoint hit or watchpoint trigger, or to the oldest checkpoint."""
+        history = self.debugger.history
+        if not history.matches(self._history_anchor()) or not len(history):
+            return "history_empty", 0
+        start = history.position
+        upper = start
+        target = history.checkpoints[0].position
+        reason = "history_start"
+        for checkpoint in reversed(history.checkpoints):
+            if checkpoint.position >= upper:
+                continue
+            found = self._last_stop_in_segment(checkpoint, upper)
+            if found is not None:
+                target, reason = found
+                break
+            upper = checkpoint.position
+        self._replay_to(target)
+        self._drop_trace_tail(start - target)
+        return reason, start - target
+
     def run(self, *, max_steps: int = 1000, after_step: Callable[[TraceEntry], None] | None = None) -> RunResult:
         steps: list[TraceEntry] = []
         reason = "max_steps"
         start_cycles = self.cycles
         start_time = time.perf_counter()
         deadline = start_time + self.max_run_seconds
+        self._clear_watch_hits()
         for _ in range(max_steps):
             if self.halted:
                 reason = "halted"
@@ -224,6 +419,7 @@ class BaseCPU(ABC):
         start_cycles = self.cycles
         start_time = time.perf_counter()
         deadline = start_time + self.max_run_seconds
+        self._clear_watch_hits()
         while True:
             if self.halted:
                 reason = "halted"
@@ -271,6 +467,7 @@ class BaseCPU(ABC):
         start_cycles = self.cycles
         start_time = time.perf_counter()
         deadline = start_time + self.max_run_seconds
+        self._clear_watch_hits()
         while True:
             if self.halted:
                 reason = "halted"
@@ -330,10 +527,10 @@ class BaseCPU(ABC):
         raise NotImplementedError
 
     def _step_impl_compact(self) -> TraceEntry:
-        return self._step_impl()
+        return self._step_core(CAPTURE_COMPACT)
 
     @abstractmethod
-    def snapshot(self) -> dict:
+    def snapshot(self, *, include_memory: bool = True, include_trace: bool = True) -> dict:
         raise NotImplementedError
 
     @abstractmethod
@@ -355,166 +552,285 @@ class BaseCPU(ABC):
         _ = state
 
     def _step_with_history(self) -> TraceEntry:
-        before = {
-            "cycles": self.cycles,
-            "halted": self.halted,
-            "last_error": self.last_error,
-            "last_interrupt": self.last_interrupt,
-            "call_stack": self.debugger.call_stack[:],
-            "extra": self._capture_extra_state(),
-        }
+        history = self.debugger.history
+        if not history.matches(self._history_anchor()):
+            # Untracked (compact/fast) execution moved the CPU; its steps cannot be replayed.
+            history.clear()
+        if history.needs_checkpoint():
+            previous = history.checkpoints[-1].state["memory"] if history.checkpoints else None
+            history.add_checkpoint(self._capture_checkpoint(previous))
+        cycles_before = self.cycles
         trace = self._step_impl()
-        after = {
-            "cycles": self.cycles,
-            "halted": self.halted,
-            "last_error": self.last_error,
-            "last_interrupt": self.last_interrupt,
-            "call_stack": self.debugger.call_stack[:],
-            "extra": self._capture_extra_state(),
-        }
-        self.debugger.history.append(
-            ReverseDelta(
-                trace=trace,
-                cycles_before=int(before["cycles"]),
-                cycles_after=int(after["cycles"]),
-                halted_before=bool(before["halted"]),
-                halted_after=bool(after["halted"]),
-                last_error_before=before["last_error"],
-                last_error_after=after["last_error"],
-                last_interrupt_before=before["last_interrupt"],
-                last_interrupt_after=after["last_interrupt"],
-                call_stack_before=list(before["call_stack"]),
-                call_stack_after=list(after["call_stack"]),
-                extra_before=dict(before["extra"]),
-                extra_after=dict(after["extra"]),
-            )
-        )
+        history.position += 1
+        history.anchor = self._history_anchor()
         if _DEBUG_TIMING:
             print(
                 "[DEBUG_TIMING][instruction]",
                 {
                     "instruction": trace.mnemonic,
                     "pc": trace.pc,
-                    "cycles_before": int(before["cycles"]),
-                    "cycles_after": int(after["cycles"]),
+                    "cycles_before": int(cycles_before),
+                    "cycles_after": int(self.cycles),
                 },
             )
         return trace
 
-    def _restore_reverse_delta(self, delta: ReverseDelta) -> None:
-        register_values = {
-            name: int(change["before"])
-            for name, change in delta.trace.register_diff.items()
+    def _history_anchor(self) -> tuple[int, int]:
+        return int(self.cycles), int(self.pc)
+
+    def _log_external_input(self, method: str, args: tuple) -> None:
+        if self._replaying:
+            return
+        history = self.debugger.history
+        if history.matches(self._history_anchor()):
+            history.log_input(method, args)
+
+    def mark_external_change(self) -> None:
+        """Force a checkpoint before the next tracked step after state was edited outside of execution."""
+        self.debugger.history.checkpoint_due = True
+
+    def _capture_checkpoint(self, previous_memory: tuple | None = None) -> dict:
+        extra = self._capture_extra_state()
+        return {
+            "registers": self._debug_registers(),
+            "cycles": int(self.cycles),
+            "halted": bool(self.halted),
+            "last_error": self.last_error,
+            "last_interrupt": self.last_interrupt,
+            "call_stack": self.debugger.call_stack[:],
+            "extra": extra,
+            "memory": self.memory.capture_checkpoint(previous_memory),
         }
-        if register_values:
-            self._restore_register_values(register_values)
-        self._restore_memory_changes(delta.trace.changes)
-        self.cycles = int(delta.cycles_before)
-        self.halted = bool(delta.halted_before)
-        self.last_error = delta.last_error_before
-        self.last_interrupt = delta.last_interrupt_before
-        self.debugger.call_stack = delta.call_stack_before[:]
-        self._restore_extra_state(delta.extra_before)
-        memory = getattr(self, "memory", None)
-        if memory is not None and hasattr(memory, "consume_changes"):
-            memory.consume_changes()
 
-    def _restore_memory_changes(self, changes: dict[str, list[tuple[int, int, int]]]) -> None:
-        memory = getattr(self, "memory", None)
-        if memory is None:
+    def _restore_checkpoint(self, state: dict) -> None:
+        self.memory.restore_checkpoint(state["memory"])
+        self._restore_register_values(state["registers"])
+        self.cycles = int(state["cycles"])
+        self.halted = bool(state["halted"])
+        self.last_error = state["last_error"]
+        self.last_interrupt = state["last_interrupt"]
+        self.debugger.call_stack = list(state["call_stack"])
+        self._restore_extra_state(state["extra"])
+        self.memory.consume_changes()
+
+    def _replay_to(self, position: int) -> None:
+        history = self.debugger.history
+        checkpoint = history.checkpoint_at_or_before(position)
+        self._restore_checkpoint(checkpoint.state)
+        # Long replays leave denser checkpoints behind so stepping back repeatedly stays cheap.
+        stride = max(1, history.interval // 16)
+        dense: list[Checkpoint] = []
+
+        def _visit(current: int, trace: TraceEntry | None) -> None:
+            if trace is None and current > checkpoint.position and (current - checkpoint.position) % stride == 0:
+                previous = (dense[-1] if dense else checkpoint).state["memory"]
+                dense.append(Checkpoint(current, self._capture_checkpoint(previous)))
+
+        self._replay_segment(checkpoint, position, _visit if position - checkpoint.position > stride else None)
+        history.rewind_to(position)
+        for item in dense:
+            history.add_checkpoint(item.state, item.position)
+        history.anchor = self._history_anchor()
+
+    def _replay_segment(self, checkpoint: Checkpoint, end: int, visit: Callable[[int, TraceEntry | None], None] | None = None) -> None:
+        inputs = self.debugger.history.inputs_between(checkpoint.position, end)
+        index = 0
+        self._replaying = True
+        try:
+            for position in range(checkpoint.position, end):
+                if visit is not None:
+                    visit(position, None)
+                trace = self._step_impl()
+                if visit is not None:
+                    visit(position, trace)
+                while index < len(inputs) and inputs[index].position == position + 1:
+                    getattr(self, inputs[index].method)(*inputs[index].args)
+                    index += 1
+        finally:
+            self._replaying = False
+        self.memory.consume_changes()
+
+    def _last_stop_in_segment(self, checkpoint: Checkpoint, end: int) -> tuple[int, str] | None:
+        self._restore_checkpoint(checkpoint.state)
+        current = self.debugger.history.position
+        found: list[tuple[int, str]] = []
+
+        def _visit(position: int, trace: TraceEntry | None) -> None:
+            if trace is None:
+                self._clear_watch_hits()
+                if self._active_breakpoint(count_hits=False):
+                    found.append((position, "breakpoint"))
+            elif self._check_watchpoints(trace) and position + 1 < current:
+                found.append((position + 1, "watchpoint"))
+
+        self._replay_segment(checkpoint, end, _visit)
+        return found[-1] if found else None
+
+    def _export_history(self) -> dict:
+        history = self.debugger.history
+        if not history.checkpoints:
+            return {}
+        # The newest checkpoint and the newest one at least PERSISTED_HISTORY_DEPTH steps back are persisted,
+        # oldest first. Like `capture_checkpoint`, a region equal to the next newer copy (live memory for the
+        # newest) is left out and shared again on import.
+        newest = history.checkpoints[-1]
+        oldest = history.checkpoint_at_or_before(history.position - PERSISTED_HISTORY_DEPTH) or history.checkpoints[0]
+        kept = [oldest, newest] if oldest is not newest else [newest]
+        newer = self.memory.capture_checkpoint()
+        exported: list[dict] = []
+        for checkpoint in reversed(kept):
+            state = checkpoint.state
+            exported.append(
+                {
+                    "position": checkpoint.position,
+                    "registers": dict(state["registers"]),
+                    "cycles": state["cycles"],
+                    "halted": state["halted"],
+                    "last_error": state["last_error"],
+                    "last_interrupt": state["last_interrupt"],
+                    "call_stack": list(state["call_stack"]),
+                    "extra": state["extra"],
+                    "memory_hex": [None if region == current else region.hex() for region, current in zip(state["memory"][:-1], newer[:-1])],
+                    "ports": [list(port) for port in state["memory"][-1]],
+                }
+            )
+            newer = state["memory"]
+        return {
+            "position": history.position,
+            "anchor": list(history.anchor) if history.anchor is not None else None,
+            "checkpoints": exported[::-1],
+            "inputs": [[item.position, item.method, list(item.args)] for item in history.inputs if item.position > oldest.position],
+        }
+
+    def _import_history(self, payload: object) -> None:
+        history = self.debugger.history
+        history.clear()
+        if not isinstance(payload, dict):
+            return
+        # Sessions saved before several checkpoints were kept carry a single `checkpoint`.
+        exported = payload.get("checkpoints") or ([payload["checkpoint"]] if payload.get("checkpoint") else [])
+        if not exported:
             return
-        for space, entries in changes.items():
-            for address, old_value, _new_value in reversed(entries):
-                if space in {"iram", "sfr"}:
-                    memory.write_direct(int(address), int(old_value))
-                elif space == "xram":
-                    memory.write_xram(int(address), int(old_value))
-                elif space == "code":
-                    memory.write8(int(address), int(old_value), space="code")
-
-    def _active_breakpoint(self) -> bool:
+        newer = self.memory.capture_checkpoint()
+        for raw_checkpoint in reversed(exported):
+            checkpoint = dict(raw_checkpoint)
+            regions = [current if raw is None else bytes.fromhex(str(raw)) for raw, current in zip(checkpoint.get("memory_hex", []), newer[:-1])]
+            ports = tuple(tuple(int(value) for value in port) for port in checkpoint.get("ports", []))
+            state = {
+                "registers": {str(name): int(value) for name, value in dict(checkpoint.get("registers", {})).items()},
+                "cycles": int(checkpoint.get("cycles", 0)),
+                "halted": bool(checkpoint.get("halted", False)),
+                "last_error": checkpoint.get("last_error"),
+                "last_interrupt": checkpoint.get("last_interrupt"),
+                "call_stack": [int(value) for value in checkpoint.get("call_stack", [])],
+                "extra": dict(checkpoint.get("extra", {})),
+                "memory": (*regions, ports),
+            }
+            history.checkpoints.insert(0, Checkpoint(int(checkpoint.get("position", 0)), state))
+            newer = state["memory"]
+        history.inputs = [ExternalInput(int(position), str(method), tuple(args)) for position, method, args in payload.get("inputs", [])]
+        history.position = int(payload.get("position", 0))
+        anchor = payload.get("anchor")
+        history.anchor = (int(anchor[0]), int(anchor[1])) if anchor else None
+        history.checkpoint_due = False
+
+    def _active_breakpoint(self, *, count_hits: bool = True) -> bool:
         breakpoint = self.debugger.breakpoints.get(self.pc)
         if breakpoint is None or not breakpoint.enabled:
             return False
-        if not breakpoint.condition:
+        if breakpoint.predicate is not None and not breakpoint.predicate():
+            return False
+        if not count_hits:
             return True
-        return self._evaluate_condition(breakpoint.condition, self._debug_context())
+        # Re-checking the same arrival (e.g. resuming a run that stopped here) must not count twice.
+        if breakpoint.last_hit_cycles != self.cycles:
+            breakpoint.last_hit_cycles = self.cycles
+            breakpoint.hit_count += 1
+        return breakpoint.hit_count > breakpoint.ignore_count
+
+    def _condition_reader(self, name: str) -> Callable[[], int | bool] | None:
+        if name == "PC":
+            return lambda: int(self.pc)
+        if name == "CYCLES":
+            return lambda: int(self.cycles)
+        if name == "HALTED":
+            return lambda: bool(self.halted)
+        if name in self._debug_registers():
+            return lambda: int(self._debug_registers()[name])
+        return None
 
-    def _debug_context(self) -> dict[str, int | bool]:
-        snapshot = self.snapshot()
-        context: dict[str, int | bool] = {"PC": int(self.pc), "CYCLES": int(self.cycles), "HALTED": bool(self.halted)}
-        for name, value in dict(snapshot.get("registers", {})).items():
-            context[str(name).upper()] = int(value)
-        for name, value in dict(snapshot.get("flags", {})).items():
-            context[str(name).upper()] = bool(value)
-        return context
+    def _condition_memory_reader(self, space: str) -> Callable[[int], int] | None:
+        memory = getattr(self, "memory", None)
+        if memory is None:
+            return None
+        if space == "XRAM":
+            return lambda address: memory.read_xram(address)
+        if space == "CODE":
+            return lambda address: memory.read_code(address)
+        return None
 
-    def _evaluate_condition(self, expression: str, context: dict[str, int | bool]) -> bool:
-        tree = ast.parse(expression, mode="eval")
+    def _compile_condition(self, expression: str) -> Callable[[], bool]:
+        """Compile a breakpoint condition into a closure reading only the symbols it references."""
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as exc:
+            raise ValidationError("Invalid breakpoint condition", context={"expression": expression}) from exc
 
-        def _eval(node):
+        def _compile(node) -> Callable[[], object]:
             if isinstance(node, ast.Expression):
-                return _eval(node.body)
+                return _compile(node.body)
             if isinstance(node, ast.Constant):
-                return node.value
+                value = node.value
+                return lambda: value
             if isinstance(node, ast.Name):
-                key = node.id.upper()
-                if key not in context:
+                reader = self._condition_reader(node.id.upper())
+                if reader is None:
                     raise ValidationError("Unknown breakpoint symbol", context={"symbol": node.id})
-                return context[key]
+                return reader
+            if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+                memory_reader = self._condition_memory_reader(node.value.id.upper())
+                if memory_reader is None:
+                    raise ValidationError("Unknown breakpoint memory space", context={"space": node.value.id})
+                index = _compile(node.slice)
+                return lambda: memory_reader(int(index()))
             if isinstance(node, ast.UnaryOp):
-                operand = _eval(node.operand)
+                operand = _compile(node.operand)
                 if isinstance(node.op, ast.Not):
-                    return not bool(operand)
+                    return lambda: not bool(operand())
                 if isinstance(node.op, ast.USub):
-                    return -int(operand)
+                    return lambda: -int(operand())
                 if isinstance(node.op, ast.Invert):
-                    return ~int(operand)
+                    return lambda: ~int(operand())
             if isinstance(node, ast.BoolOp):
-                values = [_eval(value) for value in node.values]
+                values = [_compile(value) for value in node.values]
                 if isinstance(node.op, ast.And):
-                    return all(bool(value) for value in values)
+                    return lambda: all(bool(value()) for value in values)
                 if isinstance(node.op, ast.Or):
-                    return any(bool(value) for value in values)
-            if isinstance(node, ast.BinOp):
-                left = _eval(node.left)
-                right = _eval(node.right)
-                if isinstance(node.op, ast.Add):
-                    return int(left) + int(right)
-                if isinstance(node.op, ast.Sub):
-                    return int(left) - int(right)
-                if isinstance(node.op, ast.BitAnd):
-                    return int(left) & int(right)
-                if isinstance(node.op, ast.BitOr):
-                    return int(left) | int(right)
-                if isinstance(node.op, ast.BitXor):
-                    return int(left) ^ int(right)
-                if isinstance(node.op, ast.LShift):
-                    return int(left) << int(right)
-                if isinstance(node.op, ast.RShift):
-                    return int(left) >> int(right)
+                    return lambda: any(bool(value()) for value in values)
+            if isinstance(node, ast.BinOp) and type(node.op) in _CONDITION_BINARY_OPERATORS:
+                function = _CONDITION_BINARY_OPERATORS[type(node.op)]
+                left = _compile(node.left)
+                right = _compile(node.right)
+                return lambda: function(int(left()), int(right()))
             if isinstance(node, ast.Compare):
-                left = _eval(node.left)
-                for operator, comparator in zip(node.ops, node.comparators):
-                    right = _eval(comparator)
-                    if isinstance(operator, ast.Eq):
-                        matched = left == right
-                    elif isinstance(operator, ast.NotEq):
-                        matched = left != right
-                    elif isinstance(operator, ast.Lt):
-                        matched = int(left) < int(right)
-                    elif isinstance(operator, ast.LtE):
-                        matched = int(left) <= int(right)
-                    elif isinstance(operator, ast.Gt):
-                        matched = int(left) > int(right)
-                    elif isinstance(operator, ast.GtE):
-                        matched = int(left) >= int(right)
-                    else:
+                operands = [_compile(node.left), *(_compile(item) for item in node.comparators)]
+                comparisons = []
+                for item in node.ops:
+                    if type(item) not in _CONDITION_COMPARISONS:
                         raise ValidationError("Unsupported breakpoint comparison", context={"expression": expression})
-                    if not matched:
-                        return False
-                    left = right
-                return True
+                    comparisons.append(_CONDITION_COMPARISONS[type(item)])
+
+                def _compare() -> bool:
+                    left = operands[0]()
+                    for compare, operand in zip(comparisons, operands[1:]):
+                        right = operand()
+                        if not compare(left, right):
+                            return False
+                        left = right
+                    return True
+
+                return _compare
             raise ValidationError("Unsupported breakpoint condition", context={"expression": expression})
 
-        return bool(_eval(tree))
+        compiled = _compile(tree)
+        return lambda: bool(compiled())
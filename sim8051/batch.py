@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import sys
+from typing import Any, Iterable, Mapping, Sequence
+
+from .exceptions import SimulatorError, ValidationError
+from .factory import create_assembler, create_cpu, normalize_architecture
+
+# Headless runs for grading: assemble, run to halt or the cycle budget, report the final machine state.
+# No session, hardware manager or snapshot is involved while the program runs.
+DEFAULT_MAX_CYCLES = 1_000_000
+DEFAULT_XRAM_BYTES = 0x100
+_CODE_SIZE = 0x1000
+_XRAM_SIZE = 0x10000
+_FAST_SLICE_STEPS = 1 << 20
+_SERIAL_INPUT = "serial"
+
+
+@dataclass
+class BatchJob:
+    source: str
+    arch: str = "8051"
+    max_cycles: int = DEFAULT_MAX_CYCLES
+    inputs: dict[str, Any] = field(default_factory=dict)
+    probes: list[str] = field(default_factory=list)
+    job_id: str = ""
+
+
+@dataclass
+class BatchResult:
+    job_id: str
+    architecture: str
+    ok: bool
+    reason: str
+    halted: bool
+    steps: int
+    cycles: int
+    registers: dict[str, int] = field(default_factory=dict)
+    flags: dict[str, int] = field(default_factory=dict)
+    memory: dict[str, str] = field(default_factory=dict)
+    serial_output: list[int] = field(default_factory=list)
+    pin_traces: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _pin_address(architecture: str, name: str) -> tuple[int, int]:
+    port, _, bit_text = str(name).upper().partition(".")
+    try:
+        bit = int(bit_text)
+        if architecture == "arm":
+            if port != "GPIOA" or not 0 <= bit < 16:
+                raise ValueError(name)
+            return 0, bit
+        port_index = int(port[1:]) if port.startswith("P") else -1
+        if not 0 <= port_index < 4 or not 0 <= bit < 8:
+            raise ValueError(name)
+        return port_index, bit
+    except ValueError:
+        raise ValidationError("Unsupported pin", context={"pin": name, "architecture": architecture}) from None
+
+
+def _apply_inputs(cpu, architecture: str, inputs: Mapping[str, Any]) -> None:
+    for name, value in inputs.items():
+        if name == _SERIAL_INPUT:
+            if not hasattr(cpu, "inject_serial_rx"):
+                raise ValidationError("Serial input is not supported", context={"architecture": architecture})
+            cpu.inject_serial_rx(value.encode("latin-1") if isinstance(value, str) else bytes(value))
+            continue
+        port_index, bit = _pin_address(architecture, name)
+        cpu.set_pin(port_index, bit, None if value is None else int(bool(value)))
+
+
+def _final_memory(cpu, architecture: str, xram_bytes: int) -> dict[str, str]:
+    memory = cpu.memory
+    regions = {"xram": bytes(memory.xram[: max(0, int(xram_bytes))]).hex()}
+    if architecture == "8051":
+        regions["iram"] = bytes(memory.iram_low + memory.iram_high).hex()
+        regions["sfr"] = bytes(memory.sfr).hex()
+    return regions
+
+
+def _run_loop(cpu, max_cycles: int, probes: list[tuple[str, int, int]], traces: dict[str, list[tuple[int, int]]]) -> int:
+    steps = 0
+    if not probes:
+        while not cpu.halted and cpu.cycles < max_cycles:
+            fast = cpu.try_fast_realtime_slice(max_steps=_FAST_SLICE_STEPS, max_cycles=max_cycles - cpu.cycles)
+            if fast:
+                steps += int(fast.get("steps", 0) or 0)
+                cpu.memory.skip_changes()
+                continue
+            cpu.step_counters()
+            steps += 1
+        return steps
+    # Fast slices could hide pin edges inside a burst, so probed runs step one instruction at a time.
+    read_level = cpu._read_port_pin_level
+    levels = [read_level(port_index, bit) for _name, port_index, bit in probes]
+    for (name, _port_index, _bit), level in zip(probes, levels):
+        traces[name].append((cpu.cycles, level))
+    while not cpu.halted and cpu.cycles < max_cycles:
+        cpu.step_counters()
+        steps += 1
+        for index, (name, port_index, bit) in enumerate(probes):
+            level = read_level(port_index, bit)
+            if level != levels[index]:
+                levels[index] = level
+                traces[name].append((cpu.cycles, level))
+    return steps
+
+
+def run_program(
+    source: str,
+    arch: str = "8051",
+    max_cycles: int = DEFAULT_MAX_CYCLES,
+    inputs: Mapping[str, Any] | None = None,
+    probes: Sequence[str] | None = None,
+    *,
+    job_id: str = "",
+    xram_bytes: int = DEFAULT_XRAM_BYTES,
+) -> BatchResult:
+    """Assemble `source` and run it until it halts, faults or spends `max_cycles`.
+
+    `inputs` drives pins by name (`P3.2`, `GPIOA.4`) to 0/1, or releases them with None; the `serial` key
+    queues bytes on the 8051 UART. Each probed pin reports its level at start and every change as
+    `(cycle, level)`. Assembly and execution faults are reported in the result; bad pin names raise.
+    """
+    architecture = normalize_architecture(arch)
+    probe_pins = [(str(name), *_pin_address(architecture, name)) for name in probes or ()]
+    if architecture == "arm":
+        cpu = create_cpu(architecture, code_size=_CODE_SIZE, data_size=_XRAM_SIZE, endian="little")
+        assembler = create_assembler(architecture, code_size=_CODE_SIZE, endian="little")
+    else:
+        cpu = create_cpu(architecture, code_size=_CODE_SIZE, xram_size=_XRAM_SIZE)
+        assembler = create_assembler(architecture, code_size=_CODE_SIZE)
+    result = BatchResult(job_id=job_id, architecture=architecture, ok=False, reason="assembly_error", halted=True, steps=0, cycles=0)
+    try:
+        program = assembler.assemble(source)
+    except SimulatorError as exc:
+        result.error = str(exc)
+        return result
+    cpu.load_program(program)
+    _apply_inputs(cpu, architecture, inputs or {})
+    result.pin_traces = {name: [] for name, _port_index, _bit in probe_pins}
+    try:
+        result.steps = _run_loop(cpu, int(max_cycles), probe_pins, result.pin_traces)
+        result.ok = True
+        result.reason = "halted" if cpu.halted else "cycle_cap"
+    except SimulatorError as exc:
+        result.reason = "error"
+        result.error = str(exc)
+    cpu.sync_peripherals()
+    runtime = cpu.runtime_snapshot()
+    result.halted = bool(cpu.halted)
+    result.cycles = int(cpu.cycles)
+    result.registers = dict(runtime.get("registers", {}))
+    result.flags = {name: int(value) for name, value in dict(runtime.get("flags", {})).items()}
+    result.memory = _final_memory(cpu, architecture, xram_bytes)
+    serial = getattr(cpu, "serial", None)
+    result.serial_output = list(serial.tx_log) if serial is not None else []
+    return result
+
+
+def _run_job(job: BatchJob) -> BatchResult:
+    return run_program(job.source, job.arch, job.max_cycles, job.inputs, job.probes, job_id=job.job_id)
+
+
+def run_batch(jobs: Iterable[BatchJob], *, workers: int | None = None) -> list[BatchResult]:
+    """Run `jobs` across a process pool, one process per core by default; results keep the input order."""
+    pending = list(jobs)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    if workers == 1 or len(pending) <= 1:
+        return [_run_job(job) for job in pending]
+    chunksize = max(1, len(pending) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+        return list(executor.map(_run_job, pending, chunksize=chunksize))
+
+
+def _parse_input(text: str) -> tuple[str, int | None]:
+    name, separator, level = text.partition("=")
+    if not separator or level.lower() not in {"0", "1", "z"}:
+        raise argparse.ArgumentTypeError(f"expected PIN=0, PIN=1 or PIN=z, got `{text}`")
+    return name, None if level.lower() == "z" else int(level)
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Assemble and run HexLogic programs headlessly, one JSON result per line.")
+    parser.add_argument("sources", nargs="+", help="Assembly source files")
+    parser.add_argument("--arch", default="8051", help="Target architecture. Default: 8051")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES, help=f"Cycle budget per program. Default: {DEFAULT_MAX_CYCLES}")
+    parser.add_argument("--input", dest="inputs", action="append", type=_parse_input, default=[], help="Drive a pin, e.g. P3.2=0 (repeatable)")
+    parser.add_argument("--serial-input", help="Bytes queued on the 8051 UART before the run")
+    parser.add_argument("--probe", dest="probes", action="append", default=[], help="Record level changes of a pin (repeatable)")
+    parser.add_argument("--workers", type=int, help="Worker processes. Default: one per core")
+    parser.add_argument("--output", help="Optional output file path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = _parse_args(argv)
+    inputs: dict[str, Any] = dict(args.inputs)
+    if args.serial_input is not None:
+        inputs[_SERIAL_INPUT] = args.serial_input
+    jobs = []
+    for path in args.sources:
+        with open(path, encoding="utf-8") as handle:
+            jobs.append(BatchJob(source=handle.read(), arch=args.arch, max_cycles=args.max_cycles, inputs=inputs, probes=list(args.probes), job_id=path))
+    results = run_batch(jobs, workers=args.workers)
+    rendered = "\n".join(json.dumps(result.to_dict()) for result in results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(rendered)
+            handle.write("\n")
+    else:
+        print(rendered)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
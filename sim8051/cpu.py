@@ -3,12 +3,27 @@ from __future__ import annotations
 from collections import deque
 from dataclasses import dataclass, field
 import os
-from typing import Callable
+from typing import Callable, Iterable
 
-from .base_cpu import BaseCPU
-from .exceptions import DecodeError, ExecutionError
+from .alu import ADD_TABLE, ARITHMETIC_FLAGS, PARITY, PSW_P, SUBB_TABLE
+from .base_cpu import CAPTURE_COUNTERS, CAPTURE_FULL, BaseCPU
+from .exceptions import DecodeError, ExecutionError, MemoryAccessError
 from .memory import BIT_ALIASES, MemoryMap, SFR_ADDRESSES
-from .model import Breakpoint, ProgramImage, ReverseDelta, RunResult, TraceEntry, Watchpoint
+from .model import Breakpoint, ProgramImage, RunResult, TraceEntry, Watchpoint
+from .predecode import (
+    ACALL_OPCODES,
+    AJMP_OPCODES,
+    CONTROL_FLOW_OPCODES,
+    MAX_BLOCK_INSTRUCTIONS,
+    OPCODE_LENGTHS,
+    PAGE_BRANCH_OPCODES,
+    BasicBlock,
+    BasicBlockCache,
+    DecodedInstruction,
+    PredecodeCache,
+    decode_instruction,
+    writes_special_function_register,
+)
 
 INTERRUPT_ORDER = [
     ("EX0", 0x0003, "IE0", "EX0", "PX0"),
@@ -19,12 +34,51 @@ INTERRUPT_ORDER = [
     ("T2", 0x002B, ("TF2", "EXF2"), "ET2", "PT2"),
 ]
 _INTERRUPT_ENTRY_MACHINE_CYCLES = 2
-AJMP_OPCODES = {0x01, 0x21, 0x41, 0x61, 0x81, 0xA1, 0xC1, 0xE1}
-ACALL_OPCODES = {0x11, 0x31, 0x51, 0x71, 0x91, 0xB1, 0xD1, 0xF1}
-PAGE_BRANCH_OPCODES = AJMP_OPCODES | ACALL_OPCODES
+_ACC = SFR_ADDRESSES["ACC"]
+_B = SFR_ADDRESSES["B"]
+_SP = SFR_ADDRESSES["SP"]
+_DPL = SFR_ADDRESSES["DPL"]
+_DPH = SFR_ADDRESSES["DPH"]
+_PSW = SFR_ADDRESSES["PSW"]
+_SBUF = SFR_ADDRESSES["SBUF"]
+_SCON = SFR_ADDRESSES["SCON"]
+_PSW_BANK_MASK = 0x18
+_SNAPSHOT_FLAGS = ("P", "OV", "RS0", "RS1", "F0", "AC", "CY")
+_CONDITION_SFR_REGISTERS = {"A": _ACC, "B": _B, "SP": _SP, "PSW": _PSW}
+_FLAG_MASKS = {name: (address - 0x80, 1 << bit) for name, (address, bit) in BIT_ALIASES.items() if address >= 0x80}
+_CY_MASK = _FLAG_MASKS["CY"][1]
+_INTERRUPT_SOURCES = tuple(
+    (
+        name,
+        vector,
+        tuple(_FLAG_MASKS[flag] for flag in (flags if isinstance(flags, tuple) else (flags,))),
+        _FLAG_MASKS[enable],
+        _FLAG_MASKS[priority],
+    )
+    for name, vector, flags, enable, priority in INTERRUPT_ORDER
+)
+_TIMER_COUNT_SFRS = tuple(SFR_ADDRESSES[name] for name in ("TL0", "TH0", "TL1", "TH1", "TL2", "TH2"))
+_PERIPHERAL_CONFIG_SFRS = tuple(
+    SFR_ADDRESSES[name] for name in ("PCON", "TCON", "TMOD", "SCON", "SBUF", "T2CON", "T2MOD", "RCAP2L", "RCAP2H")
+)
+_UNBOUNDED_PERIPHERAL_EVENT = 1 << 62
+_POLLED_FLAG_BITS = frozenset(sum(BIT_ALIASES[name]) for name in ("TF0", "TF1", "TF2", "RI", "TI"))
+_PORT_NAMES = {SFR_ADDRESSES[name]: name for name in ("P0", "P1", "P2", "P3")}
+# Port reads are kept as (address, value, cycles) and expanded to eight per-pin events on demand.
+_PORT_READ_HISTORY = 16
+_PENDING_PORT_READ_LIMIT = 256
 _DEBUG_TIMING = os.environ.get("HEXLOGIC_DEBUG_TIMING", "").strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _count_with_reload(value: int, increments: int, modulus: int, reload: int) -> tuple[int, int]:
+    first = modulus - value
+    if increments < first:
+        return value + increments, 0
+    remaining = increments - first
+    period = modulus - reload
+    return reload + remaining % period, 1 + remaining // period
+
+
 @dataclass
 class SerialPort:
     tx_log: list[int] = field(default_factory=list)
@@ -34,7 +88,7 @@ class SerialPort:
     tx_byte: int | None = None
 
 
-InstructionHandler = Callable[[int], tuple[str, int, list[int]]]
+InstructionHandler = Callable[[DecodedInstruction], None]
 
 
 class CPU8051(BaseCPU):
@@ -42,8 +96,8 @@ class CPU8051(BaseCPU):
         super().__init__()
         self.memory = MemoryMap(code_size=code_size, xram_size=xram_size, upper_iram=upper_iram)
         self.serial = SerialPort()
-        self.io_reads: deque[dict[str, int | float | str]] = deque(maxlen=128)
-        self._pending_io_reads: deque[dict[str, int | float | str]] = deque()
+        self._port_reads: deque[tuple[int, int, int]] = deque(maxlen=_PORT_READ_HISTORY)
+        self._pending_port_reads: deque[tuple[int, int, int]] = deque(maxlen=_PENDING_PORT_READ_LIMIT)
         self.active_interrupt_priorities: list[int] = []
         self._previous_int_pins = {0: 1, 1: 1}
         self._previous_timer_pins = {0: 1, 1: 1}
@@ -52,8 +106,17 @@ class CPU8051(BaseCPU):
         self._pending_t2_edges = {0: 0, 1: 0}
         self._instruction_active = False
         self._last_hardware_tick_signature = None
-        self._listing_text_by_address: dict[int, str] = {}
         self._dispatch: tuple[InstructionHandler, ...] = self._build_dispatch_table()
+        self._predecoded = PredecodeCache(code_size)
+        self._blocks = BasicBlockCache()
+        self.memory.add_code_write_listener(self._predecoded.invalidate)
+        self.memory.add_code_write_listener(self._blocks.invalidate)
+        self._deferred_peripheral_cycles = 0
+        self._next_peripheral_event: int | None = None
+        self._peripheral_schedule_stale = True
+        self._materializing_peripherals = False
+        self.memory.add_sfr_read_listener(_TIMER_COUNT_SFRS, self._on_timer_count_read)
+        self.memory.add_sfr_write_listener(_TIMER_COUNT_SFRS + _PERIPHERAL_CONFIG_SFRS, self._on_peripheral_sfr_write)
         self.reset(hard=True)
 
     def reset(self, *, hard: bool = False) -> None:
@@ -65,9 +128,10 @@ class CPU8051(BaseCPU):
         self.last_interrupt = None
         self.active_interrupt_priorities.clear()
         self.debugger.call_stack.clear()
+        self.debugger.history.clear()
         self.serial = SerialPort()
-        self.io_reads.clear()
-        self._pending_io_reads.clear()
+        self._port_reads.clear()
+        self._pending_port_reads.clear()
         self._previous_int_pins = {0: 1, 1: 1}
         self._previous_timer_pins = {0: 1, 1: 1}
         self._pending_timer_edges = {0: 0, 1: 0}
@@ -75,6 +139,7 @@ class CPU8051(BaseCPU):
         self._pending_t2_edges = {0: 0, 1: 0}
         self._instruction_active = False
         self._last_hardware_tick_signature = None
+        self._reset_peripheral_schedule()
         self._set_port_defaults()
         if self.program and not hard:
             self.load_program(self.program)
@@ -91,9 +156,10 @@ class CPU8051(BaseCPU):
         self.last_interrupt = None
         self.active_interrupt_priorities.clear()
         self.debugger.call_stack.clear()
+        self.debugger.history.clear()
         self.serial = SerialPort()
-        self.io_reads.clear()
-        self._pending_io_reads.clear()
+        self._port_reads.clear()
+        self._pending_port_reads.clear()
         self._previous_int_pins = {0: 1, 1: 1}
         self._previous_timer_pins = {0: 1, 1: 1}
         self._pending_timer_edges = {0: 0, 1: 0}
@@ -101,14 +167,16 @@ class CPU8051(BaseCPU):
         self._pending_t2_edges = {0: 0, 1: 0}
         self._instruction_active = False
         self._last_hardware_tick_signature = None
+        self._reset_peripheral_schedule()
         self._set_port_defaults()
+        self._predecode_program(program)
         self.memory.consume_changes()
 
     def effective_clock_hz(self) -> float:
         return super().effective_clock_hz() / 12.0
 
-    def _current_time_ms(self) -> float:
-        cycles = float(self.cycles)
+    def _cycles_to_time_ms(self, cycles: int) -> float:
+        cycles = float(cycles)
         computed_seconds = cycles / max(1.0, self.effective_clock_hz())
         computed_ms = computed_seconds * 1000.0
         if _DEBUG_TIMING:
@@ -122,25 +190,50 @@ class CPU8051(BaseCPU):
             )
         return computed_ms
 
+    @property
+    def io_reads(self) -> list[dict[str, int | float | str]]:
+        return self._expand_port_reads(self._port_reads)
+
     def _record_port_read(self, address: int, value: int) -> None:
-        port_name = {
-            SFR_ADDRESSES["P0"]: "P0",
-            SFR_ADDRESSES["P1"]: "P1",
-            SFR_ADDRESSES["P2"]: "P2",
-            SFR_ADDRESSES["P3"]: "P3",
-        }.get(address & 0xFF)
-        if not port_name:
+        if address not in _PORT_NAMES:
             return
-        time_ms = round(self._current_time_ms(), 6)
-        for bit in range(8):
-            event = {
-                "signal": f"{port_name}.{bit}",
-                "value": (value >> bit) & 0x01,
-                "time_ms": time_ms,
-                "source": "cpu",
-            }
-            self.io_reads.append(event)
-            self._pending_io_reads.append(dict(event))
+        entry = (address, value, self.cycles)
+        for reads in (self._port_reads, self._pending_port_reads):
+            if reads and reads[-1][0] == address and reads[-1][1] == value:
+                reads[-1] = entry
+            else:
+                reads.append(entry)
+
+    def _expand_port_reads(self, reads: Iterable[tuple[int, int, int]]) -> list[dict[str, int | float | str]]:
+        events: list[dict[str, int | float | str]] = []
+        for address, value, cycles in reads:
+            port_name = _PORT_NAMES[address]
+            time_ms = round(self._cycles_to_time_ms(cycles), 6)
+            events.extend(
+                {"signal": f"{port_name}.{bit}", "value": (value >> bit) & 0x01, "time_ms": time_ms, "source": "cpu"}
+                for bit in range(8)
+            )
+        return events
+
+    def _port_reads_from_state(self, state: dict, compact_key: str, events_key: str) -> list[tuple[int, int, int]]:
+        if compact_key in state:
+            return [(int(address) & 0xFF, int(value) & 0xFF, int(cycles)) for address, value, cycles in state.get(compact_key, [])]
+        # Older payloads stored the expanded per-pin events; fold each port read back into one entry.
+        port_addresses = {name: address for address, name in _PORT_NAMES.items()}
+        cycles_per_ms = max(1.0, self.effective_clock_hz()) / 1000.0
+        reads: list[tuple[int, int, int]] = []
+        for item in state.get(events_key, []):
+            port_name, _, bit = str(item.get("signal", "")).partition(".")
+            if port_name not in port_addresses or not bit.isdigit():
+                continue
+            address = port_addresses[port_name]
+            level = (int(item.get("value", 0)) & 0x01) << int(bit)
+            if int(bit) and reads and reads[-1][0] == address:
+                reads[-1] = (address, reads[-1][1] | level, reads[-1][2])
+            else:
+                cycles = int(round(float(item.get("time_ms", 0.0) or 0.0) * cycles_per_ms))
+                reads.append((address, level, cycles))
+        return reads
 
     def _serial_mode(self) -> int:
         return (self.memory.read_sfr("SCON") >> 6) & 0x03
@@ -195,6 +288,8 @@ class CPU8051(BaseCPU):
         self.memory.write_sfr("B", 0x00)
 
     def set_pin(self, port_index: int, bit: int, level: int | bool | None) -> None:
+        self._log_external_input("set_pin", (port_index, bit, level))
+        self._invalidate_peripheral_schedule()
         previous_level = self._read_port_pin_level(port_index, bit)
         self.memory.set_pin_input(port_index, bit, level)
         current_level = self._read_port_pin_level(port_index, bit)
@@ -212,7 +307,7 @@ class CPU8051(BaseCPU):
             self._previous_t2_pins[t2_pin] = current_level
 
     def _read_port_pin_level(self, port_index: int, bit: int) -> int:
-        return (self.memory.get_port(port_index).read_pin() >> bit) & 0x01
+        return self.memory.get_port(port_index).read_pin_bit(bit)
 
     def _timer_gate_open(self, timer_id: int) -> bool:
         shift = 0 if timer_id == 0 else 4
@@ -234,63 +329,85 @@ class CPU8051(BaseCPU):
         return queued_edges + boundary_edge
 
     def inject_serial_rx(self, data: bytes | bytearray | list[int]) -> None:
-        for byte in data:
-            self.serial.rx_queue.append(int(byte) & 0xFF)
+        data = [int(byte) & 0xFF for byte in data]
+        self._log_external_input("inject_serial_rx", (data,))
+        self._invalidate_peripheral_schedule()
+        self.serial.rx_queue.extend(data)
         self._ensure_serial_rx_progress()
 
     @property
     def sp(self) -> int:
-        return self.memory.read_sfr("SP")
+        return self.memory.sfr[_SP - 0x80]
 
     @sp.setter
     def sp(self, value: int) -> None:
-        self.memory.write_sfr("SP", value)
+        self.memory.write_direct(_SP, value)
 
     @property
     def a(self) -> int:
-        return self.memory.read_sfr("A")
+        return self.memory.sfr[_ACC - 0x80]
 
     @a.setter
     def a(self, value: int) -> None:
-        self.memory.write_sfr("A", value & 0xFF)
+        self.memory.write_direct(_ACC, value & 0xFF)
         self._update_parity()
 
     @property
     def b(self) -> int:
-        return self.memory.read_sfr("B")
+        return self.memory.sfr[_B - 0x80]
 
     @b.setter
     def b(self, value: int) -> None:
-        self.memory.write_sfr("B", value & 0xFF)
+        self.memory.write_direct(_B, value & 0xFF)
 
     @property
     def dptr(self) -> int:
-        return (self.memory.read_sfr("DPH") << 8) | self.memory.read_sfr("DPL")
+        sfr = self.memory.sfr
+        return (sfr[_DPH - 0x80] << 8) | sfr[_DPL - 0x80]
 
     @dptr.setter
     def dptr(self, value: int) -> None:
         value &= 0xFFFF
-        self.memory.write_sfr("DPH", (value >> 8) & 0xFF)
-        self.memory.write_sfr("DPL", value & 0xFF)
+        self.memory.write_direct(_DPH, (value >> 8) & 0xFF)
+        self.memory.write_direct(_DPL, value & 0xFF)
 
     def _get_flag(self, name: str) -> int:
-        return self.memory.read_named_bit(name)
+        entry = _FLAG_MASKS.get(name)
+        if entry is None:
+            return self.memory.read_named_bit(name)
+        index, mask = entry
+        return 1 if self.memory.sfr[index] & mask else 0
 
     def _set_flag(self, name: str, value: int | bool) -> None:
-        self.memory.write_named_bit(name, 1 if value else 0)
+        entry = _FLAG_MASKS.get(name)
+        if entry is None:
+            self.memory.write_named_bit(name, 1 if value else 0)
+            return
+        index, mask = entry
+        current = self.memory.sfr[index]
+        updated = (current | mask) if value else (current & ~mask & 0xFF)
+        if updated != current:
+            self.memory.write_direct(0x80 + index, updated)
 
     def _update_parity(self) -> None:
-        self._set_flag("P", bin(self.a & 0xFF).count("1") % 2)
+        sfr = self.memory.sfr
+        psw = sfr[_PSW - 0x80]
+        updated = (psw & ~PSW_P & 0xFF) | PARITY[sfr[_ACC - 0x80]]
+        if updated != psw:
+            self.memory.write_direct(_PSW, updated)
 
     def _bank_base(self) -> int:
-        psw = self.memory.read_sfr("PSW")
-        return ((psw >> 3) & 0x03) * 8
+        return self.memory.sfr[_PSW - 0x80] & _PSW_BANK_MASK
 
     def _read_r(self, index: int) -> int:
-        return self.memory.read_direct(self._bank_base() + index)
+        memory = self.memory
+        address = (memory.sfr[_PSW - 0x80] & _PSW_BANK_MASK) + index
+        if memory.watching_reads:
+            return memory.read_direct(address)
+        return memory.iram_low[address]
 
     def _write_r(self, index: int, value: int) -> None:
-        self.memory.write_direct(self._bank_base() + index, value & 0xFF)
+        self.memory.write_direct((self.memory.sfr[_PSW - 0x80] & _PSW_BANK_MASK) + index, value & 0xFF)
 
     def _push_byte(self, value: int) -> None:
         next_sp = self.sp + 1
@@ -315,16 +432,6 @@ class CPU8051(BaseCPU):
         low = self._pop_byte()
         return ((high << 8) | low) & 0xFFFF
 
-    def _fetch8(self) -> int:
-        byte = self.memory.read_code(self.pc)
-        self.pc = (self.pc + 1) & 0xFFFF
-        return byte
-
-    def _fetch16(self) -> int:
-        high = self._fetch8()
-        low = self._fetch8()
-        return ((high << 8) | low) & 0xFFFF
-
     def _read_direct(self, address: int, *, rmw: bool = False) -> int:
         value = self.memory.read_direct(address, rmw=rmw)
         if not rmw:
@@ -334,27 +441,16 @@ class CPU8051(BaseCPU):
     def _write_direct(self, address: int, value: int) -> None:
         value &= 0xFF
         self.memory.write_direct(address, value)
-        if self._instruction_active and (address & 0xFF) == SFR_ADDRESSES["SBUF"]:
+        if self._instruction_active and (address & 0xFF) == _SBUF:
             self.serial.tx_byte = value
             self.serial.pending_tx_cycles = max(self._serial_frame_cycles(transmit=True), self.serial.pending_tx_cycles)
-        if (address & 0xFF) == SFR_ADDRESSES["SCON"]:
+        if (address & 0xFF) == _SCON:
             self._ensure_serial_rx_progress()
-        if address == SFR_ADDRESSES["A"]:
+        if address == _ACC:
             self._update_parity()
 
-    def _read_direct_or_r(self, opcode_low: int) -> int:
-        if opcode_low == 4:
-            return self._fetch8()
-        if opcode_low == 5:
-            return self._read_direct(self._fetch8())
-        if opcode_low == 6:
-            return self.memory.read_indirect(self._read_r(0))
-        if opcode_low == 7:
-            return self.memory.read_indirect(self._read_r(1))
-        return self._read_r(opcode_low - 8)
-
     def _carry(self) -> int:
-        return 1 if self._get_flag("CY") else 0
+        return 1 if self.memory.sfr[_PSW - 0x80] & _CY_MASK else 0
 
     def _debug_registers(self) -> dict[str, int]:
         return {
@@ -363,41 +459,105 @@ class CPU8051(BaseCPU):
             "SP": self.sp,
             "PC": self.pc & 0xFFFF,
             "DPTR": self.dptr,
-            "PSW": self.memory.read_sfr("PSW"),
+            "PSW": self.memory.sfr[_PSW - 0x80],
             **{f"R{i}": self._read_r(i) for i in range(8)},
         }
 
-    def _register_diff(self, before: dict[str, int], after: dict[str, int]) -> dict[str, dict[str, int]]:
+    def _condition_reader(self, name: str) -> Callable[[], int | bool] | None:
+        if name in _SNAPSHOT_FLAGS:
+            return lambda: bool(self._get_flag(name))
+        if name in _CONDITION_SFR_REGISTERS:
+            index = _CONDITION_SFR_REGISTERS[name] - 0x80
+            return lambda: self.memory.sfr[index]
+        if name == "DPTR":
+            return lambda: self.dptr
+        if len(name) == 2 and name[0] == "R" and name[1] in "01234567":
+            register = int(name[1])
+            return lambda: self._read_r(register)
+        return super()._condition_reader(name)
+
+    def _condition_memory_reader(self, space: str) -> Callable[[int], int] | None:
+        # Conditions peek at the backing arrays so evaluating them never fires read watchpoints or SFR read
+        # listeners; port SFRs report their pin levels, as an instruction reading them would see.
+        memory = self.memory
+        if space == "IRAM":
+            def _read_iram(address: int) -> int:
+                address &= 0xFF
+                if address < 0x80:
+                    return memory.iram_low[address]
+                if not memory.upper_iram_enabled:
+                    raise MemoryAccessError(f"Indirect IRAM address 0x{address:02X} is not available on this target")
+                return memory.iram_high[address - 0x80]
+
+            return _read_iram
+        if space == "SFR":
+            def _read_sfr(address: int) -> int:
+                address &= 0xFF
+                if address < 0x80:
+                    return memory.iram_low[address]
+                port = memory.ports.get(address)
+                return port.read_pin() if port is not None else memory.sfr[address - 0x80]
+
+            return _read_sfr
+        return super()._condition_memory_reader(space)
+
+    def _register_diff_from_changes(
+        self, start_pc: int, changes: dict[str, list[tuple[int, int, int]]]
+    ) -> dict[str, dict[str, int]]:
+        # Registers live in IRAM/SFR space, so the first recorded old value of each address is its
+        # value before the instruction; anything not in the log is unchanged.
+        pc = self.pc & 0xFFFF
+        sfr_changes = changes.get("sfr")
+        iram_changes = changes.get("iram")
+        if not sfr_changes and not iram_changes:
+            return {"PC": {"before": start_pc, "after": pc}} if start_pc != pc else {}
+        sfr = self.memory.sfr
+        sfr_before: dict[int, int] = {}
+        for address, old, _new in sfr_changes or ():
+            sfr_before.setdefault(address, old)
+        iram_before: dict[int, int] = {}
+        for address, old, _new in iram_changes or ():
+            iram_before.setdefault(address, old)
+
+        def sfr_pair(address: int) -> tuple[int, int]:
+            after = sfr[address - 0x80]
+            return sfr_before.get(address, after), after
+
+        acc, b, sp, dpl, dph, psw = (sfr_pair(address) for address in (_ACC, _B, _SP, _DPL, _DPH, _PSW))
+        pairs = {
+            "A": acc,
+            "B": b,
+            "SP": sp,
+            "PC": (start_pc, pc),
+            "DPTR": ((dph[0] << 8) | dpl[0], (dph[1] << 8) | dpl[1]),
+            "PSW": psw,
+        }
+        iram = self.memory.iram_low
+        bank_before = psw[0] & _PSW_BANK_MASK
+        bank_after = psw[1] & _PSW_BANK_MASK
+        for index in range(8):
+            after = iram[bank_after + index]
+            address = bank_before + index
+            pairs[f"R{index}"] = (iram_before.get(address, iram[address]), after)
         return {
-            name: {"before": before[name], "after": after[name]}
-            for name in after
-            if before.get(name) != after[name]
+            name: {"before": before, "after": after}
+            for name, (before, after) in pairs.items()
+            if before != after
         }
 
-    def _set_add_flags(self, left: int, right: int, carry_in: int, result: int) -> None:
-        total = left + right + carry_in
-        self._set_flag("CY", total > 0xFF)
-        self._set_flag("AC", ((left & 0x0F) + (right & 0x0F) + carry_in) > 0x0F)
-        self._set_flag("OV", (~(left ^ right) & (left ^ result) & 0x80) != 0)
-
-    def _set_sub_flags(self, left: int, right: int, borrow: int, result: int) -> None:
-        total = left - right - borrow
-        self._set_flag("CY", total < 0)
-        self._set_flag("AC", (left & 0x0F) < ((right & 0x0F) + borrow))
-        self._set_flag("OV", ((left ^ right) & (left ^ result) & 0x80) != 0)
+    def _store_arithmetic_result(self, entry: int) -> None:
+        memory = self.memory
+        memory.write_direct(_ACC, entry & 0xFF)
+        psw = memory.sfr[_PSW - 0x80]
+        updated = (psw & ~ARITHMETIC_FLAGS & 0xFF) | (entry >> 8)
+        if updated != psw:
+            memory.write_direct(_PSW, updated)
 
     def _bit_address_to_byte_bit(self, bit_addr: int) -> tuple[int, int]:
         if bit_addr < 0x80:
             return 0x20 + (bit_addr // 8), bit_addr % 8
         return bit_addr & 0xF8, bit_addr & 0x07
 
-    def _decode_ajmp_target(self, opcode: int, low: int, next_pc: int) -> int:
-        return ((next_pc & 0xF800) | ((opcode & 0xE0) << 3) | low) & 0xFFFF
-
-    def _relative_target(self, offset: int) -> int:
-        signed = offset if offset < 0x80 else offset - 0x100
-        return (self.pc + signed) & 0xFFFF
-
     def _set_pc(self, address: int) -> None:
         self.pc = address & 0xFFFF
 
@@ -413,19 +573,6 @@ class CPU8051(BaseCPU):
             self._set_flag(ie_flag, 1 if level == 0 else 0)
         self._previous_int_pins[interrupt_index] = level
 
-    def _interrupt_pending(self, interrupt_name: str, flag_name, enable_name: str) -> bool:
-        if not self._get_flag("EA") or not self._get_flag(enable_name):
-            return False
-        if interrupt_name == "T2":
-            if self._timer2_up_down_mode_active():
-                return bool(self._get_flag("TF2"))
-            return any(self._get_flag(name) for name in ("TF2", "EXF2"))
-        if isinstance(flag_name, tuple):
-            return any(self._get_flag(name) for name in flag_name)
-        if interrupt_name in {"EX0", "EX1"}:
-            self._update_external_interrupt_latch(0 if interrupt_name == "EX0" else 1)
-        return bool(self._get_flag(flag_name))
-
     def _clear_interrupt_source(self, interrupt_name: str) -> None:
         if interrupt_name == "EX0" and self._get_flag("IT0"):
             self._set_flag("IE0", 0)
@@ -439,22 +586,37 @@ class CPU8051(BaseCPU):
             self._set_flag("TF2", 0)
             self._set_flag("EXF2", 0)
 
-    def _maybe_take_interrupt(self) -> str | None:
+    def _pending_interrupt(self) -> tuple[str, int] | None:
         if self.halted:
             return None
-        if not self._get_flag("EA"):
+        sfr = self.memory.sfr
+        ea_index, ea_mask = _FLAG_MASKS["EA"]
+        if not sfr[ea_index] & ea_mask:
             return None
         current_priority = self.active_interrupt_priorities[-1] if self.active_interrupt_priorities else -1
-        pending: list[tuple[int, int, str, int]] = []
-        for order, (name, vector, flag_name, enable_name, priority_name) in enumerate(INTERRUPT_ORDER):
-            if self._interrupt_pending(name, flag_name, enable_name):
-                priority = 1 if self._get_flag(priority_name) else 0
-                if priority > current_priority:
-                    pending.append((-priority, order, name, vector))
-        if not pending:
+        selected: tuple[int, str, int] | None = None
+        for name, vector, flags, (enable_index, enable_mask), (priority_index, priority_mask) in _INTERRUPT_SOURCES:
+            if not sfr[enable_index] & enable_mask:
+                continue
+            if name in {"EX0", "EX1"}:
+                self._update_external_interrupt_latch(0 if name == "EX0" else 1)
+            elif name == "T2" and self._timer2_up_down_mode_active():
+                flags = flags[:1]
+            if not any(sfr[index] & mask for index, mask in flags):
+                continue
+            priority = 1 if sfr[priority_index] & priority_mask else 0
+            # INTERRUPT_ORDER is the tie-break within a priority level, so only a higher level displaces a match.
+            if priority > current_priority and (selected is None or priority > selected[0]):
+                selected = (priority, name, vector)
+        if selected is None:
+            return None
+        return selected[1], selected[2]
+
+    def _maybe_take_interrupt(self) -> str | None:
+        pending = self._pending_interrupt()
+        if pending is None:
             return None
-        pending.sort()
-        _, _, name, vector = pending[0]
+        name, vector = pending
         self._push_word(self.pc)
         self.debugger.call_stack.append(self.pc)
         self.active_interrupt_priorities.append(1 if self._get_flag(next(entry[4] for entry in INTERRUPT_ORDER if entry[0] == name)) else 0)
@@ -485,84 +647,71 @@ class CPU8051(BaseCPU):
                 self._set_flag("RI", 1)
                 self._ensure_serial_rx_progress()
 
-    def _tick_timer_mode(self, timer_id: int, machine_cycles: int) -> None:
+    def _tick_timer_mode(self, timer_id: int, machine_cycles: int) -> int:
         shift = 0 if timer_id == 0 else 4
         mode = (self.memory.read_sfr("TMOD") >> shift) & 0x03
         if timer_id == 0 and mode == 3:
-            self._tick_split_timer0(machine_cycles)
-            return
+            return self._tick_split_timer0(machine_cycles)[0]
         counter_mode = (self.memory.read_sfr("TMOD") >> (shift + 2)) & 0x01
         run_flag = self._get_flag("TR0" if timer_id == 0 else "TR1")
         if not run_flag or not self._timer_gate_open(timer_id):
             self._previous_timer_pins[timer_id] = self._read_port_pin_level(3, 4 + timer_id)
-            return
+            return 0
         increments = self._timer_increment_count(timer_id, machine_cycles, counter_mode=bool(counter_mode))
         if increments <= 0:
-            return
+            return 0
         th_name = "TH0" if timer_id == 0 else "TH1"
         tl_name = "TL0" if timer_id == 0 else "TL1"
         flag_name = "TF0" if timer_id == 0 else "TF1"
         if mode == 0:
-            value = ((self.memory.read_sfr(th_name) << 5) | (self.memory.read_sfr(tl_name) & 0x1F)) + increments
-            overflow = value > 0x1FFF
-            value &= 0x1FFF
+            tl = self.memory.read_sfr(tl_name)
+            value, overflows = _count_with_reload((self.memory.read_sfr(th_name) << 5) | (tl & 0x1F), increments, 0x2000, 0)
             self.memory.write_sfr(th_name, (value >> 5) & 0xFF)
-            tl = self.memory.read_sfr(tl_name) & 0xE0
-            self.memory.write_sfr(tl_name, tl | (value & 0x1F))
-            if overflow:
-                self._set_flag(flag_name, 1)
-            return
-        if mode == 1:
-            value = (((self.memory.read_sfr(th_name) << 8) | self.memory.read_sfr(tl_name)) + increments) & 0x1FFFF
-            overflow = value > 0xFFFF
-            value &= 0xFFFF
+            self.memory.write_sfr(tl_name, (tl & 0xE0) | (value & 0x1F))
+        elif mode == 1:
+            value, overflows = _count_with_reload(
+                (self.memory.read_sfr(th_name) << 8) | self.memory.read_sfr(tl_name), increments, 0x10000, 0
+            )
             self.memory.write_sfr(th_name, (value >> 8) & 0xFF)
             self.memory.write_sfr(tl_name, value & 0xFF)
-            if overflow:
-                self._set_flag(flag_name, 1)
-            return
-        if mode == 2:
-            tl = self.memory.read_sfr(tl_name)
-            reload = self.memory.read_sfr(th_name)
-            for _ in range(increments):
-                tl += 1
-                if tl > 0xFF:
-                    tl = reload
-                    self._set_flag(flag_name, 1)
-            self.memory.write_sfr(tl_name, tl & 0xFF)
-            return
-        # Timer1 mode 3 is not defined for classic 8051 operation.
-        return
-
-    def _tick_split_timer0(self, machine_cycles: int) -> None:
+        elif mode == 2:
+            value, overflows = _count_with_reload(
+                self.memory.read_sfr(tl_name), increments, 0x100, self.memory.read_sfr(th_name)
+            )
+            self.memory.write_sfr(tl_name, value)
+        else:
+            # Timer1 mode 3 is not defined for classic 8051 operation.
+            return 0
+        if overflows:
+            self._set_flag(flag_name, 1)
+        return overflows
+
+    def _tick_split_timer0(self, machine_cycles: int) -> tuple[int, int]:
+        tl0_overflows = 0
+        th0_overflows = 0
         if self._get_flag("TR0") and self._timer_gate_open(0):
             increments = self._timer_increment_count(0, machine_cycles, counter_mode=bool((self.memory.read_sfr("TMOD") >> 2) & 0x01))
-            tl0 = self.memory.read_sfr("TL0")
-            for _ in range(increments):
-                tl0 += 1
-                if tl0 > 0xFF:
-                    tl0 = 0
-                    self._set_flag("TF0", 1)
-            self.memory.write_sfr("TL0", tl0 & 0xFF)
+            tl0, tl0_overflows = _count_with_reload(self.memory.read_sfr("TL0"), increments, 0x100, 0)
+            self.memory.write_sfr("TL0", tl0)
+            if tl0_overflows:
+                self._set_flag("TF0", 1)
         else:
             self._previous_timer_pins[0] = self._read_port_pin_level(3, 4)
         if self._get_flag("TR1") and self._timer_gate_open(1):
             increments = self._timer_increment_count(1, machine_cycles, counter_mode=bool((self.memory.read_sfr("TMOD") >> 6) & 0x01))
-            th0 = self.memory.read_sfr("TH0")
-            for _ in range(increments):
-                th0 += 1
-                if th0 > 0xFF:
-                    th0 = 0
-                    self._set_flag("TF1", 1)
-            self.memory.write_sfr("TH0", th0 & 0xFF)
+            th0, th0_overflows = _count_with_reload(self.memory.read_sfr("TH0"), increments, 0x100, 0)
+            self.memory.write_sfr("TH0", th0)
+            if th0_overflows:
+                self._set_flag("TF1", 1)
         else:
             self._previous_timer_pins[1] = self._read_port_pin_level(3, 5)
+        return tl0_overflows, th0_overflows
 
-    def _tick_timer2(self, machine_cycles: int) -> None:
+    def _tick_timer2(self, machine_cycles: int) -> int:
         if not self._get_flag("TR2"):
             self._previous_t2_pins[0] = self._read_port_pin_level(1, 0)
             self._previous_t2_pins[1] = self._read_port_pin_level(1, 1)
-            return
+            return 0
         counter_mode = bool(self._get_flag("C/T2"))
         baud_mode = self._timer2_baud_generator_active()
         up_down_mode = self._timer2_up_down_mode_active() and not counter_mode
@@ -572,29 +721,31 @@ class CPU8051(BaseCPU):
             increments = int(self._pending_t2_edges.get(0, 0))
             self._pending_t2_edges[0] = 0
             if increments <= 0 and not t2ex_edges:
-                return
+                return 0
         else:
             increments = int(machine_cycles)
         reload_value = ((self.memory.read_sfr("RCAP2H") << 8) | self.memory.read_sfr("RCAP2L")) & 0xFFFF
         value = ((self.memory.read_sfr("TH2") << 8) | self.memory.read_sfr("TL2")) & 0xFFFF
         exen2 = bool(self._get_flag("EXEN2"))
         cp_rl2 = bool(self._get_flag("CP/RL2"))
+        overflows = 0
         if up_down_mode:
-            count_up = bool(self._read_port_pin_level(1, 1))
-            for _ in range(max(0, increments)):
-                if count_up:
-                    value = (value + 1) & 0xFFFF
-                    if value == 0x0000:
-                        value = reload_value
-                        self._set_flag("TF2", 1)
-                        self._set_flag("EXF2", 0 if self._get_flag("EXF2") else 1)
+            if increments > 0:
+                if self._read_port_pin_level(1, 1):
+                    value, overflows = _count_with_reload(value, increments, 0x10000, reload_value)
                 else:
-                    if value == reload_value:
-                        value = 0xFFFF
-                        self._set_flag("TF2", 1)
-                        self._set_flag("EXF2", 0 if self._get_flag("EXF2") else 1)
+                    first = ((value - reload_value) & 0xFFFF) + 1
+                    if increments < first:
+                        value -= increments
                     else:
-                        value = (value - 1) & 0xFFFF
+                        remaining = increments - first
+                        period = 0x10000 - reload_value
+                        value = 0xFFFF - (remaining % period)
+                        overflows = 1 + remaining // period
+            if overflows:
+                self._set_flag("TF2", 1)
+                if overflows & 1:
+                    self._set_flag("EXF2", 0 if self._get_flag("EXF2") else 1)
         else:
             if exen2 and t2ex_edges:
                 if cp_rl2 and not baud_mode:
@@ -605,16 +756,16 @@ class CPU8051(BaseCPU):
                     value = reload_value
                 self._set_flag("EXF2", 1)
             if increments > 0:
-                total = value + increments
-                overflow = total > 0xFFFF
-                value = total & 0xFFFF
-                if overflow:
-                    if not cp_rl2 or baud_mode:
-                        value = reload_value
-                    if not baud_mode:
-                        self._set_flag("TF2", 1)
+                auto_reload = not cp_rl2 or baud_mode
+                value, overflows = _count_with_reload(value, increments, 0x10000, reload_value if auto_reload else 0)
+                if overflows and auto_reload:
+                    # The overflowing tick leaves Timer 2 parked on the reload value.
+                    value = reload_value
+                if overflows and not baud_mode:
+                    self._set_flag("TF2", 1)
         self.memory.write_sfr("TH2", (value >> 8) & 0xFF)
         self.memory.write_sfr("TL2", value & 0xFF)
+        return overflows
 
     def _peripherals_active(self) -> bool:
         return bool(
@@ -626,58 +777,174 @@ class CPU8051(BaseCPU):
             or self.serial.rx_queue
         )
 
-    def _tick_peripherals(self, machine_cycles: int) -> None:
+    def _timer_event_cycles(self, timer_id: int) -> int | None:
+        tmod = self.memory.sfr[SFR_ADDRESSES["TMOD"] - 0x80]
+        shift = 0 if timer_id == 0 else 4
+        mode = (tmod >> shift) & 0x03
+        if timer_id == 1 and mode == 3:
+            return None
+        if not self._get_flag("TR0" if timer_id == 0 else "TR1"):
+            return None
+        if (tmod >> (shift + 2)) & 0x03 or self._pending_timer_edges.get(timer_id):
+            return 0
+        tl = self.memory.sfr[SFR_ADDRESSES["TL0" if timer_id == 0 else "TL1"] - 0x80]
+        th = self.memory.sfr[SFR_ADDRESSES["TH0" if timer_id == 0 else "TH1"] - 0x80]
+        if mode == 0:
+            return 0x2000 - ((th << 5) | (tl & 0x1F))
+        if mode == 1:
+            return 0x10000 - ((th << 8) | tl)
+        return 0x100 - tl
+
+    def _split_timer_event_cycles(self) -> int | None:
+        tmod = self.memory.sfr[SFR_ADDRESSES["TMOD"] - 0x80]
+        candidates = []
+        for timer_id, run_flag, count_name in ((0, "TR0", "TL0"), (1, "TR1", "TH0")):
+            if not self._get_flag(run_flag):
+                continue
+            shift = 0 if timer_id == 0 else 4
+            if (tmod >> (shift + 2)) & 0x03 or self._pending_timer_edges.get(timer_id):
+                return 0
+            candidates.append(0x100 - self.memory.sfr[SFR_ADDRESSES[count_name] - 0x80])
+        return min(candidates) if candidates else None
+
+    def _timer2_event_cycles(self) -> int | None:
+        if not self._get_flag("TR2"):
+            return None
+        if self._pending_t2_edges.get(0) or self._pending_t2_edges.get(1):
+            return 0
+        if self._get_flag("C/T2"):
+            return None
+        if self._timer2_up_down_mode_active():
+            return 0
+        return 0x10000 - ((self.memory.sfr[SFR_ADDRESSES["TH2"] - 0x80] << 8) | self.memory.sfr[SFR_ADDRESSES["TL2"] - 0x80])
+
+    def _serial_event_cycles(self) -> int | None:
+        candidates = []
+        if self.serial.pending_tx_cycles > 0:
+            candidates.append(self.serial.pending_tx_cycles)
+        if self.serial.pending_rx_cycles > 0:
+            candidates.append(self.serial.pending_rx_cycles)
+        elif self.serial.rx_queue and self._get_flag("REN"):
+            return 0
+        return min(candidates) if candidates else None
+
+    def _cycles_until_peripheral_event(self) -> int | None:
         if not self._peripherals_active():
+            return None
+        timer0_mode = self.memory.sfr[SFR_ADDRESSES["TMOD"] - 0x80] & 0x03
+        candidates = [
+            self._split_timer_event_cycles() if timer0_mode == 3 else self._timer_event_cycles(0),
+            self._timer_event_cycles(1),
+            self._timer2_event_cycles(),
+            self._serial_event_cycles(),
+        ]
+        pending = [value for value in candidates if value is not None]
+        return min(pending) if pending else _UNBOUNDED_PERIPHERAL_EVENT
+
+    def _reset_peripheral_schedule(self) -> None:
+        self._deferred_peripheral_cycles = 0
+        self._next_peripheral_event = None
+        self._peripheral_schedule_stale = True
+        self._materializing_peripherals = False
+
+    def _materialize_peripherals(self) -> None:
+        machine_cycles = self._deferred_peripheral_cycles
+        self._deferred_peripheral_cycles = 0
+        self._materializing_peripherals = True
+        try:
+            self._tick_timer_mode(0, machine_cycles)
+            self._tick_timer_mode(1, machine_cycles)
+            self._tick_timer2(machine_cycles)
+            self._tick_serial(machine_cycles)
+        finally:
+            self._materializing_peripherals = False
+        self._peripheral_schedule_stale = True
+
+    def _sync_peripherals(self) -> None:
+        if self._deferred_peripheral_cycles and not self._materializing_peripherals:
+            self._materialize_peripherals()
+
+    def _invalidate_peripheral_schedule(self) -> None:
+        self._sync_peripherals()
+        self._peripheral_schedule_stale = True
+
+    def _on_timer_count_read(self, _address: int) -> None:
+        self._sync_peripherals()
+
+    def _on_peripheral_sfr_write(self, _address: int) -> None:
+        if not self._materializing_peripherals:
+            self._invalidate_peripheral_schedule()
+
+    def sync_peripherals(self) -> dict[str, list[tuple[int, int, int]]]:
+        self._sync_peripherals()
+        return self.memory.consume_changes()
+
+    def _refresh_peripheral_schedule(self) -> None:
+        if self._peripheral_schedule_stale:
+            self._next_peripheral_event = self._cycles_until_peripheral_event()
+            self._peripheral_schedule_stale = False
+
+    def _cycles_until_next_peripheral_event(self) -> int | None:
+        self._refresh_peripheral_schedule()
+        if self._next_peripheral_event is None:
+            return None
+        return self._next_peripheral_event - self._deferred_peripheral_cycles
+
+    def _tick_peripherals(self, machine_cycles: int) -> None:
+        self._refresh_peripheral_schedule()
+        if self._next_peripheral_event is None:
             return
-        self._tick_timer_mode(0, machine_cycles)
-        self._tick_timer_mode(1, machine_cycles)
-        self._tick_timer2(machine_cycles)
-        self._tick_serial(machine_cycles)
+        self._deferred_peripheral_cycles += machine_cycles
+        if self._deferred_peripheral_cycles >= self._next_peripheral_event:
+            self._materialize_peripherals()
 
-    def _tight_loop_fast_path_allowed(self) -> bool:
-        return (
-            self.compact_execution_allowed()
-            and not self.debugger.breakpoints
-            and not self._get_flag("EA")
-            and not self._peripherals_active()
-        )
+    def compact_execution_allowed(self) -> bool:
+        if not super().compact_execution_allowed():
+            return False
+        # Timer counts are only materialized lazily outside full steps, so watching them needs full stepping.
+        return not self.memory.has_watchpoints or not any(self.memory.is_watched("sfr", address) for address in _TIMER_COUNT_SFRS)
+
+    def _fast_path_allowed(self) -> bool:
+        return self.compact_execution_allowed()
+
+    def _breakpoint_pcs_changed(self) -> None:
+        self._blocks.clear()
 
     def _fast_djnz_iterations(self, value: int) -> int:
         return int(value) if int(value) > 0 else 256
 
-    def _try_fast_sjmp_self(self, *, max_steps: int, max_cycles: int) -> dict | None:
-        if self.memory.read_code(self.pc) != 0x80:
-            return None
-        rel = self.memory.read_code((self.pc + 1) & 0xFFFF)
-        signed = rel if rel < 0x80 else rel - 0x100
-        target = (self.pc + 2 + signed) & 0xFFFF
-        if target != self.pc:
-            return None
-        steps = min(int(max_steps), int(max_cycles) // 2)
-        if steps <= 0:
-            return None
-        self.cycles += steps * 2
-        return {"steps": steps, "cycles": steps * 2}
+    def _fast_loop_iterations(self, *, max_steps: int, max_cycles: int, loop_cycles: int, remaining: int | None = None) -> int:
+        iterations = min(int(max_steps), int(max_cycles) // loop_cycles)
+        if remaining is not None:
+            iterations = min(iterations, remaining)
+        event_cycles = self._cycles_until_next_peripheral_event()
+        if event_cycles is not None:
+            # Stop on the iteration that reaches the next timer/serial event so its flags are seen on time.
+            iterations = min(iterations, -(-event_cycles // loop_cycles))
+        return iterations
 
     def _try_fast_djnz_loop(self, *, max_steps: int, max_cycles: int) -> dict | None:
+        if self.pc in self._breakpoint_pcs:
+            return None
         opcode = self.memory.read_code(self.pc)
         if opcode == 0xD5:
             direct = self.memory.read_code((self.pc + 1) & 0xFFFF)
             rel = self.memory.read_code((self.pc + 2) & 0xFFFF)
-            if direct >= 0x80:
+            if direct >= 0x80 or self.memory.is_watched("iram", direct):
                 return None
             signed = rel if rel < 0x80 else rel - 0x100
             if ((self.pc + 3 + signed) & 0xFFFF) != self.pc:
                 return None
             old_value = self._read_direct(direct, rmw=True)
             remaining = self._fast_djnz_iterations(old_value)
-            steps = min(int(max_steps), int(max_cycles) // 2, remaining)
+            steps = self._fast_loop_iterations(max_steps=max_steps, max_cycles=max_cycles, loop_cycles=2, remaining=remaining)
             if steps <= 0:
                 return None
             new_value = (old_value - steps) & 0xFF
             self._write_direct(direct, new_value)
-            changes = self.memory.consume_changes()
             self.cycles += steps * 2
+            self._tick_peripherals(steps * 2)
+            changes = self.memory.consume_change_view()
             self._set_pc((self.pc + 3) & 0xFFFF if steps >= remaining else self.pc)
             return {"steps": steps, "cycles": steps * 2, "memory_changes": changes}
         if 0xD8 <= opcode <= 0xDF:
@@ -686,28 +953,171 @@ class CPU8051(BaseCPU):
             signed = rel if rel < 0x80 else rel - 0x100
             if ((self.pc + 2 + signed) & 0xFFFF) != self.pc:
                 return None
+            if self.memory.is_watched("iram", self._bank_base() + reg):
+                return None
             old_value = self._read_r(reg)
             remaining = self._fast_djnz_iterations(old_value)
-            steps = min(int(max_steps), int(max_cycles) // 2, remaining)
+            steps = self._fast_loop_iterations(max_steps=max_steps, max_cycles=max_cycles, loop_cycles=2, remaining=remaining)
             if steps <= 0:
                 return None
             new_value = (old_value - steps) & 0xFF
             self._write_r(reg, new_value)
-            changes = self.memory.consume_changes()
             self.cycles += steps * 2
+            self._tick_peripherals(steps * 2)
+            changes = self.memory.consume_change_view()
             self._set_pc((self.pc + 2) & 0xFFFF if steps >= remaining else self.pc)
             return {"steps": steps, "cycles": steps * 2, "memory_changes": changes}
         return None
 
+    def _compile_block(self, start_pc: int) -> BasicBlock | None:
+        instructions: list[DecodedInstruction] = []
+        address = start_pc
+        yields = False
+        breakpoint_pcs = self._breakpoint_pcs
+        while len(instructions) < MAX_BLOCK_INSTRUCTIONS:
+            if instructions and address in breakpoint_pcs:
+                break
+            try:
+                decoded = self._decode_at(address)
+            except ExecutionError:
+                break
+            if decoded.handler == self._op_undefined:
+                break
+            instructions.append(decoded)
+            if writes_special_function_register(decoded):
+                yields = True
+                break
+            if decoded.opcode in CONTROL_FLOW_OPCODES or decoded.next_pc <= address:
+                break
+            address = decoded.next_pc
+        if not instructions:
+            return None
+        program_end = (self.program.origin + len(self.program.binary)) if self.program else None
+        steps = tuple((decoded.handler, decoded, decoded.next_pc, decoded.cycles) for decoded in instructions)
+        tick = self._tick_peripherals
+        watch_hits = self.memory.watch_hits
+
+        def run() -> int:
+            current = instructions[0]
+            self._instruction_active = True
+            try:
+                for executed, (handler, current, next_pc, cycles) in enumerate(steps, 1):
+                    self.pc = next_pc
+                    handler(current)
+                    self.cycles += cycles
+                    tick(cycles)
+                    if program_end is not None and self.pc >= program_end:
+                        break
+                    if watch_hits:
+                        break
+            except Exception as exc:
+                self.halted = True
+                self.last_error = str(exc)
+                if isinstance(exc, ExecutionError):
+                    raise
+                raise ExecutionError(str(exc), pc=current.address) from exc
+            finally:
+                self._instruction_active = False
+            if program_end is not None and self.pc >= program_end:
+                self.halted = True
+            return executed
+
+        last = instructions[-1]
+        return BasicBlock(
+            start=start_pc,
+            end=last.address + last.length,
+            length=len(instructions),
+            cycles=sum(decoded.cycles for decoded in instructions),
+            run=run,
+            yields=yields,
+        )
+
+    def _try_fast_basic_blocks(self, *, max_steps: int, max_cycles: int, interrupts_enabled: bool) -> dict | None:
+        steps = 0
+        start_cycles = self.cycles
+        breakpoint_pcs = self._breakpoint_pcs
+        while not self.halted:
+            if steps and self.pc in breakpoint_pcs:
+                break
+            block = self._blocks.get(self.pc)
+            if block is None:
+                block = self._compile_block(self.pc)
+                if block is None:
+                    break
+                self._blocks.store(block)
+            if steps + block.length > max_steps or (self.cycles - start_cycles) + block.cycles > max_cycles:
+                break
+            if interrupts_enabled:
+                event_cycles = self._cycles_until_next_peripheral_event()
+                if event_cycles is not None and block.cycles >= event_cycles:
+                    break
+            nesting = len(self.active_interrupt_priorities)
+            steps += block.run()
+            if block.yields or self.memory.watch_hits:
+                break
+            if interrupts_enabled and nesting != len(self.active_interrupt_priorities) and self._pending_interrupt():
+                break
+        if steps == 0:
+            return None
+        self.last_interrupt = None
+        return {
+            "steps": steps,
+            "cycles": self.cycles - start_cycles,
+            "memory_changes": self.memory.consume_change_view(),
+            "hardware_sync": True,
+        }
+
+    def _try_fast_idle_wait(self, *, max_steps: int, max_cycles: int, interrupts_enabled: bool) -> dict | None:
+        if self.pc in self._breakpoint_pcs:
+            return None
+        decoded = self._decode_at(self.pc)
+        if decoded.target != decoded.address:
+            return None
+        polled_bit = None
+        if decoded.opcode == 0x30 and decoded.operands[0] in _POLLED_FLAG_BITS:
+            polled_bit = decoded.operands[0]
+        elif decoded.opcode != 0x80:
+            return None
+        steps = 0
+        start_cycles = self.cycles
+        while steps < max_steps:
+            if polled_bit is not None and (self.memory.read_bit(polled_bit) or self.memory.watch_hits):
+                break
+            iterations = self._fast_loop_iterations(
+                max_steps=max_steps - steps,
+                max_cycles=max_cycles - (self.cycles - start_cycles),
+                loop_cycles=decoded.cycles,
+            )
+            if iterations <= 0:
+                break
+            cycles = iterations * decoded.cycles
+            self.cycles += cycles
+            self._tick_peripherals(cycles)
+            steps += iterations
+            if interrupts_enabled and self._pending_interrupt() is not None:
+                break
+        if steps == 0:
+            return None
+        self.last_interrupt = None
+        return {
+            "steps": steps,
+            "cycles": self.cycles - start_cycles,
+            "memory_changes": self.memory.consume_change_view(),
+        }
+
     def try_fast_realtime_slice(self, *, max_steps: int, max_cycles: int) -> dict | None:
-        if not self._tight_loop_fast_path_allowed() or max_steps <= 0 or max_cycles <= 0 or self.halted:
+        if not self._fast_path_allowed() or max_steps <= 0 or max_cycles <= 0 or self.halted:
+            return None
+        interrupts_enabled = bool(self._get_flag("EA"))
+        if interrupts_enabled and self._pending_interrupt() is not None:
             return None
-        return self._try_fast_djnz_loop(max_steps=max_steps, max_cycles=max_cycles) or self._try_fast_sjmp_self(
-            max_steps=max_steps,
-            max_cycles=max_cycles,
+        return (
+            self._try_fast_idle_wait(max_steps=max_steps, max_cycles=max_cycles, interrupts_enabled=interrupts_enabled)
+            or self._try_fast_djnz_loop(max_steps=max_steps, max_cycles=max_cycles)
+            or self._try_fast_basic_blocks(max_steps=max_steps, max_cycles=max_cycles, interrupts_enabled=interrupts_enabled)
         )
 
-    def _check_watchpoints(self, trace: TraceEntry) -> bool:
+    def _check_watchpoints(self, trace: TraceEntry | dict | None = None) -> bool:
         return super()._check_watchpoints(trace)
 
     def _record_trace(self, trace: TraceEntry) -> None:
@@ -723,36 +1133,27 @@ class CPU8051(BaseCPU):
         return super().step_out(after_step=after_step)
 
     def _instruction_length_preview(self, opcode: int) -> int:
-        if opcode in {0x02, 0x12, 0x90}:
-            return 3
-        if opcode in {0x10, 0x20, 0x30, 0x43, 0x53, 0x75, 0x85, 0xB4, 0xB5, 0xB6, 0xB7, 0xB8, 0xB9, 0xBA, 0xBB, 0xBC, 0xBD, 0xBE, 0xBF, 0xC0, 0xD0, 0xD5}:
-            return 3
-        if opcode in {0x24, 0x25, 0x26, 0x27, 0x34, 0x35, 0x36, 0x37, 0x40, 0x50, 0x60, 0x70, 0x80, 0x82, 0x92, 0x94, 0x95, 0x96, 0x97, 0xA0, 0xA2, 0xB0, 0xC2, 0xD2}:
-            return 2
-        if (opcode & 0x1F) in {0x01, 0x11}:
-            return 2
-        if 0x28 <= opcode <= 0x2F or 0x38 <= opcode <= 0x3F or 0x48 <= opcode <= 0x4F or 0x58 <= opcode <= 0x5F or 0x68 <= opcode <= 0x6F or 0x78 <= opcode <= 0x7F or 0x98 <= opcode <= 0x9F or 0xD8 <= opcode <= 0xDF:
-            return 2 if opcode >= 0x78 or opcode >= 0xD8 else 1
-        return 1
+        return OPCODE_LENGTHS[opcode & 0xFF]
 
     def step(self) -> TraceEntry:
         return super().step()
 
     def _step_impl(self) -> TraceEntry:
+        return self._step_core(CAPTURE_FULL)
+
+    def _step_core(self, capture: str) -> TraceEntry | dict | None:
         if self.halted:
             raise ExecutionError("CPU halted", pc=self.pc)
         self.last_interrupt = self._maybe_take_interrupt()
         start_pc = self.pc
-        registers_before = self._debug_registers()
-        opcode = self._fetch8()
-        bytes_ = [opcode]
-        mnemonic = f"DB 0x{opcode:02X}"
-        machine_cycles = 1
+        full = capture == CAPTURE_FULL
+        pending_changes = self.memory.consume_changes() if full else None
 
         self._instruction_active = True
         try:
-            mnemonic, machine_cycles, extra_bytes = self._execute_opcode(opcode)
-            bytes_.extend(extra_bytes)
+            decoded = self._decode_at(start_pc)
+            self.pc = decoded.next_pc
+            decoded.handler(decoded)
         except Exception as exc:
             self.halted = True
             self.last_error = str(exc)
@@ -762,506 +1163,529 @@ class CPU8051(BaseCPU):
         finally:
             self._instruction_active = False
 
+        machine_cycles = decoded.cycles
         self.cycles += machine_cycles
         self._tick_peripherals(machine_cycles)
-        changes = self.memory.consume_changes()
-        registers_after = self._debug_registers()
-        line = self.program.address_to_line.get(start_pc) if self.program else None
-        text = self._listing_text_by_address.get(start_pc) if self.program else None
-        trace = TraceEntry(
-            pc=start_pc,
-            opcode=opcode,
-            mnemonic=mnemonic,
-            bytes_=bytes_,
-            cycles=machine_cycles,
-            line=line,
-            text=text,
-            changes=changes,
-            register_diff=self._register_diff(registers_before, registers_after),
-            interrupt=self.last_interrupt,
-        )
-        self._record_trace(trace)
+        if capture == CAPTURE_COUNTERS:
+            self.memory.skip_changes()
+            trace = None
+        elif full:
+            self._sync_peripherals()
+            changes = self.memory.consume_changes()
+            register_diff = self._register_diff_from_changes(start_pc, changes)
+            if pending_changes:
+                for space, values in changes.items():
+                    pending_changes.setdefault(space, []).extend(values)
+                changes = pending_changes
+            trace = TraceEntry(
+                pc=start_pc,
+                opcode=decoded.opcode,
+                mnemonic=decoded.mnemonic,
+                bytes_=decoded.bytes_,
+                cycles=machine_cycles,
+                line=self.program.address_to_line.get(start_pc) if self.program else None,
+                text=self._listing_text_by_address.get(start_pc) if self.program else None,
+                changes=changes,
+                register_diff=register_diff,
+                interrupt=self.last_interrupt,
+            )
+            self._record_trace(trace)
+        else:
+            trace = self._compact_capture(capture, start_pc, decoded.opcode, decoded.mnemonic, decoded.bytes_, machine_cycles)
         if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
             self.halted = True
         return trace
 
-    def _step_impl_compact(self) -> TraceEntry:
-        if self.halted:
-            raise ExecutionError("CPU halted", pc=self.pc)
-        self.last_interrupt = self._maybe_take_interrupt()
-        start_pc = self.pc
-        opcode = self._fetch8()
-        bytes_ = [opcode]
-        mnemonic = f"DB 0x{opcode:02X}"
-        machine_cycles = 1
-        self._instruction_active = True
-        try:
-            mnemonic, machine_cycles, extra_bytes = self._execute_opcode(opcode)
-            bytes_.extend(extra_bytes)
-        except Exception as exc:
-            self.halted = True
-            self.last_error = str(exc)
-            if isinstance(exc, ExecutionError):
-                raise
-            raise ExecutionError(str(exc), pc=start_pc) from exc
-        finally:
-            self._instruction_active = False
-        self.cycles += machine_cycles
-        self._tick_peripherals(machine_cycles)
-        changes = self.memory.consume_changes()
-        if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
-            self.halted = True
-        return TraceEntry(
-            pc=start_pc,
-            opcode=opcode,
-            mnemonic=mnemonic,
-            bytes_=bytes_,
-            cycles=machine_cycles,
-            line=self.program.address_to_line.get(start_pc) if self.program else None,
-            text=self._listing_text_by_address.get(start_pc) if self.program else None,
-            changes=changes,
-            register_diff={},
-            interrupt=self.last_interrupt,
-        )
-
-    def step_compact_payload(self) -> dict:
-        if self.halted:
-            raise ExecutionError("CPU halted", pc=self.pc)
-        self.last_interrupt = self._maybe_take_interrupt()
-        start_pc = self.pc
-        opcode = self._fetch8()
-        bytes_ = [opcode]
-        mnemonic = f"DB 0x{opcode:02X}"
-        machine_cycles = 1
-        self._instruction_active = True
-        try:
-            mnemonic, machine_cycles, extra_bytes = self._execute_opcode(opcode)
-            bytes_.extend(extra_bytes)
-        except Exception as exc:
-            self.halted = True
-            self.last_error = str(exc)
-            if isinstance(exc, ExecutionError):
-                raise
-            raise ExecutionError(str(exc), pc=start_pc) from exc
-        finally:
-            self._instruction_active = False
-        self.cycles += machine_cycles
-        self._tick_peripherals(machine_cycles)
-        changes = self.memory.consume_changes()
-        if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
-            self.halted = True
-        return {
-            "pc": start_pc,
-            "opcode": opcode,
-            "mnemonic": mnemonic,
-            "bytes": bytes_,
-            "cycles": machine_cycles,
-            "line": self.program.address_to_line.get(start_pc) if self.program else None,
-            "text": self._listing_text_by_address.get(start_pc) if self.program else None,
-            "changes": changes,
-            "interrupt": self.last_interrupt,
-        }
-
     def _build_dispatch_table(self) -> tuple[InstructionHandler, ...]:
-        groups: tuple[InstructionHandler, ...] = (
-            self._group_0x0,
-            self._group_0x1,
-            self._group_0x2,
-            self._group_0x3,
-            self._group_0x4,
-            self._group_0x5,
-            self._group_0x6,
-            self._group_0x7,
-            self._group_0x8,
-            self._group_0x9,
-            self._group_0xA,
-            self._group_0xB,
-            self._group_0xC,
-            self._group_0xD,
-            self._group_0xE,
-            self._group_0xF,
-        )
-        table = [groups[opcode >> 4] for opcode in range(256)]
-        for opcode in PAGE_BRANCH_OPCODES:
-            table[opcode] = self._op_page_branch
+        table: list[InstructionHandler] = [self._op_undefined] * 256
+        fixed: dict[int, InstructionHandler] = {
+            0x00: self._op_nop,
+            0x02: self._op_jump,
+            0x03: self._op_rr_a,
+            0x04: self._op_inc_a,
+            0x05: self._op_inc_direct,
+            0x10: self._op_jbc,
+            0x12: self._op_call,
+            0x13: self._op_rrc_a,
+            0x14: self._op_dec_a,
+            0x15: self._op_dec_direct,
+            0x20: self._op_jb,
+            0x22: self._op_ret,
+            0x23: self._op_rl_a,
+            0x30: self._op_jnb,
+            0x32: self._op_reti,
+            0x33: self._op_rlc_a,
+            0x40: self._op_jc,
+            0x42: self._op_orl_direct_a,
+            0x43: self._op_orl_direct_imm,
+            0x50: self._op_jnc,
+            0x52: self._op_anl_direct_a,
+            0x53: self._op_anl_direct_imm,
+            0x60: self._op_jz,
+            0x62: self._op_xrl_direct_a,
+            0x63: self._op_xrl_direct_imm,
+            0x70: self._op_jnz,
+            0x72: self._op_orl_c_bit,
+            0x73: self._op_jmp_a_dptr,
+            0x74: self._op_mov_a_imm,
+            0x75: self._op_mov_direct_imm,
+            0x80: self._op_jump,
+            0x82: self._op_anl_c_bit,
+            0x83: self._op_movc_a_pc,
+            0x84: self._op_div_ab,
+            0x85: self._op_mov_direct_direct,
+            0x90: self._op_mov_dptr_imm,
+            0x92: self._op_mov_bit_c,
+            0x93: self._op_movc_a_dptr,
+            0xA0: self._op_orl_c_not_bit,
+            0xA2: self._op_mov_c_bit,
+            0xA3: self._op_inc_dptr,
+            0xA4: self._op_mul_ab,
+            0xB0: self._op_anl_c_not_bit,
+            0xB2: self._op_cpl_bit,
+            0xB3: self._op_cpl_c,
+            0xC0: self._op_push,
+            0xC2: self._op_clr_bit,
+            0xC3: self._op_clr_c,
+            0xC4: self._op_swap_a,
+            0xC5: self._op_xch_direct,
+            0xD0: self._op_pop,
+            0xD2: self._op_setb_bit,
+            0xD3: self._op_setb_c,
+            0xD4: self._op_da_a,
+            0xD5: self._op_djnz_direct,
+            0xE0: self._op_movx_a_dptr,
+            0xE4: self._op_clr_a,
+            0xE5: self._op_mov_a_direct,
+            0xF0: self._op_movx_dptr_a,
+            0xF4: self._op_cpl_a,
+            0xF5: self._op_mov_direct_a,
+        }
+        for opcode, handler in fixed.items():
+            table[opcode] = handler
+        for opcode in AJMP_OPCODES:
+            table[opcode] = self._op_jump
+        for opcode in ACALL_OPCODES:
+            table[opcode] = self._op_call
+        for opcode in (0x06, 0x07):
+            table[opcode] = self._op_inc_indirect
+            table[opcode + 0x10] = self._op_dec_indirect
+            table[opcode + 0x70] = self._op_mov_indirect_imm
+            table[opcode + 0x80] = self._op_mov_direct_indirect
+            table[opcode + 0xA0] = self._op_mov_indirect_direct
+            table[opcode + 0xC0] = self._op_xch_indirect
+            table[opcode + 0xD0] = self._op_xchd
+            table[opcode + 0xE0] = self._op_mov_a_indirect
+            table[opcode + 0xF0] = self._op_mov_indirect_a
+        for opcode in (0xE2, 0xE3):
+            table[opcode] = self._op_movx_a_indirect
+            table[opcode + 0x10] = self._op_movx_indirect_a
+        for reg in range(8):
+            table[0x08 + reg] = self._op_inc_r
+            table[0x18 + reg] = self._op_dec_r
+            table[0x78 + reg] = self._op_mov_r_imm
+            table[0x88 + reg] = self._op_mov_direct_r
+            table[0xA8 + reg] = self._op_mov_r_direct
+            table[0xC8 + reg] = self._op_xch_r
+            table[0xD8 + reg] = self._op_djnz_r
+            table[0xE8 + reg] = self._op_mov_a_r
+            table[0xF8 + reg] = self._op_mov_r_a
+        for low in range(0x04, 0x10):
+            table[0x20 + low] = self._op_add
+            table[0x30 + low] = self._op_addc
+            table[0x40 + low] = self._op_orl_a
+            table[0x50 + low] = self._op_anl_a
+            table[0x60 + low] = self._op_xrl_a
+            table[0x90 + low] = self._op_subb
+        for opcode in range(0xB4, 0xC0):
+            table[opcode] = self._op_cjne
         return tuple(table)
 
+    def _decode_at(self, address: int) -> DecodedInstruction:
+        decoded = self._predecoded.get(address)
+        if decoded is None:
+            decoded = decode_instruction(self.memory.read_code, address, self._dispatch)
+            self._predecoded.store(decoded)
+        return decoded
+
+    def _predecode_program(self, program: ProgramImage) -> None:
+        for item in program.listing:
+            if item.size <= 0:
+                continue
+            try:
+                self._decode_at(item.address)
+            except ExecutionError:
+                continue
+
     def _current_opcode(self) -> int:
         return self.memory.read_code(self.pc)
 
     def _is_call_opcode(self, opcode: int) -> bool:
         return opcode in {0x12} or opcode in ACALL_OPCODES
 
-    def _execute_opcode(self, opcode: int) -> tuple[str, int, list[int]]:
-        return self._dispatch[opcode](opcode)
-
-    def _undefined_opcode(self, opcode: int) -> tuple[str, int, list[int]]:
-        raise DecodeError(f"unsupported opcode 0x{opcode:02X}", pc=self.pc - 1)
-
-    def _op_page_branch(self, opcode: int) -> tuple[str, int, list[int]]:
-        low = self._fetch8()
-        target = self._decode_ajmp_target(opcode, low, self.pc)
-        mnemonic = "ACALL" if opcode in ACALL_OPCODES else "AJMP"
-        if mnemonic == "ACALL":
-            self._push_word(self.pc)
-            self.debugger.call_stack.append(self.pc)
-        self._set_pc(target)
-        return f"{mnemonic} 0x{target:04X}", 2, [low]
-
-    def _group_0x0(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x00:
-            return "NOP", 1, extra
-        if opcode == 0x02:
-            target = self._fetch16(); extra.extend([(target >> 8) & 0xFF, target & 0xFF]); self._set_pc(target); return f"LJMP 0x{target:04X}", 2, extra
-        if opcode == 0x03:
-            self.a = ((self.a >> 1) | ((self.a & 0x01) << 7)) & 0xFF; return "RR A", 1, extra
-        if opcode == 0x04:
-            self.a = (self.a + 1) & 0xFF; return "INC A", 1, extra
-        if opcode == 0x05:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, (self._read_direct(direct, rmw=True) + 1) & 0xFF); return f"INC 0x{direct:02X}", 1, extra
-        if opcode == 0x06:
-            addr = self._read_r(0); self.memory.write_indirect(addr, (self.memory.read_indirect(addr) + 1) & 0xFF); return "INC @R0", 1, extra
-        if opcode == 0x07:
-            addr = self._read_r(1); self.memory.write_indirect(addr, (self.memory.read_indirect(addr) + 1) & 0xFF); return "INC @R1", 1, extra
-        if 0x08 <= opcode <= 0x0F:
-            reg = opcode & 0x07; self._write_r(reg, (self._read_r(reg) + 1) & 0xFF); return f"INC R{reg}", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x1(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x10:
-            bit_addr = self._fetch8(); rel = self._fetch8(); extra.extend([bit_addr, rel]); target = self._relative_target(rel)
-            if self.memory.read_bit(bit_addr):
-                self.memory.write_bit(bit_addr, 0); self._set_pc(target)
-            return f"JBC 0x{bit_addr:02X},0x{target:04X}", 2, extra
-        if opcode == 0x12:
-            target = self._fetch16(); extra.extend([(target >> 8) & 0xFF, target & 0xFF]); self._push_word(self.pc); self.debugger.call_stack.append(self.pc); self._set_pc(target); return f"LCALL 0x{target:04X}", 2, extra
-        if opcode == 0x13:
-            carry = self._carry(); new_cy = self.a & 0x01; self.a = ((carry << 7) | (self.a >> 1)) & 0xFF; self._set_flag("CY", new_cy); return "RRC A", 1, extra
-        if opcode == 0x14:
-            self.a = (self.a - 1) & 0xFF; return "DEC A", 1, extra
-        if opcode == 0x15:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, (self._read_direct(direct, rmw=True) - 1) & 0xFF); return f"DEC 0x{direct:02X}", 1, extra
-        if opcode == 0x16:
-            addr = self._read_r(0); self.memory.write_indirect(addr, (self.memory.read_indirect(addr) - 1) & 0xFF); return "DEC @R0", 1, extra
-        if opcode == 0x17:
-            addr = self._read_r(1); self.memory.write_indirect(addr, (self.memory.read_indirect(addr) - 1) & 0xFF); return "DEC @R1", 1, extra
-        if 0x18 <= opcode <= 0x1F:
-            reg = opcode & 0x07; self._write_r(reg, (self._read_r(reg) - 1) & 0xFF); return f"DEC R{reg}", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x2(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x20:
-            bit_addr = self._fetch8(); rel = self._fetch8(); extra.extend([bit_addr, rel]); target = self._relative_target(rel)
-            if self.memory.read_bit(bit_addr):
-                self._set_pc(target)
-            return f"JB 0x{bit_addr:02X},0x{target:04X}", 2, extra
-        if opcode == 0x22:
-            self._set_pc(self._pop_word())
-            if self.debugger.call_stack:
-                self.debugger.call_stack.pop()
-            return "RET", 2, extra
-        if opcode == 0x23:
-            self.a = ((self.a << 1) | (self.a >> 7)) & 0xFF; return "RL A", 1, extra
-        if 0x24 <= opcode <= 0x2F:
-            low = opcode & 0x0F; right = self._read_accumulator_group_operand(low, extra); left = self.a; result = (left + right) & 0xFF
-            self._set_add_flags(left, right, 0, result); self.a = result; return "ADD A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x3(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x30:
-            bit_addr = self._fetch8(); rel = self._fetch8(); extra.extend([bit_addr, rel]); target = self._relative_target(rel)
-            if not self.memory.read_bit(bit_addr):
-                self._set_pc(target)
-            return f"JNB 0x{bit_addr:02X},0x{target:04X}", 2, extra
-        if opcode == 0x32:
-            self._set_pc(self._pop_word())
-            if self.active_interrupt_priorities:
-                self.active_interrupt_priorities.pop()
-            if self.debugger.call_stack:
-                self.debugger.call_stack.pop()
-            return "RETI", 2, extra
-        if opcode == 0x33:
-            carry = self._carry(); new_cy = 1 if (self.a & 0x80) else 0; self.a = ((self.a << 1) | carry) & 0xFF; self._set_flag("CY", new_cy); return "RLC A", 1, extra
-        if 0x34 <= opcode <= 0x3F:
-            low = opcode & 0x0F; right = self._read_accumulator_group_operand(low, extra); carry = self._carry(); left = self.a; result = (left + right + carry) & 0xFF
-            self._set_add_flags(left, right, carry, result); self.a = result; return "ADDC A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x4(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x40:
-            rel = self._fetch8(); extra.append(rel); target = self._relative_target(rel)
-            if self._get_flag("CY"):
-                self._set_pc(target)
-            return f"JC 0x{target:04X}", 2, extra
-        if opcode == 0x42:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, self._read_direct(direct, rmw=True) | self.a); return f"ORL 0x{direct:02X},A", 1, extra
-        if opcode == 0x43:
-            direct = self._fetch8(); imm = self._fetch8(); extra.extend([direct, imm]); self._write_direct(direct, self._read_direct(direct, rmw=True) | imm); return f"ORL 0x{direct:02X},#0x{imm:02X}", 2, extra
-        if 0x44 <= opcode <= 0x4F:
-            low = opcode & 0x0F; self.a = self.a | self._read_accumulator_group_operand(low, extra); return "ORL A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x5(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x50:
-            rel = self._fetch8(); extra.append(rel); target = self._relative_target(rel)
-            if not self._get_flag("CY"):
-                self._set_pc(target)
-            return f"JNC 0x{target:04X}", 2, extra
-        if opcode == 0x52:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, self._read_direct(direct, rmw=True) & self.a); return f"ANL 0x{direct:02X},A", 1, extra
-        if opcode == 0x53:
-            direct = self._fetch8(); imm = self._fetch8(); extra.extend([direct, imm]); self._write_direct(direct, self._read_direct(direct, rmw=True) & imm); return f"ANL 0x{direct:02X},#0x{imm:02X}", 2, extra
-        if 0x54 <= opcode <= 0x5F:
-            low = opcode & 0x0F; self.a = self.a & self._read_accumulator_group_operand(low, extra); return "ANL A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x6(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x60:
-            rel = self._fetch8(); extra.append(rel); target = self._relative_target(rel)
-            if self.a == 0:
-                self._set_pc(target)
-            return f"JZ 0x{target:04X}", 2, extra
-        if opcode == 0x62:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, self._read_direct(direct, rmw=True) ^ self.a); return f"XRL 0x{direct:02X},A", 1, extra
-        if opcode == 0x63:
-            direct = self._fetch8(); imm = self._fetch8(); extra.extend([direct, imm]); self._write_direct(direct, self._read_direct(direct, rmw=True) ^ imm); return f"XRL 0x{direct:02X},#0x{imm:02X}", 2, extra
-        if 0x64 <= opcode <= 0x6F:
-            low = opcode & 0x0F; self.a = self.a ^ self._read_accumulator_group_operand(low, extra); return "XRL A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x7(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x70:
-            rel = self._fetch8(); extra.append(rel); target = self._relative_target(rel)
-            if self.a != 0:
-                self._set_pc(target)
-            return f"JNZ 0x{target:04X}", 2, extra
-        if opcode == 0x72:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self._set_flag("CY", self._carry() | self.memory.read_bit(bit_addr)); return f"ORL C,0x{bit_addr:02X}", 2, extra
-        if opcode == 0x73:
-            self._set_pc((self.dptr + self.a) & 0xFFFF); return "JMP @A+DPTR", 2, extra
-        if opcode == 0x74:
-            imm = self._fetch8(); extra.append(imm); self.a = imm; return f"MOV A,#0x{imm:02X}", 1, extra
-        if opcode == 0x75:
-            direct = self._fetch8(); imm = self._fetch8(); extra.extend([direct, imm]); self._write_direct(direct, imm); return f"MOV 0x{direct:02X},#0x{imm:02X}", 2, extra
-        if opcode == 0x76:
-            imm = self._fetch8(); extra.append(imm); self.memory.write_indirect(self._read_r(0), imm); return "MOV @R0,#data", 1, extra
-        if opcode == 0x77:
-            imm = self._fetch8(); extra.append(imm); self.memory.write_indirect(self._read_r(1), imm); return "MOV @R1,#data", 1, extra
-        if 0x78 <= opcode <= 0x7F:
-            reg = opcode & 0x07; imm = self._fetch8(); extra.append(imm); self._write_r(reg, imm); return f"MOV R{reg},#0x{imm:02X}", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x8(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x80:
-            rel = self._fetch8(); extra.append(rel); target = self._relative_target(rel); self._set_pc(target); return f"SJMP 0x{target:04X}", 2, extra
-        if opcode == 0x82:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self._set_flag("CY", self._carry() & self.memory.read_bit(bit_addr)); return f"ANL C,0x{bit_addr:02X}", 2, extra
-        if opcode == 0x83:
-            self.a = self.memory.read_code((self.pc + self.a) & 0xFFFF); return "MOVC A,@A+PC", 2, extra
-        if opcode == 0x84:
-            if self.b == 0:
-                self._set_flag("OV", 1)
-            else:
-                quotient = self.a // self.b; remainder = self.a % self.b; self.a = quotient; self.b = remainder; self._set_flag("OV", 0)
-            self._set_flag("CY", 0); return "DIV AB", 4, extra
-        if opcode == 0x85:
-            src = self._fetch8(); dst = self._fetch8(); extra.extend([src, dst]); self._write_direct(dst, self._read_direct(src)); return f"MOV 0x{dst:02X},0x{src:02X}", 2, extra
-        if opcode == 0x86:
-            dst = self._fetch8(); extra.append(dst); self._write_direct(dst, self.memory.read_indirect(self._read_r(0))); return f"MOV 0x{dst:02X},@R0", 2, extra
-        if opcode == 0x87:
-            dst = self._fetch8(); extra.append(dst); self._write_direct(dst, self.memory.read_indirect(self._read_r(1))); return f"MOV 0x{dst:02X},@R1", 2, extra
-        if 0x88 <= opcode <= 0x8F:
-            dst = self._fetch8(); extra.append(dst); reg = opcode & 0x07; self._write_direct(dst, self._read_r(reg)); return f"MOV 0x{dst:02X},R{reg}", 2, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0x9(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0x90:
-            value = self._fetch16(); extra.extend([(value >> 8) & 0xFF, value & 0xFF]); self.dptr = value; return f"MOV DPTR,#0x{value:04X}", 2, extra
-        if opcode == 0x92:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self.memory.write_bit(bit_addr, self._carry()); return f"MOV 0x{bit_addr:02X},C", 2, extra
-        if opcode == 0x93:
-            self.a = self.memory.read_code((self.dptr + self.a) & 0xFFFF); return "MOVC A,@A+DPTR", 2, extra
-        if 0x94 <= opcode <= 0x9F:
-            low = opcode & 0x0F; right = self._read_accumulator_group_operand(low, extra); left = self.a; borrow = self._carry(); result = (left - right - borrow) & 0xFF
-            self._set_sub_flags(left, right, borrow, result); self.a = result; return "SUBB A,<src>", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xA(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xA0:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self._set_flag("CY", self._carry() | (1 - self.memory.read_bit(bit_addr))); return f"ORL C,/0x{bit_addr:02X}", 2, extra
-        if opcode == 0xA2:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self._set_flag("CY", self.memory.read_bit(bit_addr)); return f"MOV C,0x{bit_addr:02X}", 2, extra
-        if opcode == 0xA3:
-            self.dptr = (self.dptr + 1) & 0xFFFF; return "INC DPTR", 2, extra
-        if opcode == 0xA4:
-            product = self.a * self.b; self.a = product & 0xFF; self.b = (product >> 8) & 0xFF; self._set_flag("CY", 0); self._set_flag("OV", 1 if product > 0xFF else 0); return "MUL AB", 4, extra
-        if opcode == 0xA5:
-            raise DecodeError("undefined opcode 0xA5", pc=self.pc - 1)
-        if opcode == 0xA6:
-            src = self._fetch8(); extra.append(src); self.memory.write_indirect(self._read_r(0), self._read_direct(src)); return "MOV @R0,direct", 2, extra
-        if opcode == 0xA7:
-            src = self._fetch8(); extra.append(src); self.memory.write_indirect(self._read_r(1), self._read_direct(src)); return "MOV @R1,direct", 2, extra
-        if 0xA8 <= opcode <= 0xAF:
-            src = self._fetch8(); extra.append(src); self._write_r(opcode & 0x07, self._read_direct(src)); return f"MOV R{opcode & 0x07},direct", 2, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xB(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xB0:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self._set_flag("CY", self._carry() & (1 - self.memory.read_bit(bit_addr))); return f"ANL C,/0x{bit_addr:02X}", 2, extra
-        if opcode == 0xB2:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self.memory.write_bit(bit_addr, 0 if self.memory.read_bit(bit_addr) else 1); return f"CPL 0x{bit_addr:02X}", 2, extra
-        if opcode == 0xB3:
-            self._set_flag("CY", 0 if self._carry() else 1); return "CPL C", 1, extra
-        if 0xB4 <= opcode <= 0xBF:
-            mnemonic = self._execute_cjne(opcode, extra); return mnemonic, 2, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xC(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xC0:
-            direct = self._fetch8(); extra.append(direct); self._push_byte(self._read_direct(direct)); return f"PUSH 0x{direct:02X}", 2, extra
-        if opcode == 0xC2:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self.memory.write_bit(bit_addr, 0); return f"CLR 0x{bit_addr:02X}", 1, extra
-        if opcode == 0xC3:
-            self._set_flag("CY", 0); return "CLR C", 1, extra
-        if opcode == 0xC4:
-            self.a = ((self.a & 0x0F) << 4) | ((self.a & 0xF0) >> 4); return "SWAP A", 1, extra
-        if 0xC5 <= opcode <= 0xCF:
-            mnemonic = self._execute_xch(opcode, extra); return mnemonic, 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xD(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xD0:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, self._pop_byte()); return f"POP 0x{direct:02X}", 2, extra
-        if opcode == 0xD2:
-            bit_addr = self._fetch8(); extra.append(bit_addr); self.memory.write_bit(bit_addr, 1); return f"SETB 0x{bit_addr:02X}", 1, extra
-        if opcode == 0xD3:
-            self._set_flag("CY", 1); return "SETB C", 1, extra
-        if opcode == 0xD4:
-            self._execute_da(); return "DA A", 1, extra
-        if opcode == 0xD5:
-            direct = self._fetch8(); rel = self._fetch8(); extra.extend([direct, rel]); value = (self._read_direct(direct, rmw=True) - 1) & 0xFF; self._write_direct(direct, value)
-            if value != 0:
-                self._set_pc(self._relative_target(rel))
-            return f"DJNZ 0x{direct:02X},rel", 2, extra
-        if opcode == 0xD6:
-            addr = self._read_r(0); value = self.memory.read_indirect(addr); new_a = (self.a & 0xF0) | (value & 0x0F); new_mem = (value & 0xF0) | (self.a & 0x0F); self.a = new_a; self.memory.write_indirect(addr, new_mem); return "XCHD A,@R0", 1, extra
-        if opcode == 0xD7:
-            addr = self._read_r(1); value = self.memory.read_indirect(addr); new_a = (self.a & 0xF0) | (value & 0x0F); new_mem = (value & 0xF0) | (self.a & 0x0F); self.a = new_a; self.memory.write_indirect(addr, new_mem); return "XCHD A,@R1", 1, extra
-        if 0xD8 <= opcode <= 0xDF:
-            reg = opcode & 0x07; rel = self._fetch8(); extra.append(rel); value = (self._read_r(reg) - 1) & 0xFF; self._write_r(reg, value)
-            if value != 0:
-                self._set_pc(self._relative_target(rel))
-            return f"DJNZ R{reg},rel", 2, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xE(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xE0:
-            self.a = self.memory.read_xram(self.dptr); return "MOVX A,@DPTR", 2, extra
-        if opcode == 0xE2:
-            self.a = self.memory.read_xram(self._read_r(0)); return "MOVX A,@R0", 2, extra
-        if opcode == 0xE3:
-            self.a = self.memory.read_xram(self._read_r(1)); return "MOVX A,@R1", 2, extra
-        if opcode == 0xE4:
-            self.a = 0; return "CLR A", 1, extra
-        if opcode == 0xE5:
-            direct = self._fetch8(); extra.append(direct); self.a = self._read_direct(direct); return f"MOV A,0x{direct:02X}", 1, extra
-        if opcode == 0xE6:
-            self.a = self.memory.read_indirect(self._read_r(0)); return "MOV A,@R0", 1, extra
-        if opcode == 0xE7:
-            self.a = self.memory.read_indirect(self._read_r(1)); return "MOV A,@R1", 1, extra
-        if 0xE8 <= opcode <= 0xEF:
-            self.a = self._read_r(opcode & 0x07); return f"MOV A,R{opcode & 0x07}", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _group_0xF(self, opcode: int) -> tuple[str, int, list[int]]:
-        extra: list[int] = []
-        if opcode == 0xF0:
-            self.memory.write_xram(self.dptr, self.a); return "MOVX @DPTR,A", 2, extra
-        if opcode == 0xF2:
-            self.memory.write_xram(self._read_r(0), self.a); return "MOVX @R0,A", 2, extra
-        if opcode == 0xF3:
-            self.memory.write_xram(self._read_r(1), self.a); return "MOVX @R1,A", 2, extra
-        if opcode == 0xF4:
-            self.a = (~self.a) & 0xFF; return "CPL A", 1, extra
-        if opcode == 0xF5:
-            direct = self._fetch8(); extra.append(direct); self._write_direct(direct, self.a); return f"MOV 0x{direct:02X},A", 1, extra
-        if opcode == 0xF6:
-            self.memory.write_indirect(self._read_r(0), self.a); return "MOV @R0,A", 1, extra
-        if opcode == 0xF7:
-            self.memory.write_indirect(self._read_r(1), self.a); return "MOV @R1,A", 1, extra
-        if 0xF8 <= opcode <= 0xFF:
-            self._write_r(opcode & 0x07, self.a); return f"MOV R{opcode & 0x07},A", 1, extra
-        return self._undefined_opcode(opcode)
-
-    def _read_accumulator_group_operand(self, low: int, extra: list[int]) -> int:
-        if low == 4:
-            value = self._fetch8(); extra.append(value); return value
-        if low == 5:
-            direct = self._fetch8(); extra.append(direct); return self._read_direct(direct)
-        if low == 6:
-            return self.memory.read_indirect(self._read_r(0))
-        if low == 7:
-            return self.memory.read_indirect(self._read_r(1))
-        return self._read_r(low - 8)
+    def _op_undefined(self, ins: DecodedInstruction) -> None:
+        raise DecodeError(f"undefined opcode 0x{ins.opcode:02X}", pc=ins.address)
 
-    def _execute_xch(self, opcode: int, extra: list[int]) -> str:
-        if opcode == 0xC5:
-            direct = self._fetch8(); extra.append(direct)
-            value = self._read_direct(direct, rmw=True)
-            self._write_direct(direct, self.a)
-            self.a = value
-            return f"XCH A,0x{direct:02X}"
-        if opcode == 0xC6:
-            addr = self._read_r(0)
-            value = self.memory.read_indirect(addr)
-            self.memory.write_indirect(addr, self.a)
-            self.a = value
-            return "XCH A,@R0"
-        if opcode == 0xC7:
-            addr = self._read_r(1)
-            value = self.memory.read_indirect(addr)
-            self.memory.write_indirect(addr, self.a)
-            self.a = value
-            return "XCH A,@R1"
-        reg = opcode & 0x07
-        value = self._read_r(reg)
-        self._write_r(reg, self.a)
-        self.a = value
-        return f"XCH A,R{reg}"
+    def _op_nop(self, ins: DecodedInstruction) -> None:
+        pass
+
+    def _op_jump(self, ins: DecodedInstruction) -> None:
+        self._set_pc(ins.target)
 
-    def _execute_cjne(self, opcode: int, extra: list[int]) -> str:
+    def _op_call(self, ins: DecodedInstruction) -> None:
+        self._push_word(self.pc)
+        self.debugger.call_stack.append(self.pc)
+        self._set_pc(ins.target)
+
+    def _op_ret(self, ins: DecodedInstruction) -> None:
+        self._set_pc(self._pop_word())
+        if self.debugger.call_stack:
+            self.debugger.call_stack.pop()
+
+    def _op_reti(self, ins: DecodedInstruction) -> None:
+        self._set_pc(self._pop_word())
+        if self.active_interrupt_priorities:
+            self.active_interrupt_priorities.pop()
+        if self.debugger.call_stack:
+            self.debugger.call_stack.pop()
+
+    def _op_jmp_a_dptr(self, ins: DecodedInstruction) -> None:
+        self._set_pc((self.dptr + self.a) & 0xFFFF)
+
+    def _op_jbc(self, ins: DecodedInstruction) -> None:
+        bit_addr = ins.operands[0]
+        if self.memory.read_bit(bit_addr):
+            self.memory.write_bit(bit_addr, 0)
+            self._set_pc(ins.target)
+
+    def _op_jb(self, ins: DecodedInstruction) -> None:
+        if self.memory.read_bit(ins.operands[0]):
+            self._set_pc(ins.target)
+
+    def _op_jnb(self, ins: DecodedInstruction) -> None:
+        if not self.memory.read_bit(ins.operands[0]):
+            self._set_pc(ins.target)
+
+    def _op_jc(self, ins: DecodedInstruction) -> None:
+        if self._get_flag("CY"):
+            self._set_pc(ins.target)
+
+    def _op_jnc(self, ins: DecodedInstruction) -> None:
+        if not self._get_flag("CY"):
+            self._set_pc(ins.target)
+
+    def _op_jz(self, ins: DecodedInstruction) -> None:
+        if self.a == 0:
+            self._set_pc(ins.target)
+
+    def _op_jnz(self, ins: DecodedInstruction) -> None:
+        if self.a != 0:
+            self._set_pc(ins.target)
+
+    def _op_cjne(self, ins: DecodedInstruction) -> None:
+        opcode = ins.opcode
         if opcode == 0xB4:
-            imm = self._fetch8(); rel = self._fetch8(); extra.extend([imm, rel])
-            left = self.a; right = imm
+            left = self.a
+            right = ins.operands[0]
         elif opcode == 0xB5:
-            direct = self._fetch8(); rel = self._fetch8(); extra.extend([direct, rel])
-            left = self.a; right = self._read_direct(direct)
+            left = self.a
+            right = self._read_direct(ins.operands[0])
         elif opcode in {0xB6, 0xB7}:
-            imm = self._fetch8(); rel = self._fetch8(); extra.extend([imm, rel])
-            left = self.memory.read_indirect(self._read_r(0 if opcode == 0xB6 else 1)); right = imm
+            left = self.memory.read_indirect(self._read_r(opcode & 0x01))
+            right = ins.operands[0]
         else:
-            imm = self._fetch8(); rel = self._fetch8(); extra.extend([imm, rel])
-            reg = opcode & 0x07
-            left = self._read_r(reg); right = imm
+            left = self._read_r(opcode & 0x07)
+            right = ins.operands[0]
         self._set_flag("CY", 1 if left < right else 0)
         if left != right:
-            self._set_pc(self._relative_target(rel))
-        return "CJNE"
+            self._set_pc(ins.target)
+
+    def _op_djnz_direct(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        value = (self._read_direct(direct, rmw=True) - 1) & 0xFF
+        self._write_direct(direct, value)
+        if value != 0:
+            self._set_pc(ins.target)
+
+    def _op_djnz_r(self, ins: DecodedInstruction) -> None:
+        reg = ins.opcode & 0x07
+        value = (self._read_r(reg) - 1) & 0xFF
+        self._write_r(reg, value)
+        if value != 0:
+            self._set_pc(ins.target)
+
+    def _op_rr_a(self, ins: DecodedInstruction) -> None:
+        self.a = ((self.a >> 1) | ((self.a & 0x01) << 7)) & 0xFF
+
+    def _op_rrc_a(self, ins: DecodedInstruction) -> None:
+        carry = self._carry()
+        new_cy = self.a & 0x01
+        self.a = ((carry << 7) | (self.a >> 1)) & 0xFF
+        self._set_flag("CY", new_cy)
+
+    def _op_rl_a(self, ins: DecodedInstruction) -> None:
+        self.a = ((self.a << 1) | (self.a >> 7)) & 0xFF
+
+    def _op_rlc_a(self, ins: DecodedInstruction) -> None:
+        carry = self._carry()
+        new_cy = 1 if (self.a & 0x80) else 0
+        self.a = ((self.a << 1) | carry) & 0xFF
+        self._set_flag("CY", new_cy)
+
+    def _op_swap_a(self, ins: DecodedInstruction) -> None:
+        self.a = ((self.a & 0x0F) << 4) | ((self.a & 0xF0) >> 4)
+
+    def _op_clr_a(self, ins: DecodedInstruction) -> None:
+        self.a = 0
+
+    def _op_cpl_a(self, ins: DecodedInstruction) -> None:
+        self.a = (~self.a) & 0xFF
+
+    def _op_da_a(self, ins: DecodedInstruction) -> None:
+        self._execute_da()
+
+    def _op_inc_a(self, ins: DecodedInstruction) -> None:
+        self.a = (self.a + 1) & 0xFF
+
+    def _op_dec_a(self, ins: DecodedInstruction) -> None:
+        self.a = (self.a - 1) & 0xFF
+
+    def _op_inc_direct(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        self._write_direct(direct, (self._read_direct(direct, rmw=True) + 1) & 0xFF)
+
+    def _op_dec_direct(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        self._write_direct(direct, (self._read_direct(direct, rmw=True) - 1) & 0xFF)
+
+    def _op_inc_indirect(self, ins: DecodedInstruction) -> None:
+        addr = self._read_r(ins.opcode & 0x01)
+        self.memory.write_indirect(addr, (self.memory.read_indirect(addr) + 1) & 0xFF)
+
+    def _op_dec_indirect(self, ins: DecodedInstruction) -> None:
+        addr = self._read_r(ins.opcode & 0x01)
+        self.memory.write_indirect(addr, (self.memory.read_indirect(addr) - 1) & 0xFF)
+
+    def _op_inc_r(self, ins: DecodedInstruction) -> None:
+        reg = ins.opcode & 0x07
+        self._write_r(reg, (self._read_r(reg) + 1) & 0xFF)
+
+    def _op_dec_r(self, ins: DecodedInstruction) -> None:
+        reg = ins.opcode & 0x07
+        self._write_r(reg, (self._read_r(reg) - 1) & 0xFF)
+
+    def _op_inc_dptr(self, ins: DecodedInstruction) -> None:
+        self.dptr = (self.dptr + 1) & 0xFFFF
+
+    def _op_add(self, ins: DecodedInstruction) -> None:
+        right = self._read_accumulator_group_operand(ins)
+        self._store_arithmetic_result(ADD_TABLE[(self.a << 8) | right])
+
+    def _op_addc(self, ins: DecodedInstruction) -> None:
+        right = self._read_accumulator_group_operand(ins)
+        self._store_arithmetic_result(ADD_TABLE[(self._carry() << 16) | (self.a << 8) | right])
+
+    def _op_subb(self, ins: DecodedInstruction) -> None:
+        right = self._read_accumulator_group_operand(ins)
+        self._store_arithmetic_result(SUBB_TABLE[(self._carry() << 16) | (self.a << 8) | right])
+
+    def _op_orl_a(self, ins: DecodedInstruction) -> None:
+        self.a = self.a | self._read_accumulator_group_operand(ins)
+
+    def _op_anl_a(self, ins: DecodedInstruction) -> None:
+        self.a = self.a & self._read_accumulator_group_operand(ins)
+
+    def _op_xrl_a(self, ins: DecodedInstruction) -> None:
+        self.a = self.a ^ self._read_accumulator_group_operand(ins)
+
+    def _op_orl_direct_a(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        self._write_direct(direct, self._read_direct(direct, rmw=True) | self.a)
+
+    def _op_anl_direct_a(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        self._write_direct(direct, self._read_direct(direct, rmw=True) & self.a)
+
+    def _op_xrl_direct_a(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        self._write_direct(direct, self._read_direct(direct, rmw=True) ^ self.a)
+
+    def _op_orl_direct_imm(self, ins: DecodedInstruction) -> None:
+        direct, imm = ins.operands
+        self._write_direct(direct, self._read_direct(direct, rmw=True) | imm)
+
+    def _op_anl_direct_imm(self, ins: DecodedInstruction) -> None:
+        direct, imm = ins.operands
+        self._write_direct(direct, self._read_direct(direct, rmw=True) & imm)
+
+    def _op_xrl_direct_imm(self, ins: DecodedInstruction) -> None:
+        direct, imm = ins.operands
+        self._write_direct(direct, self._read_direct(direct, rmw=True) ^ imm)
+
+    def _op_mul_ab(self, ins: DecodedInstruction) -> None:
+        product = self.a * self.b
+        self.a = product & 0xFF
+        self.b = (product >> 8) & 0xFF
+        self._set_flag("CY", 0)
+        self._set_flag("OV", 1 if product > 0xFF else 0)
+
+    def _op_div_ab(self, ins: DecodedInstruction) -> None:
+        if self.b == 0:
+            self._set_flag("OV", 1)
+        else:
+            quotient = self.a // self.b
+            remainder = self.a % self.b
+            self.a = quotient
+            self.b = remainder
+            self._set_flag("OV", 0)
+        self._set_flag("CY", 0)
+
+    def _op_orl_c_bit(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", self._carry() | self.memory.read_bit(ins.operands[0]))
+
+    def _op_anl_c_bit(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", self._carry() & self.memory.read_bit(ins.operands[0]))
+
+    def _op_orl_c_not_bit(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", self._carry() | (1 - self.memory.read_bit(ins.operands[0])))
+
+    def _op_anl_c_not_bit(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", self._carry() & (1 - self.memory.read_bit(ins.operands[0])))
+
+    def _op_mov_c_bit(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", self.memory.read_bit(ins.operands[0]))
+
+    def _op_mov_bit_c(self, ins: DecodedInstruction) -> None:
+        self.memory.write_bit(ins.operands[0], self._carry())
+
+    def _op_cpl_bit(self, ins: DecodedInstruction) -> None:
+        bit_addr = ins.operands[0]
+        self.memory.write_bit(bit_addr, 0 if self.memory.read_bit(bit_addr) else 1)
+
+    def _op_clr_bit(self, ins: DecodedInstruction) -> None:
+        self.memory.write_bit(ins.operands[0], 0)
+
+    def _op_setb_bit(self, ins: DecodedInstruction) -> None:
+        self.memory.write_bit(ins.operands[0], 1)
+
+    def _op_cpl_c(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", 0 if self._carry() else 1)
+
+    def _op_clr_c(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", 0)
+
+    def _op_setb_c(self, ins: DecodedInstruction) -> None:
+        self._set_flag("CY", 1)
+
+    def _op_mov_a_imm(self, ins: DecodedInstruction) -> None:
+        self.a = ins.operands[0]
+
+    def _op_mov_a_direct(self, ins: DecodedInstruction) -> None:
+        self.a = self._read_direct(ins.operands[0])
+
+    def _op_mov_a_indirect(self, ins: DecodedInstruction) -> None:
+        self.a = self.memory.read_indirect(self._read_r(ins.opcode & 0x01))
+
+    def _op_mov_a_r(self, ins: DecodedInstruction) -> None:
+        self.a = self._read_r(ins.opcode & 0x07)
+
+    def _op_mov_direct_a(self, ins: DecodedInstruction) -> None:
+        self._write_direct(ins.operands[0], self.a)
+
+    def _op_mov_indirect_a(self, ins: DecodedInstruction) -> None:
+        self.memory.write_indirect(self._read_r(ins.opcode & 0x01), self.a)
+
+    def _op_mov_r_a(self, ins: DecodedInstruction) -> None:
+        self._write_r(ins.opcode & 0x07, self.a)
+
+    def _op_mov_direct_imm(self, ins: DecodedInstruction) -> None:
+        direct, imm = ins.operands
+        self._write_direct(direct, imm)
+
+    def _op_mov_indirect_imm(self, ins: DecodedInstruction) -> None:
+        self.memory.write_indirect(self._read_r(ins.opcode & 0x01), ins.operands[0])
+
+    def _op_mov_r_imm(self, ins: DecodedInstruction) -> None:
+        self._write_r(ins.opcode & 0x07, ins.operands[0])
+
+    def _op_mov_direct_direct(self, ins: DecodedInstruction) -> None:
+        src, dst = ins.operands
+        self._write_direct(dst, self._read_direct(src))
+
+    def _op_mov_direct_indirect(self, ins: DecodedInstruction) -> None:
+        self._write_direct(ins.operands[0], self.memory.read_indirect(self._read_r(ins.opcode & 0x01)))
+
+    def _op_mov_direct_r(self, ins: DecodedInstruction) -> None:
+        self._write_direct(ins.operands[0], self._read_r(ins.opcode & 0x07))
+
+    def _op_mov_indirect_direct(self, ins: DecodedInstruction) -> None:
+        self.memory.write_indirect(self._read_r(ins.opcode & 0x01), self._read_direct(ins.operands[0]))
+
+    def _op_mov_r_direct(self, ins: DecodedInstruction) -> None:
+        self._write_r(ins.opcode & 0x07, self._read_direct(ins.operands[0]))
+
+    def _op_mov_dptr_imm(self, ins: DecodedInstruction) -> None:
+        self.dptr = (ins.operands[0] << 8) | ins.operands[1]
+
+    def _op_movc_a_pc(self, ins: DecodedInstruction) -> None:
+        self.a = self.memory.read_code((self.pc + self.a) & 0xFFFF)
+
+    def _op_movc_a_dptr(self, ins: DecodedInstruction) -> None:
+        self.a = self.memory.read_code((self.dptr + self.a) & 0xFFFF)
+
+    def _op_movx_a_dptr(self, ins: DecodedInstruction) -> None:
+        self.a = self.memory.read_xram(self.dptr)
+
+    def _op_movx_a_indirect(self, ins: DecodedInstruction) -> None:
+        self.a = self.memory.read_xram(self._read_r(ins.opcode & 0x01))
+
+    def _op_movx_dptr_a(self, ins: DecodedInstruction) -> None:
+        self.memory.write_xram(self.dptr, self.a)
+
+    def _op_movx_indirect_a(self, ins: DecodedInstruction) -> None:
+        self.memory.write_xram(self._read_r(ins.opcode & 0x01), self.a)
+
+    def _op_push(self, ins: DecodedInstruction) -> None:
+        self._push_byte(self._read_direct(ins.operands[0]))
+
+    def _op_pop(self, ins: DecodedInstruction) -> None:
+        self._write_direct(ins.operands[0], self._pop_byte())
+
+    def _op_xch_direct(self, ins: DecodedInstruction) -> None:
+        direct = ins.operands[0]
+        value = self._read_direct(direct, rmw=True)
+        self._write_direct(direct, self.a)
+        self.a = value
+
+    def _op_xch_indirect(self, ins: DecodedInstruction) -> None:
+        addr = self._read_r(ins.opcode & 0x01)
+        value = self.memory.read_indirect(addr)
+        self.memory.write_indirect(addr, self.a)
+        self.a = value
+
+    def _op_xch_r(self, ins: DecodedInstruction) -> None:
+        reg = ins.opcode & 0x07
+        value = self._read_r(reg)
+        self._write_r(reg, self.a)
+        self.a = value
+
+    def _op_xchd(self, ins: DecodedInstruction) -> None:
+        addr = self._read_r(ins.opcode & 0x01)
+        value = self.memory.read_indirect(addr)
+        new_a = (self.a & 0xF0) | (value & 0x0F)
+        new_mem = (value & 0xF0) | (self.a & 0x0F)
+        self.a = new_a
+        self.memory.write_indirect(addr, new_mem)
+
+    def _read_accumulator_group_operand(self, ins: DecodedInstruction) -> int:
+        low = ins.opcode & 0x0F
+        if low == 4:
+            return ins.operands[0]
+        if low == 5:
+            return self._read_direct(ins.operands[0])
+        if low in {6, 7}:
+            return self.memory.read_indirect(self._read_r(low - 6))
+        return self._read_r(low - 8)
 
     def _execute_da(self) -> None:
         adjust = 0
@@ -1277,7 +1701,15 @@ class CPU8051(BaseCPU):
         self.a = result & 0xFF
         self._set_flag("CY", 1 if carry_out else 0)
 
-    def snapshot(self) -> dict:
+    def _snapshot_memory_limits(self) -> dict[str, int]:
+        return {
+            "iram": 0x80 + len(self.memory.iram_high),
+            "sfr": 0x80,
+            "code": self.program.origin + len(self.program.binary) if self.program else 0x100,
+            "xram": 0x20,
+        }
+
+    def snapshot(self, *, include_memory: bool = True, include_trace: bool = True) -> dict:
         psw = self.memory.read_sfr("PSW")
         registers = {
             "A": self.a,
@@ -1288,7 +1720,7 @@ class CPU8051(BaseCPU):
             "PSW": psw,
             **{f"R{i}": self._read_r(i) for i in range(8)},
         }
-        flags = {name: self._get_flag(name) for name in ["P", "OV", "RS0", "RS1", "F0", "AC", "CY"]}
+        flags = {name: self._get_flag(name) for name in _SNAPSHOT_FLAGS}
         timers = {
             "t0": {
                 "TL": self.memory.read_sfr("TL0"),
@@ -1331,36 +1763,39 @@ class CPU8051(BaseCPU):
             "halted": self.halted,
             "last_error": self.last_error,
             "last_interrupt": self.last_interrupt,
-            "iram": self.memory.dump_iram(),
-            "sfr": self.memory.dump_sfr(),
-            "rom": self.memory.dump_rom(self.program.origin + len(self.program.binary) if self.program else 0x100),
-            "xram_sample": {idx: self.memory.read_xram(idx) for idx in range(0x20)},
+            **(
+                {
+                    "iram": self.memory.dump_iram(),
+                    "sfr": self.memory.dump_sfr(),
+                    "rom": self.memory.dump_rom(self.program.origin + len(self.program.binary) if self.program else 0x100),
+                    "xram_sample": {idx: self.memory.read_xram(idx) for idx in range(0x20)},
+                }
+                if include_memory
+                else {}
+            ),
             "breakpoints": [
-                {"pc": breakpoint.pc, "condition": breakpoint.condition, "enabled": breakpoint.enabled}
+                {
+                    "pc": breakpoint.pc,
+                    "condition": breakpoint.condition,
+                    "enabled": breakpoint.enabled,
+                    "ignore_count": breakpoint.ignore_count,
+                    "hit_count": breakpoint.hit_count,
+                }
                 for breakpoint in self.debugger.breakpoints.values()
             ],
-            "watchpoints": [{"space": wp.space, "target": wp.target} for wp in self.debugger.watchpoints if wp.enabled],
+            "watchpoints": [
+                {"space": wp.space, "target": wp.target, "end": wp.end, "access": wp.access, "equals": wp.equals, "crosses": wp.crosses}
+                for wp in self.debugger.watchpoints
+                if wp.enabled
+            ],
             "call_stack": self.debugger.call_stack[:],
-            "trace": [
-                {
-                    "pc": item.pc,
-                    "opcode": item.opcode,
-                    "mnemonic": item.mnemonic,
-                    "bytes": item.bytes_,
-                    "cycles": item.cycles,
-                    "line": item.line,
-                    "text": item.text,
-                    "register_diff": item.register_diff,
-                    "interrupt": item.interrupt,
-                }
-                    for item in self.debugger.trace
-                ],
+            **({"trace": [self._trace_payload(item) for item in self.debugger.trace]} if include_trace else {}),
             "history_depth": len(self.debugger.history),
             "serial": {
                 "tx": self.serial.tx_log[:],
                 "rx_pending": list(self.serial.rx_queue),
             },
-            "io_reads": [dict(item) for item in self.io_reads],
+            "io_reads": self.io_reads,
             "debug_mode": self.debug_mode,
         }
 
@@ -1382,7 +1817,7 @@ class CPU8051(BaseCPU):
             "halted": self.halted,
             "last_error": self.last_error,
             "last_interrupt": self.last_interrupt,
-            "io_reads": [dict(item) for item in self.io_reads],
+            "io_reads": self.io_reads,
             "debug_mode": self.debug_mode,
         }
 
@@ -1398,8 +1833,8 @@ class CPU8051(BaseCPU):
                 "open_drain": port.open_drain,
             }
             signature.append((port.latch & 0xFF, pin_value & 0xFF, 1 if port.open_drain else 0))
-        io_reads_delta = [dict(item) for item in self._pending_io_reads]
-        self._pending_io_reads.clear()
+        io_reads_delta = self._expand_port_reads(self._pending_port_reads)
+        self._pending_port_reads.clear()
         signature_tuple = tuple(signature)
         if signature_tuple == self._last_hardware_tick_signature and not io_reads_delta:
             return {}
@@ -1420,7 +1855,7 @@ class CPU8051(BaseCPU):
     def runtime_snapshot(self) -> dict:
         return {
             "registers": self._debug_registers(),
-            "flags": {name: self._get_flag(name) for name in ["P", "OV", "RS0", "RS1", "F0", "AC", "CY"]},
+            "flags": {name: self._get_flag(name) for name in _SNAPSHOT_FLAGS},
             "cycles": self.cycles,
             "clock_hz": self.clock_hz,
             "effective_clock_hz": self.effective_clock_hz(),
@@ -1441,6 +1876,7 @@ class CPU8051(BaseCPU):
         }
 
     def serialize_state(self) -> dict:
+        self._sync_peripherals()
         return {
             "pc": self.pc,
             "cycles": self.cycles,
@@ -1459,8 +1895,8 @@ class CPU8051(BaseCPU):
                 "pending_rx_cycles": self.serial.pending_rx_cycles,
                 "tx_byte": self.serial.tx_byte,
             },
-            "io_reads": [dict(item) for item in self.io_reads],
-            "pending_io_reads": [dict(item) for item in self._pending_io_reads],
+            "port_reads": [list(item) for item in self._port_reads],
+            "pending_port_reads": [list(item) for item in self._pending_port_reads],
             "active_interrupt_priorities": self.active_interrupt_priorities[:],
             "previous_int_pins": self._previous_int_pins.copy(),
             "previous_timer_pins": self._previous_timer_pins.copy(),
@@ -1475,11 +1911,21 @@ class CPU8051(BaseCPU):
                         "pc": breakpoint.pc,
                         "condition": breakpoint.condition,
                         "enabled": breakpoint.enabled,
+                        "ignore_count": breakpoint.ignore_count,
+                        "hit_count": breakpoint.hit_count,
                     }
                     for breakpoint in self.debugger.breakpoints.values()
                 ],
                 "watchpoints": [
-                    {"space": wp.space, "target": wp.target, "enabled": wp.enabled}
+                    {
+                        "space": wp.space,
+                        "target": wp.target,
+                        "enabled": wp.enabled,
+                        "end": wp.end,
+                        "access": wp.access,
+                        "equals": wp.equals,
+                        "crosses": wp.crosses,
+                    }
                     for wp in self.debugger.watchpoints
                 ],
                 "trace": [
@@ -1497,35 +1943,9 @@ class CPU8051(BaseCPU):
                     }
                     for item in self.debugger.trace
                 ],
-                "history": [
-                    {
-                        "trace": {
-                            "pc": item.trace.pc,
-                            "opcode": item.trace.opcode,
-                            "mnemonic": item.trace.mnemonic,
-                            "bytes": item.trace.bytes_,
-                            "cycles": item.trace.cycles,
-                            "line": item.trace.line,
-                            "text": item.trace.text,
-                            "changes": item.trace.changes,
-                            "register_diff": item.trace.register_diff,
-                            "interrupt": item.trace.interrupt,
-                        },
-                        "cycles_before": item.cycles_before,
-                        "cycles_after": item.cycles_after,
-                        "halted_before": item.halted_before,
-                        "halted_after": item.halted_after,
-                        "last_error_before": item.last_error_before,
-                        "last_error_after": item.last_error_after,
-                        "last_interrupt_before": item.last_interrupt_before,
-                        "last_interrupt_after": item.last_interrupt_after,
-                        "call_stack_before": item.call_stack_before,
-                        "call_stack_after": item.call_stack_after,
-                        "extra_before": item.extra_before,
-                        "extra_after": item.extra_after,
-                    }
-                    for item in self.debugger.history
-                ],
+                "history": self._export_history(),
+                "trace_sequence": self.debugger.trace_sequence,
+                "trace_generation": self.debugger.trace_generation,
             },
         }
 
@@ -1539,6 +1959,7 @@ class CPU8051(BaseCPU):
         self.speed_multiplier = float(state.get("speed_multiplier", self.speed_multiplier))
         self.execution_mode = str(state.get("execution_mode", self.execution_mode))
         self.debug_mode = bool(state.get("debug_mode", False))
+        self._reset_peripheral_schedule()
         self.memory.import_state(dict(state.get("memory", {})))
         serial = dict(state.get("serial", {}))
         self.serial = SerialPort(
@@ -1548,28 +1969,13 @@ class CPU8051(BaseCPU):
             pending_rx_cycles=int(serial.get("pending_rx_cycles", 0)),
             tx_byte=serial.get("tx_byte"),
         )
-        self.io_reads = deque(
-            [
-                {
-                    "signal": str(item.get("signal", "")),
-                    "value": int(item.get("value", 0)) & 0x01,
-                    "time_ms": float(item.get("time_ms", 0.0) or 0.0),
-                    "source": str(item.get("source", "cpu")),
-                }
-                for item in state.get("io_reads", [])
-            ],
-            maxlen=128,
+        self._port_reads = deque(
+            self._port_reads_from_state(state, "port_reads", "io_reads"),
+            maxlen=_PORT_READ_HISTORY,
         )
-        self._pending_io_reads = deque(
-            [
-                {
-                    "signal": str(item.get("signal", "")),
-                    "value": int(item.get("value", 0)) & 0x01,
-                    "time_ms": float(item.get("time_ms", 0.0) or 0.0),
-                    "source": str(item.get("source", "cpu")),
-                }
-                for item in state.get("pending_io_reads", [])
-            ]
+        self._pending_port_reads = deque(
+            self._port_reads_from_state(state, "pending_port_reads", "pending_io_reads"),
+            maxlen=_PENDING_PORT_READ_LIMIT,
         )
         self.active_interrupt_priorities = [int(item) for item in state.get("active_interrupt_priorities", [])]
         self._previous_int_pins = {
@@ -1603,6 +2009,10 @@ class CPU8051(BaseCPU):
                     target=item.get("target", item.get("address")),
                     space=item.get("space", "iram"),
                     enabled=bool(item.get("enabled", True)),
+                    end=item.get("end"),
+                    access=item.get("access", "write"),
+                    equals=item.get("equals"),
+                    crosses=item.get("crosses"),
                 )
                 for item in debugger.get("watchpoints", [])
             ]
@@ -1623,37 +2033,9 @@ class CPU8051(BaseCPU):
                     interrupt=item.get("interrupt"),
                 )
             )
-        self.debugger.history.clear()
-        for item in debugger.get("history", []):
-            trace = dict(item.get("trace", {}))
-            self.debugger.history.append(
-                ReverseDelta(
-                    trace=TraceEntry(
-                        pc=int(trace["pc"]),
-                        opcode=int(trace["opcode"]),
-                        mnemonic=str(trace["mnemonic"]),
-                        bytes_=[int(value) for value in trace.get("bytes", [])],
-                        cycles=int(trace.get("cycles", 0)),
-                        line=trace.get("line"),
-                        text=trace.get("text"),
-                        changes={key: [tuple(change) for change in value] for key, value in dict(trace.get("changes", {})).items()},
-                        register_diff={key: dict(value) for key, value in dict(trace.get("register_diff", {})).items()},
-                        interrupt=trace.get("interrupt"),
-                    ),
-                    cycles_before=int(item.get("cycles_before", 0)),
-                    cycles_after=int(item.get("cycles_after", 0)),
-                    halted_before=bool(item.get("halted_before", False)),
-                    halted_after=bool(item.get("halted_after", False)),
-                    last_error_before=item.get("last_error_before"),
-                    last_error_after=item.get("last_error_after"),
-                    last_interrupt_before=item.get("last_interrupt_before"),
-                    last_interrupt_after=item.get("last_interrupt_after"),
-                    call_stack_before=[int(value) for value in item.get("call_stack_before", [])],
-                    call_stack_after=[int(value) for value in item.get("call_stack_after", [])],
-                    extra_before=dict(item.get("extra_before", {})),
-                    extra_after=dict(item.get("extra_after", {})),
-                )
-            )
+        self.debugger.trace_sequence = int(debugger.get("trace_sequence", len(self.debugger.trace)))
+        self.debugger.trace_generation = int(debugger.get("trace_generation", 0))
+        self._import_history(debugger.get("history"))
 
     def _restore_register_values(self, values: dict[str, int]) -> None:
         for name, value in values.items():
@@ -1674,6 +2056,7 @@ class CPU8051(BaseCPU):
                 self._write_r(int(key[1:]), value & 0xFF)
 
     def _capture_extra_state(self) -> dict:
+        self._sync_peripherals()
         return {
             "serial": {
                 "tx_log": self.serial.tx_log[:],
@@ -1682,7 +2065,7 @@ class CPU8051(BaseCPU):
                 "pending_rx_cycles": self.serial.pending_rx_cycles,
                 "tx_byte": self.serial.tx_byte,
             },
-            "pending_io_reads": [dict(item) for item in self._pending_io_reads],
+            "pending_port_reads": [list(item) for item in self._pending_port_reads],
             "active_interrupt_priorities": self.active_interrupt_priorities[:],
             "previous_int_pins": self._previous_int_pins.copy(),
             "previous_timer_pins": self._previous_timer_pins.copy(),
@@ -1701,16 +2084,9 @@ class CPU8051(BaseCPU):
             pending_rx_cycles=int(serial.get("pending_rx_cycles", 0)),
             tx_byte=serial.get("tx_byte"),
         )
-        self._pending_io_reads = deque(
-            [
-                {
-                    "signal": str(item.get("signal", "")),
-                    "value": int(item.get("value", 0)) & 0x01,
-                    "time_ms": float(item.get("time_ms", 0.0) or 0.0),
-                    "source": str(item.get("source", "cpu")),
-                }
-                for item in state.get("pending_io_reads", [])
-            ]
+        self._pending_port_reads = deque(
+            self._port_reads_from_state(state, "pending_port_reads", "pending_io_reads"),
+            maxlen=_PENDING_PORT_READ_LIMIT,
         )
         self.active_interrupt_priorities = [int(item) for item in state.get("active_interrupt_priorities", [])]
         previous = dict(state.get("previous_int_pins", {}))
@@ -1740,3 +2116,4 @@ class CPU8051(BaseCPU):
         }
         signature = state.get("last_hardware_tick_signature", [])
         self._last_hardware_tick_signature = tuple(tuple(int(value) for value in item) for item in signature) if signature else None
+        self._reset_peripheral_schedule()
@@ -2,43 +2,25 @@ from __future__ import annotations
 
 from collections import deque
 import os
+from typing import Callable
 
-from .base_cpu import BaseCPU
+from .base_cpu import CAPTURE_COUNTERS, CAPTURE_FULL, BaseCPU
 from .exceptions import DecodeError, ExecutionError
 from .memory import GPIOA_MMIO_BASE, MemoryMap
-from .model import ProgramImage, ReverseDelta, TraceEntry, Watchpoint
-
-COND_NAMES = {
-    0x0: "EQ",
-    0x1: "NE",
-    0x2: "CS",
-    0x3: "CC",
-    0x4: "MI",
-    0x5: "PL",
-    0x6: "VS",
-    0x7: "VC",
-    0x8: "HI",
-    0x9: "LS",
-    0xA: "GE",
-    0xB: "LT",
-    0xC: "GT",
-    0xD: "LE",
-    0xE: "AL",
-}
-SHIFT_NAMES = {0: "LSL", 1: "LSR", 2: "ASR", 3: "ROR"}
-DATA_PROCESSING_NAMES = {
-    0x0: "AND",
-    0x1: "EOR",
-    0x2: "SUB",
-    0x4: "ADD",
-    0x5: "ADC",
-    0x6: "SBC",
-    0x8: "TST",
-    0xA: "CMP",
-    0xC: "ORR",
-    0xD: "MOV",
-    0xF: "MVN",
-}
+from .model import ProgramImage, TraceEntry, Watchpoint
+from .predecode_arm import (
+    COND_ALWAYS,
+    MAX_LOOP_INSTRUCTIONS,
+    OPERAND_IMMEDIATE,
+    OPERAND_REGISTER,
+    OPERAND_SHIFT_IMMEDIATE,
+    OPERAND_SHIFT_REGISTER,
+    ArmDecodedInstruction,
+    ArmLoop,
+    ArmPredecodeCache,
+    decode_arm_instruction,
+)
+
 _DEBUG_TIMING = os.environ.get("HEXLOGIC_DEBUG_TIMING", "").strip().lower() in {"1", "true", "yes", "on"}
 _ARM_GPIO_OUT = 0x00
 _ARM_GPIO_IN = 0x04
@@ -55,6 +37,7 @@ _ARM_TIMER_CTRL_ENABLE = 0x01
 _ARM_TIMER_CTRL_PERIODIC = 0x02
 _ARM_TIMER_CTRL_IRQ_ENABLE = 0x04
 _ARM_IRQ_VECTOR = 0x18
+_CONDITION_REGISTER_INDEXES = {**{f"R{index}": index for index in range(16)}, "SP": 13, "LR": 14}
 
 
 class CPUARM(BaseCPU):
@@ -62,6 +45,11 @@ class CPUARM(BaseCPU):
         super().__init__()
         self.endian = endian if endian in {"little", "big"} else "little"
         self.memory = MemoryMap(code_size=code_size, xram_size=data_size, upper_iram=False)
+        self._handlers = self._build_handler_table()
+        self._predecoded = ArmPredecodeCache()
+        self._loops: dict[int, ArmLoop | None] = {}
+        self.memory.add_code_write_listener(self._predecoded.invalidate)
+        self.memory.add_code_write_listener(self._forget_loops)
         self.registers = [0] * 16
         self.io_reads: deque[dict[str, int | float | str]] = deque(maxlen=128)
         self._pending_io_reads: deque[dict[str, int | float | str]] = deque()
@@ -74,7 +62,6 @@ class CPUARM(BaseCPU):
         self._previous_gpio_inputs = 0
         self._arm_interrupt_stack: list[int] = []
         self._last_hardware_tick_signature = None
-        self._listing_text_by_address: dict[int, str] = {}
         self.reset(hard=True)
 
     def reset(self, *, hard: bool = False) -> None:
@@ -90,6 +77,7 @@ class CPUARM(BaseCPU):
         self.last_error = None
         self.last_interrupt = None
         self.debugger.call_stack.clear()
+        self.debugger.history.clear()
         self.io_reads.clear()
         self._pending_io_reads.clear()
         self._gpio_input_mask = 0
@@ -129,6 +117,7 @@ class CPUARM(BaseCPU):
         self.last_error = None
         self.last_interrupt = None
         self.debugger.call_stack.clear()
+        self.debugger.history.clear()
         self.io_reads.clear()
         self._pending_io_reads.clear()
         self._gpio_input_mask = 0
@@ -154,6 +143,9 @@ class CPUARM(BaseCPU):
     def set_endian(self, endian: str) -> None:
         if endian not in {"little", "big"}:
             raise ExecutionError(f"Unsupported endian `{endian}`", pc=self.pc)
+        if endian != self.endian:
+            self._predecoded.clear()
+            self._loops.clear()
         self.endian = endian
 
     def _set_pc(self, value: int) -> None:
@@ -173,13 +165,13 @@ class CPUARM(BaseCPU):
         return self.registers[index] & 0xFFFFFFFF
 
     def _current_opcode(self) -> int:
-        return self.memory.read32(self.pc, space="code", endian=self.endian)
+        return self.memory.read_code32(self.pc, self.endian)
 
     def _read_mmio32(self, offset: int) -> int:
-        return self.memory.read32(offset, space="xram", endian=self.endian)
+        return self.memory.read_xram32(offset, self.endian)
 
     def _write_mmio32(self, offset: int, value: int) -> None:
-        self.memory.write32(offset, value & 0xFFFFFFFF, space="xram", endian=self.endian)
+        self.memory.write_xram32(offset, value & 0xFFFFFFFF, self.endian)
 
     def _mmio_offset_for_address(self, address: int) -> int | None:
         address &= 0xFFFFFFFF
@@ -219,6 +211,7 @@ class CPUARM(BaseCPU):
             self._pending_io_reads.append(dict(event))
 
     def set_pin(self, port_index: int, bit: int, level: int | bool | None) -> None:
+        self._log_external_input("set_pin", (port_index, bit, level))
         if port_index != 0 or not 0 <= int(bit) < 16:
             return
         mask = 1 << int(bit)
@@ -239,6 +232,12 @@ class CPUARM(BaseCPU):
         self._write_mmio32(_ARM_GPIO_IN, input_value)
         self._update_gpio_interrupts(previous_inputs, input_value)
 
+    def _read_port_pin_level(self, port_index: int, bit: int) -> int:
+        if port_index != 0 or not 0 <= int(bit) < 16:
+            return 0
+        register = _ARM_GPIO_OUT if (self._read_mmio32(_ARM_GPIO_DIR) >> bit) & 0x01 else _ARM_GPIO_IN
+        return (self._read_mmio32(register) >> bit) & 0x01
+
     def _gpio_regs(self) -> dict[str, int]:
         return {
             "out": self._read_mmio32(_ARM_GPIO_OUT),
@@ -339,6 +338,17 @@ class CPUARM(BaseCPU):
             if before.get(name) != after[name]
         }
 
+    def _condition_reader(self, name: str) -> Callable[[], int | bool] | None:
+        if name in {"N", "Z", "C", "V"}:
+            attribute = f"flag_{name.lower()}"
+            return lambda: bool(getattr(self, attribute))
+        if name == "PC":
+            return lambda: self.pc & 0xFFFFFFFF
+        if name in _CONDITION_REGISTER_INDEXES:
+            index = _CONDITION_REGISTER_INDEXES[name]
+            return lambda: self.registers[index] & 0xFFFFFFFF
+        return super()._condition_reader(name)
+
     def _flags_dict(self) -> dict[str, int]:
         return {"N": self.flag_n, "Z": self.flag_z, "C": self.flag_c, "V": self.flag_v}
 
@@ -442,159 +452,153 @@ class CPUARM(BaseCPU):
         rotated = self._rotate_right(value, amount)
         return rotated, (rotated >> 31) & 1
 
-    def _decode_operand2(self, opcode: int, current_pc: int) -> tuple[int, int, str]:
-        if opcode & (1 << 25):
-            rotate = ((opcode >> 8) & 0xF) * 2
-            immediate = opcode & 0xFF
-            value = self._rotate_right(immediate, rotate)
-            carry = self.flag_c if rotate == 0 else (value >> 31) & 1
-            return value & 0xFFFFFFFF, carry, f"#0x{value & 0xFFFFFFFF:08X}"
-
-        rm = opcode & 0xF
-        shift_type = (opcode >> 5) & 0x3
-        if opcode & (1 << 4):
-            if opcode & (1 << 7):
-                raise DecodeError("ARM register-shift form is invalid", pc=current_pc)
-            rs = (opcode >> 8) & 0xF
-            amount = self._read_reg(rs, current_pc=current_pc) & 0xFF
-            value, carry = self._apply_shift_with_carry(
-                self._read_reg(rm, current_pc=current_pc),
-                shift_type,
-                amount,
-                carry_in=self.flag_c,
-                immediate_form=False,
-            )
-            return value, carry, f"R{rm}, {SHIFT_NAMES[shift_type]} R{rs}"
-
-        amount = (opcode >> 7) & 0x1F
-        value, carry = self._apply_shift_with_carry(
-            self._read_reg(rm, current_pc=current_pc),
-            shift_type,
+    def _operand2(self, ins: ArmDecodedInstruction) -> tuple[int, int]:
+        kind = ins.operand_kind
+        if kind == OPERAND_IMMEDIATE:
+            return ins.immediate, self.flag_c if ins.immediate_carry is None else ins.immediate_carry
+        if kind == OPERAND_REGISTER:
+            return self._read_reg(ins.rm, current_pc=ins.address), self.flag_c
+        if kind == OPERAND_SHIFT_REGISTER:
+            amount = self._read_reg(ins.rs, current_pc=ins.address) & 0xFF
+        else:
+            amount = ins.shift_amount
+        return self._apply_shift_with_carry(
+            self._read_reg(ins.rm, current_pc=ins.address),
+            ins.shift_type,
             amount,
             carry_in=self.flag_c,
-            immediate_form=True,
-        )
-        if amount == 0 and shift_type == 0:
-            return value, carry, f"R{rm}"
-        suffix = "RRX" if shift_type == 3 and amount == 0 else f"{SHIFT_NAMES[shift_type]} #{amount}"
-        return value, carry, f"R{rm}, {suffix}"
-
-    def _decode_memory_offset(self, opcode: int, current_pc: int) -> tuple[int, str]:
-        if ((opcode >> 25) & 0x1) == 0:
-            offset = opcode & 0xFFF
-            return offset, f"#{offset}"
-        rm = opcode & 0xF
-        shift_type = (opcode >> 5) & 0x3
-        shift_amount = (opcode >> 7) & 0x1F
-        if opcode & (1 << 4):
-            raise DecodeError("ARM load/store register shifts by register are not implemented", pc=current_pc)
-        offset, _ = self._apply_shift_with_carry(
-            self._read_reg(rm, current_pc=current_pc),
-            shift_type,
-            shift_amount,
-            carry_in=self.flag_c,
-            immediate_form=True,
+            immediate_form=kind == OPERAND_SHIFT_IMMEDIATE,
         )
-        if shift_amount == 0 and shift_type == 0:
-            return offset, f"R{rm}"
-        return offset, f"R{rm}, {SHIFT_NAMES[shift_type]} #{shift_amount}"
-
-    def _execute_data_processing(self, opcode: int, current_pc: int) -> tuple[str, int]:
-        opcode_id = (opcode >> 21) & 0xF
-        if opcode_id not in DATA_PROCESSING_NAMES:
-            raise DecodeError(f"ARM opcode 0x{opcode:08X} is not implemented", pc=current_pc)
-        mnemonic = DATA_PROCESSING_NAMES[opcode_id]
-        set_flags = bool((opcode >> 20) & 0x1)
-        rd = (opcode >> 12) & 0xF
-        rn = (opcode >> 16) & 0xF
-        operand2, shifter_carry, operand_text = self._decode_operand2(opcode, current_pc)
-        left = self._read_reg(rn, current_pc=current_pc)
-
-        if opcode_id == 0xD:  # MOV
-            result = operand2 & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_logic_flags(result, shifter_carry)
-            return f"MOV R{rd},{operand_text}", 1
-        if opcode_id == 0xF:  # MVN
-            result = (~operand2) & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_logic_flags(result, shifter_carry)
-            return f"MVN R{rd},{operand_text}", 1
-        if opcode_id == 0x0:  # AND
-            result = left & operand2
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_logic_flags(result, shifter_carry)
-            return f"AND R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0x1:  # EOR
-            result = left ^ operand2
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_logic_flags(result, shifter_carry)
-            return f"EOR R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0xC:  # ORR
-            result = left | operand2
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_logic_flags(result, shifter_carry)
-            return f"ORR R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0x8:  # TST
-            result = left & operand2
-            self._set_logic_flags(result, shifter_carry)
-            return f"TST R{rn},{operand_text}", 1
-        if opcode_id == 0xA:  # CMP
-            result = (left - operand2) & 0xFFFFFFFF
+
+    def _build_handler_table(self) -> dict[str, Callable[[ArmDecodedInstruction], str | None]]:
+        return {
+            "undefined": self._op_undefined,
+            "bx": self._op_bx,
+            "multiply_long": self._op_multiply_long,
+            "branch": self._op_branch,
+            "load_store": self._op_load_store,
+            "AND": self._op_and,
+            "EOR": self._op_eor,
+            "SUB": self._op_sub,
+            "ADD": self._op_add,
+            "ADC": self._op_adc,
+            "SBC": self._op_sbc,
+            "TST": self._op_tst,
+            "CMP": self._op_cmp,
+            "ORR": self._op_orr,
+            "MOV": self._op_mov,
+            "MVN": self._op_mvn,
+        }
+
+    def _decode_at(self, address: int) -> ArmDecodedInstruction:
+        decoded = self._predecoded.get(address)
+        if decoded is None:
+            opcode = self.memory.read_code32(address, self.endian)
+            decoded = decode_arm_instruction(opcode, address, self.endian, self._handlers)
+            self._predecoded.store(decoded)
+        return decoded
+
+    def _op_undefined(self, ins: ArmDecodedInstruction) -> None:
+        raise DecodeError(ins.error, pc=ins.address)
+
+    def _op_mov(self, ins: ArmDecodedInstruction) -> None:
+        result, carry = self._operand2(ins)
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_logic_flags(result, carry)
+
+    def _op_mvn(self, ins: ArmDecodedInstruction) -> None:
+        operand2, carry = self._operand2(ins)
+        result = (~operand2) & 0xFFFFFFFF
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_logic_flags(result, carry)
+
+    def _op_and(self, ins: ArmDecodedInstruction) -> None:
+        operand2, carry = self._operand2(ins)
+        result = self._read_reg(ins.rn, current_pc=ins.address) & operand2
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_logic_flags(result, carry)
+
+    def _op_eor(self, ins: ArmDecodedInstruction) -> None:
+        operand2, carry = self._operand2(ins)
+        result = self._read_reg(ins.rn, current_pc=ins.address) ^ operand2
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_logic_flags(result, carry)
+
+    def _op_orr(self, ins: ArmDecodedInstruction) -> None:
+        operand2, carry = self._operand2(ins)
+        result = self._read_reg(ins.rn, current_pc=ins.address) | operand2
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_logic_flags(result, carry)
+
+    def _op_tst(self, ins: ArmDecodedInstruction) -> None:
+        operand2, carry = self._operand2(ins)
+        self._set_logic_flags(self._read_reg(ins.rn, current_pc=ins.address) & operand2, carry)
+
+    def _op_cmp(self, ins: ArmDecodedInstruction) -> None:
+        operand2, _ = self._operand2(ins)
+        left = self._read_reg(ins.rn, current_pc=ins.address)
+        self._set_sub_flags(left, operand2, 0, (left - operand2) & 0xFFFFFFFF)
+
+    def _op_add(self, ins: ArmDecodedInstruction) -> None:
+        operand2, _ = self._operand2(ins)
+        left = self._read_reg(ins.rn, current_pc=ins.address)
+        result = (left + operand2) & 0xFFFFFFFF
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_add_flags(left, operand2, 0, result)
+
+    def _op_adc(self, ins: ArmDecodedInstruction) -> None:
+        operand2, _ = self._operand2(ins)
+        left = self._read_reg(ins.rn, current_pc=ins.address)
+        carry_in = self.flag_c
+        result = (left + operand2 + carry_in) & 0xFFFFFFFF
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_add_flags(left, operand2, carry_in, result)
+
+    def _op_sub(self, ins: ArmDecodedInstruction) -> None:
+        operand2, _ = self._operand2(ins)
+        left = self._read_reg(ins.rn, current_pc=ins.address)
+        result = (left - operand2) & 0xFFFFFFFF
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
             self._set_sub_flags(left, operand2, 0, result)
-            return f"CMP R{rn},{operand_text}", 1
-        if opcode_id == 0x4:  # ADD
-            result = (left + operand2) & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_add_flags(left, operand2, 0, result)
-            return f"ADD R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0x5:  # ADC
-            carry_in = self.flag_c
-            result = (left + operand2 + carry_in) & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_add_flags(left, operand2, carry_in, result)
-            return f"ADC R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0x2:  # SUB
-            result = (left - operand2) & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_sub_flags(left, operand2, 0, result)
-            return f"SUB R{rd},R{rn},{operand_text}", 1
-        if opcode_id == 0x6:  # SBC
-            borrow = 1 - self.flag_c
-            result = (left - operand2 - borrow) & 0xFFFFFFFF
-            self._write_reg(rd, result)
-            if set_flags:
-                self._set_sub_flags(left, operand2, borrow, result)
-            return f"SBC R{rd},R{rn},{operand_text}", 1
-        raise DecodeError(f"ARM opcode 0x{opcode:08X} is not implemented", pc=current_pc)
-
-    def _execute_load_store(self, opcode: int, current_pc: int) -> tuple[str, int]:
-        if ((opcode >> 26) & 0x3) != 0b01 or ((opcode >> 22) & 0x1) != 0:
-            raise DecodeError("ARM load/store form outside the supported subset is not implemented", pc=current_pc)
-        pre_index = (opcode >> 24) & 0x1
-        up = (opcode >> 23) & 0x1
-        write_back = (opcode >> 21) & 0x1
-        load = (opcode >> 20) & 0x1
-        rn = (opcode >> 16) & 0xF
-        rd = (opcode >> 12) & 0xF
-        base = self._read_reg(rn, current_pc=current_pc)
-        offset, offset_text = self._decode_memory_offset(opcode, current_pc)
-        adjusted = (base + offset) & 0xFFFFFFFF if up else (base - offset) & 0xFFFFFFFF
-        address = adjusted if pre_index else base
-        if load:
-            value = self.memory.read32(address, space="xram", endian=self.endian)
+
+    def _op_sbc(self, ins: ArmDecodedInstruction) -> None:
+        operand2, _ = self._operand2(ins)
+        left = self._read_reg(ins.rn, current_pc=ins.address)
+        borrow = 1 - self.flag_c
+        result = (left - operand2 - borrow) & 0xFFFFFFFF
+        self._write_reg(ins.rd, result)
+        if ins.set_flags:
+            self._set_sub_flags(left, operand2, borrow, result)
+
+    def _op_load_store(self, ins: ArmDecodedInstruction) -> str | None:
+        current_pc = ins.address
+        base = self._read_reg(ins.rn, current_pc=current_pc)
+        if ins.operand_kind == OPERAND_IMMEDIATE:
+            offset = ins.immediate
+        else:
+            offset, _ = self._apply_shift_with_carry(
+                self._read_reg(ins.rm, current_pc=current_pc),
+                ins.shift_type,
+                ins.shift_amount,
+                carry_in=self.flag_c,
+                immediate_form=True,
+            )
+        adjusted = (base + offset) & 0xFFFFFFFF if ins.up else (base - offset) & 0xFFFFFFFF
+        address = adjusted if ins.pre_index else base
+        if ins.load:
+            value = self.memory.read_xram32(address, self.endian)
             self._record_gpio_read(address, value)
-            self._write_reg(rd, value)
+            self._write_reg(ins.rd, value)
         else:
-            store_value = self._read_reg(rd, current_pc=current_pc)
+            store_value = self._read_reg(ins.rd, current_pc=current_pc)
             mmio_offset = self._mmio_offset_for_address(address)
             if mmio_offset == _ARM_GPIO_IRQ_PENDING:
                 pending = self._read_mmio32(_ARM_GPIO_IRQ_PENDING)
@@ -603,7 +607,7 @@ class CPUARM(BaseCPU):
                 pending = self._read_mmio32(_ARM_TIMER_PENDING)
                 self._write_mmio32(_ARM_TIMER_PENDING, pending & ~store_value)
             else:
-                self.memory.write32(address, store_value, space="xram", endian=self.endian)
+                self.memory.write_xram32(address, store_value, self.endian)
                 if mmio_offset in {_ARM_GPIO_OUT, _ARM_GPIO_DIR}:
                     dir_value = self._read_mmio32(_ARM_GPIO_DIR)
                     out_value = self._read_mmio32(_ARM_GPIO_OUT)
@@ -611,74 +615,47 @@ class CPUARM(BaseCPU):
                     self._write_mmio32(_ARM_GPIO_IN, input_value)
                 elif mmio_offset == _ARM_TIMER_LOAD and self._read_mmio32(_ARM_TIMER_VALUE) == 0:
                     self._write_mmio32(_ARM_TIMER_VALUE, store_value)
-        if pre_index and write_back:
-            self._write_reg(rn, adjusted)
-        elif not pre_index:
-            self._write_reg(rn, adjusted)
-        suffix = f"[R{rn}]"
-        if offset:
-            suffix = f"[R{rn}, {'#' if offset_text.startswith('#') else ''}{offset_text.lstrip('#')}]"
-        if pre_index and write_back:
-            suffix += "!"
-        elif not pre_index and offset:
-            suffix = f"[R{rn}], {offset_text}"
-        return f"{'LDR' if load else 'STR'} R{rd},{suffix}", 3
-
-    def _is_multiply_long_opcode(self, opcode: int) -> bool:
-        return ((opcode >> 23) & 0x1F) == 0x01 and ((opcode >> 4) & 0xF) == 0x9
-
-    def _execute_multiply_long(self, opcode: int, current_pc: int) -> tuple[str, int]:
-        signed = (opcode >> 22) & 0x1
-        accumulate = (opcode >> 21) & 0x1
-        set_flags = (opcode >> 20) & 0x1
-        rd_hi = (opcode >> 16) & 0xF
-        rd_lo = (opcode >> 12) & 0xF
-        rs = (opcode >> 8) & 0xF
-        rm = opcode & 0xF
-        if signed:
-            raise DecodeError("Signed ARM multiply-long instructions are not implemented", pc=current_pc)
-        left = self._read_reg(rm, current_pc=current_pc) & 0xFFFFFFFF
-        right = self._read_reg(rs, current_pc=current_pc) & 0xFFFFFFFF
+        if not ins.pre_index or ins.write_back:
+            self._write_reg(ins.rn, adjusted)
+        if ins.operand_kind != OPERAND_IMMEDIATE and not offset:
+            return ins.alternate_mnemonic
+        return None
+
+    def _op_multiply_long(self, ins: ArmDecodedInstruction) -> None:
+        current_pc = ins.address
+        left = self._read_reg(ins.rm, current_pc=current_pc) & 0xFFFFFFFF
+        right = self._read_reg(ins.rs, current_pc=current_pc) & 0xFFFFFFFF
         product = (left * right) & 0xFFFFFFFFFFFFFFFF
         accumulator = 0
-        if accumulate:
-            accumulator = ((self._read_reg(rd_hi, current_pc=current_pc) & 0xFFFFFFFF) << 32) | (
-                self._read_reg(rd_lo, current_pc=current_pc) & 0xFFFFFFFF
+        if ins.accumulate:
+            accumulator = ((self._read_reg(ins.rn, current_pc=current_pc) & 0xFFFFFFFF) << 32) | (
+                self._read_reg(ins.rd, current_pc=current_pc) & 0xFFFFFFFF
             )
         result = (product + accumulator) & 0xFFFFFFFFFFFFFFFF
-        self._write_reg(rd_lo, result & 0xFFFFFFFF)
-        self._write_reg(rd_hi, (result >> 32) & 0xFFFFFFFF)
-        if set_flags:
+        self._write_reg(ins.rd, result & 0xFFFFFFFF)
+        self._write_reg(ins.rn, (result >> 32) & 0xFFFFFFFF)
+        if ins.set_flags:
             self.flag_n = 1 if (result >> 63) & 0x1 else 0
             self.flag_z = 1 if result == 0 else 0
-        mnemonic = "UMLAL" if accumulate else "UMULL"
-        return f"{mnemonic} R{rd_lo},R{rd_hi},R{rm},R{rs}", 2
 
-    def _execute_branch(self, opcode: int, current_pc: int) -> tuple[str, int]:
-        link = (opcode >> 24) & 0x1
-        imm24 = opcode & 0x00FFFFFF
-        if imm24 & 0x00800000:
-            imm24 -= 0x01000000
-        target = (current_pc + 8 + ((imm24 << 2) & 0xFFFFFFFF)) & 0xFFFFFFFF
-        if link:
-            return_address = (current_pc + 4) & 0xFFFFFFFF
+    def _op_branch(self, ins: ArmDecodedInstruction) -> None:
+        if ins.link:
+            return_address = (ins.address + 4) & 0xFFFFFFFF
             self._write_reg(14, return_address)
             self.debugger.call_stack.append(return_address)
-        self._set_pc(target)
-        return f"{'BL' if link else 'B'} 0x{target:08X}", 3
+        self._set_pc(ins.target)
 
-    def _execute_bx(self, opcode: int, current_pc: int) -> tuple[str, int]:
-        rm = opcode & 0xF
-        target = self._read_reg(rm, current_pc=current_pc) & 0xFFFFFFFE
+    def _op_bx(self, ins: ArmDecodedInstruction) -> None:
+        rm = ins.rm
+        target = self._read_reg(rm, current_pc=ins.address) & 0xFFFFFFFE
         if rm == 14 and self._arm_interrupt_stack and target == (self._arm_interrupt_stack[-1] & 0xFFFFFFFE):
             self._arm_interrupt_stack.pop()
         if rm == 14 and self.debugger.call_stack:
             self.debugger.call_stack.pop()
         self._set_pc(target)
-        return f"BX R{rm}", 3
 
     def _tight_loop_fast_path_allowed(self) -> bool:
-        return self.compact_execution_allowed() and not self.debugger.breakpoints and not self._peripherals_active()
+        return self.compact_execution_allowed() and not self._peripherals_active()
 
     def _branch_target(self, opcode: int, current_pc: int) -> int:
         imm24 = opcode & 0x00FFFFFF
@@ -688,11 +665,11 @@ class CPUARM(BaseCPU):
 
     def _try_fast_branch_self(self, *, max_steps: int, max_cycles: int) -> dict | None:
         current_pc = self.pc
-        opcode = self.memory.read32(current_pc, space="code", endian=self.endian)
+        opcode = self.memory.read_code32(current_pc, self.endian)
         cond = (opcode >> 28) & 0xF
         if cond != 0xE or ((opcode >> 25) & 0x7) != 0b101 or ((opcode >> 24) & 0x1):
             return None
-        if self._branch_target(opcode, current_pc) != current_pc:
+        if self._branch_target(opcode, current_pc) != current_pc or current_pc in self._breakpoint_pcs:
             return None
         steps = min(int(max_steps), int(max_cycles) // 3)
         if steps <= 0:
@@ -702,7 +679,7 @@ class CPUARM(BaseCPU):
 
     def _try_fast_subs_bne_loop(self, *, max_steps: int, max_cycles: int) -> dict | None:
         current_pc = self.pc
-        branch = self.memory.read32(current_pc, space="code", endian=self.endian)
+        branch = self.memory.read_code32(current_pc, self.endian)
         if ((branch >> 25) & 0x7) != 0b101 or ((branch >> 24) & 0x1):
             return None
         if ((branch >> 28) & 0xF) != 0x1 or self.flag_z:
@@ -710,7 +687,9 @@ class CPUARM(BaseCPU):
         target = self._branch_target(branch, current_pc)
         if target != ((current_pc - 4) & 0xFFFFFFFF):
             return None
-        alu = self.memory.read32(target, space="code", endian=self.endian)
+        if current_pc in self._breakpoint_pcs or target in self._breakpoint_pcs:
+            return None
+        alu = self.memory.read_code32(target, self.endian)
         if ((alu >> 26) & 0x3) != 0b00 or ((alu >> 25) & 0x1) != 1:
             return None
         if ((alu >> 21) & 0xF) != 0x2 or ((alu >> 20) & 0x1) != 1:
@@ -736,176 +715,165 @@ class CPUARM(BaseCPU):
         self._set_pc((current_pc + 4) & 0xFFFFFFFF)
         return {"steps": steps_needed, "cycles": cycles_needed}
 
-    def try_fast_realtime_slice(self, *, max_steps: int, max_cycles: int) -> dict | None:
-        if not self._tight_loop_fast_path_allowed() or max_steps <= 0 or max_cycles <= 0 or self.halted:
+    def _forget_loops(self, _start: int = 0, _end: int = 0) -> None:
+        self._loops.clear()
+
+    def _breakpoint_pcs_changed(self) -> None:
+        self._loops.clear()
+
+    def _compile_loop(self, start_pc: int) -> ArmLoop | None:
+        body: list[ArmDecodedInstruction] = []
+        address = start_pc
+        breakpoint_pcs = self._breakpoint_pcs
+        for _ in range(MAX_LOOP_INSTRUCTIONS):
+            if address in breakpoint_pcs:
+                return None
+            try:
+                ins = self._decode_at(address)
+            except ExecutionError:
+                return None
+            if ins.kind == "branch":
+                if ins.link or ins.target != start_pc or not body:
+                    return None
+                break
+            if ins.kind != "data_processing" or ins.writes_pc:
+                return None
+            body.append(ins)
+            address = (address + 4) & 0xFFFFFFFF
+        else:
             return None
-        return self._try_fast_subs_bne_loop(max_steps=max_steps, max_cycles=max_cycles) or self._try_fast_branch_self(
-            max_steps=max_steps,
-            max_cycles=max_cycles,
-        )
-
-    def _step_impl(self) -> TraceEntry:
-        if self.halted:
-            raise ExecutionError("CPU halted", pc=self.pc)
-        self.last_interrupt = self._maybe_take_interrupt()
-        current_pc = self.pc
-        registers_before = self._debug_registers()
-        opcode = self.memory.read32(current_pc, space="code", endian=self.endian)
-        self._set_pc((current_pc + 4) & 0xFFFFFFFF)
-        mnemonic = f".word 0x{opcode:08X}"
-        cycles = 1
-        try:
-            cond = (opcode >> 28) & 0xF
-            if not self._condition_passed(cond):
-                mnemonic = f"SKIP.{COND_NAMES.get(cond, '??')}"
-            elif (opcode & 0x0FFFFFF0) == 0x012FFF10:
-                mnemonic, cycles = self._execute_bx(opcode, current_pc)
-            elif self._is_multiply_long_opcode(opcode):
-                mnemonic, cycles = self._execute_multiply_long(opcode, current_pc)
-            else:
-                category = (opcode >> 25) & 0x7
-                if category == 0b101:
-                    mnemonic, cycles = self._execute_branch(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b01:
-                    mnemonic, cycles = self._execute_load_store(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b00:
-                    mnemonic, cycles = self._execute_data_processing(opcode, current_pc)
-                else:
-                    raise DecodeError(f"Unsupported ARM opcode 0x{opcode:08X}", pc=current_pc)
-        except Exception as exc:
-            self.halted = True
-            self.last_error = str(exc)
-            if isinstance(exc, ExecutionError):
-                raise
-            raise ExecutionError(str(exc), pc=current_pc) from exc
-
+        steps = tuple((ins.handler, ins, ins.cond) for ins in body)
+        branch_cond = ins.cond
+        condition_passed = self._condition_passed
+
+        def run(iterations: int) -> tuple[int, bool]:
+            done = 0
+            while done < iterations:
+                for handler, current, cond in steps:
+                    if cond == COND_ALWAYS or condition_passed(cond):
+                        handler(current)
+                done += 1
+                if branch_cond != COND_ALWAYS and not condition_passed(branch_cond):
+                    return done, True
+            return done, False
+
+        return ArmLoop(start=start_pc, exit_pc=(ins.address + 4) & 0xFFFFFFFF, length=len(body) + 1, run=run)
+
+    def _cycles_until_interrupt(self) -> int | None:
+        """Cycles that can elapse before an IRQ must be taken, or None when none can arrive."""
+        if self._arm_interrupt_stack:
+            return None
+        timer_ctrl = self._read_mmio32(_ARM_TIMER_CTRL)
+        irq_enabled = bool(timer_ctrl & _ARM_TIMER_CTRL_IRQ_ENABLE)
+        if (irq_enabled and self._read_mmio32(_ARM_TIMER_PENDING)) or (
+            self._read_mmio32(_ARM_GPIO_IRQ_ENABLE) & self._read_mmio32(_ARM_GPIO_IRQ_PENDING)
+        ):
+            return 0
+        if not irq_enabled or not timer_ctrl & _ARM_TIMER_CTRL_ENABLE:
+            return None
+        load = self._read_mmio32(_ARM_TIMER_LOAD)
+        value = self._read_mmio32(_ARM_TIMER_VALUE) or load
+        return value if load > 0 else None
+
+    def _try_fast_register_loop(self, *, max_steps: int, max_cycles: int) -> dict | None:
+        start_pc = self.pc
+        if start_pc in self._loops:
+            loop = self._loops[start_pc]
+        else:
+            loop = self._loops[start_pc] = self._compile_loop(start_pc)
+        if loop is None:
+            return None
+        # A taken closing branch costs 3 cycles and every other instruction 1; the exit iteration is 2 cheaper.
+        iteration_cycles = loop.length + 2
+        iterations = min(int(max_steps) // loop.length, int(max_cycles) // iteration_cycles)
+        deadline = self._cycles_until_interrupt()
+        if deadline is not None:
+            # Stay strictly before the tick that would raise the IRQ so it is taken at the right instruction.
+            iterations = min(iterations, (deadline - 1) // iteration_cycles)
+        if iterations <= 0:
+            return None
+        done, exited = loop.run(iterations)
+        cycles = done * iteration_cycles - (2 if exited else 0)
+        self._set_pc(loop.exit_pc if exited else loop.start)
         self.cycles += cycles
-        self._tick_peripherals(cycles)
-        changes = self.memory.consume_changes()
-        registers_after = self._debug_registers()
-        line = self.program.address_to_line.get(current_pc) if self.program else None
-        text = self._listing_text_by_address.get(current_pc) if self.program else None
-        trace = TraceEntry(
-            pc=current_pc,
-            opcode=opcode,
-            mnemonic=mnemonic,
-            bytes_=list(int(opcode & 0xFFFFFFFF).to_bytes(4, self.endian, signed=False)),
-            cycles=cycles,
-            line=line,
-            text=text,
-            changes=changes,
-            register_diff=self._register_diff(registers_before, registers_after),
-            interrupt=self.last_interrupt,
-        )
-        self._record_trace(trace)
+        timer_running = bool(self._read_mmio32(_ARM_TIMER_CTRL) & _ARM_TIMER_CTRL_ENABLE)
+        if timer_running:
+            self._tick_peripherals(cycles)
+        self.last_interrupt = None
         if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
             self.halted = True
-        return trace
+        return {"steps": done * loop.length, "cycles": cycles, "hardware_sync": timer_running}
 
-    def _step_impl_compact(self) -> TraceEntry:
-        if self.halted:
-            raise ExecutionError("CPU halted", pc=self.pc)
-        self.last_interrupt = self._maybe_take_interrupt()
-        current_pc = self.pc
-        opcode = self.memory.read32(current_pc, space="code", endian=self.endian)
-        self._set_pc((current_pc + 4) & 0xFFFFFFFF)
-        mnemonic = f".word 0x{opcode:08X}"
-        cycles = 1
-        try:
-            cond = (opcode >> 28) & 0xF
-            if not self._condition_passed(cond):
-                mnemonic = f"SKIP.{COND_NAMES.get(cond, '??')}"
-            elif (opcode & 0x0FFFFFF0) == 0x012FFF10:
-                mnemonic, cycles = self._execute_bx(opcode, current_pc)
-            elif self._is_multiply_long_opcode(opcode):
-                mnemonic, cycles = self._execute_multiply_long(opcode, current_pc)
-            else:
-                category = (opcode >> 25) & 0x7
-                if category == 0b101:
-                    mnemonic, cycles = self._execute_branch(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b01:
-                    mnemonic, cycles = self._execute_load_store(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b00:
-                    mnemonic, cycles = self._execute_data_processing(opcode, current_pc)
-                else:
-                    raise DecodeError(f"Unsupported ARM opcode 0x{opcode:08X}", pc=current_pc)
-        except Exception as exc:
-            self.halted = True
-            self.last_error = str(exc)
-            if isinstance(exc, ExecutionError):
-                raise
-            raise ExecutionError(str(exc), pc=current_pc) from exc
+    def try_fast_realtime_slice(self, *, max_steps: int, max_cycles: int) -> dict | None:
+        if not self.compact_execution_allowed() or max_steps <= 0 or max_cycles <= 0 or self.halted:
+            return None
+        if self._tight_loop_fast_path_allowed():
+            fast = self._try_fast_subs_bne_loop(max_steps=max_steps, max_cycles=max_cycles) or self._try_fast_branch_self(
+                max_steps=max_steps,
+                max_cycles=max_cycles,
+            )
+            if fast:
+                return fast
+        return self._try_fast_register_loop(max_steps=max_steps, max_cycles=max_cycles)
 
-        self.cycles += cycles
-        self._tick_peripherals(cycles)
-        changes = self.memory.consume_changes()
-        if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
-            self.halted = True
-        return TraceEntry(
-            pc=current_pc,
-            opcode=opcode,
-            mnemonic=mnemonic,
-            bytes_=list(int(opcode & 0xFFFFFFFF).to_bytes(4, self.endian, signed=False)),
-            cycles=cycles,
-            line=self.program.address_to_line.get(current_pc) if self.program else None,
-            text=self._listing_text_by_address.get(current_pc) if self.program else None,
-            changes=changes,
-            register_diff={},
-            interrupt=self.last_interrupt,
-        )
+    def _step_impl(self) -> TraceEntry:
+        return self._step_core(CAPTURE_FULL)
 
-    def step_compact_payload(self) -> dict:
+    def _step_core(self, capture: str) -> TraceEntry | dict | None:
         if self.halted:
             raise ExecutionError("CPU halted", pc=self.pc)
         self.last_interrupt = self._maybe_take_interrupt()
         current_pc = self.pc
-        opcode = self.memory.read32(current_pc, space="code", endian=self.endian)
+        full = capture == CAPTURE_FULL
+        registers_before = self._debug_registers() if full else None
+        decoded = self._decode_at(current_pc)
         self._set_pc((current_pc + 4) & 0xFFFFFFFF)
-        mnemonic = f".word 0x{opcode:08X}"
-        cycles = 1
-        try:
-            cond = (opcode >> 28) & 0xF
-            if not self._condition_passed(cond):
-                mnemonic = f"SKIP.{COND_NAMES.get(cond, '??')}"
-            elif (opcode & 0x0FFFFFF0) == 0x012FFF10:
-                mnemonic, cycles = self._execute_bx(opcode, current_pc)
-            elif self._is_multiply_long_opcode(opcode):
-                mnemonic, cycles = self._execute_multiply_long(opcode, current_pc)
-            else:
-                category = (opcode >> 25) & 0x7
-                if category == 0b101:
-                    mnemonic, cycles = self._execute_branch(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b01:
-                    mnemonic, cycles = self._execute_load_store(opcode, current_pc)
-                elif ((opcode >> 26) & 0x3) == 0b00:
-                    mnemonic, cycles = self._execute_data_processing(opcode, current_pc)
-                else:
-                    raise DecodeError(f"Unsupported ARM opcode 0x{opcode:08X}", pc=current_pc)
-        except Exception as exc:
-            self.halted = True
-            self.last_error = str(exc)
-            if isinstance(exc, ExecutionError):
-                raise
-            raise ExecutionError(str(exc), pc=current_pc) from exc
+        if decoded.cond != COND_ALWAYS and not self._condition_passed(decoded.cond):
+            mnemonic = decoded.skip_mnemonic
+            cycles = 1
+        else:
+            try:
+                mnemonic = decoded.handler(decoded) or decoded.mnemonic
+            except Exception as exc:
+                self.halted = True
+                self.last_error = str(exc)
+                if isinstance(exc, ExecutionError):
+                    raise
+                raise ExecutionError(str(exc), pc=current_pc) from exc
+            cycles = decoded.cycles
 
         self.cycles += cycles
         self._tick_peripherals(cycles)
-        changes = self.memory.consume_changes()
+        if capture == CAPTURE_COUNTERS:
+            self.memory.skip_changes()
+            trace = None
+        elif full:
+            trace = TraceEntry(
+                pc=current_pc,
+                opcode=decoded.opcode,
+                mnemonic=mnemonic,
+                bytes_=decoded.bytes_,
+                cycles=cycles,
+                line=self.program.address_to_line.get(current_pc) if self.program else None,
+                text=self._listing_text_by_address.get(current_pc) if self.program else None,
+                changes=self.memory.consume_changes(),
+                register_diff=self._register_diff(registers_before, self._debug_registers()),
+                interrupt=self.last_interrupt,
+            )
+            self._record_trace(trace)
+        else:
+            trace = self._compact_capture(capture, current_pc, decoded.opcode, mnemonic, decoded.bytes_, cycles)
         if self.program and self.pc >= (self.program.origin + len(self.program.binary)):
             self.halted = True
+        return trace
+
+    def _snapshot_memory_limits(self) -> dict[str, int]:
         return {
-            "pc": current_pc,
-            "opcode": opcode,
-            "mnemonic": mnemonic,
-            "bytes": list(int(opcode & 0xFFFFFFFF).to_bytes(4, self.endian, signed=False)),
-            "cycles": cycles,
-            "line": self.program.address_to_line.get(current_pc) if self.program else None,
-            "text": self._listing_text_by_address.get(current_pc) if self.program else None,
-            "changes": changes,
-            "interrupt": self.last_interrupt,
+            "code": self.program.origin + len(self.program.binary) if self.program else 0x100,
+            "xram": 0x40,
         }
 
-    def snapshot(self) -> dict:
+    def snapshot(self, *, include_memory: bool = True, include_trace: bool = True) -> dict:
         return {
             "registers": self._debug_registers(),
             "flags": self._flags_dict(),
@@ -917,31 +885,34 @@ class CPUARM(BaseCPU):
             "last_error": self.last_error,
             "last_interrupt": self.last_interrupt,
             "endian": self.endian,
-            "iram": {},
-            "sfr": {},
-            "rom": self.memory.dump_rom(self.program.origin + len(self.program.binary) if self.program else 0x100),
-            "xram_sample": {idx: self.memory.read_xram(idx) for idx in range(0x40)},
+            **(
+                {
+                    "iram": {},
+                    "sfr": {},
+                    "rom": self.memory.dump_rom(self.program.origin + len(self.program.binary) if self.program else 0x100),
+                    "xram_sample": {idx: self.memory.read_xram(idx) for idx in range(0x40)},
+                }
+                if include_memory
+                else {}
+            ),
             "gpio_regs": self._gpio_regs(),
             "breakpoints": [
-                {"pc": breakpoint.pc, "condition": breakpoint.condition, "enabled": breakpoint.enabled}
-                for breakpoint in self.debugger.breakpoints.values()
-            ],
-            "watchpoints": [{"space": wp.space, "target": wp.target} for wp in self.debugger.watchpoints if wp.enabled],
-            "call_stack": self.debugger.call_stack[:],
-            "trace": [
                 {
-                    "pc": item.pc,
-                    "opcode": item.opcode,
-                    "mnemonic": item.mnemonic,
-                    "bytes": item.bytes_,
-                    "cycles": item.cycles,
-                    "line": item.line,
-                    "text": item.text,
-                    "register_diff": item.register_diff,
-                    "interrupt": item.interrupt,
+                    "pc": breakpoint.pc,
+                    "condition": breakpoint.condition,
+                    "enabled": breakpoint.enabled,
+                    "ignore_count": breakpoint.ignore_count,
+                    "hit_count": breakpoint.hit_count,
                 }
-                for item in self.debugger.trace
+                for breakpoint in self.debugger.breakpoints.values()
+            ],
+            "watchpoints": [
+                {"space": wp.space, "target": wp.target, "end": wp.end, "access": wp.access, "equals": wp.equals, "crosses": wp.crosses}
+                for wp in self.debugger.watchpoints
+                if wp.enabled
             ],
+            "call_stack": self.debugger.call_stack[:],
+            **({"trace": [self._trace_payload(item) for item in self.debugger.trace]} if include_trace else {}),
             "history_depth": len(self.debugger.history),
             "serial": {"tx": [], "rx_pending": []},
             "timers": {
@@ -1055,11 +1026,21 @@ class CPUARM(BaseCPU):
                         "pc": breakpoint.pc,
                         "condition": breakpoint.condition,
                         "enabled": breakpoint.enabled,
+                        "ignore_count": breakpoint.ignore_count,
+                        "hit_count": breakpoint.hit_count,
                     }
                     for breakpoint in self.debugger.breakpoints.values()
                 ],
                 "watchpoints": [
-                    {"space": wp.space, "target": wp.target, "enabled": wp.enabled}
+                    {
+                        "space": wp.space,
+                        "target": wp.target,
+                        "enabled": wp.enabled,
+                        "end": wp.end,
+                        "access": wp.access,
+                        "equals": wp.equals,
+                        "crosses": wp.crosses,
+                    }
                     for wp in self.debugger.watchpoints
                 ],
                 "trace": [
@@ -1077,35 +1058,9 @@ class CPUARM(BaseCPU):
                     }
                     for item in self.debugger.trace
                 ],
-                "history": [
-                    {
-                        "trace": {
-                            "pc": item.trace.pc,
-                            "opcode": item.trace.opcode,
-                            "mnemonic": item.trace.mnemonic,
-                            "bytes": item.trace.bytes_,
-                            "cycles": item.trace.cycles,
-                            "line": item.trace.line,
-                            "text": item.trace.text,
-                            "changes": item.trace.changes,
-                            "register_diff": item.trace.register_diff,
-                            "interrupt": item.trace.interrupt,
-                        },
-                        "cycles_before": item.cycles_before,
-                        "cycles_after": item.cycles_after,
-                        "halted_before": item.halted_before,
-                        "halted_after": item.halted_after,
-                        "last_error_before": item.last_error_before,
-                        "last_error_after": item.last_error_after,
-                        "last_interrupt_before": item.last_interrupt_before,
-                        "last_interrupt_after": item.last_interrupt_after,
-                        "call_stack_before": item.call_stack_before,
-                        "call_stack_after": item.call_stack_after,
-                        "extra_before": item.extra_before,
-                        "extra_after": item.extra_after,
-                    }
-                    for item in self.debugger.history
-                ],
+                "history": self._export_history(),
+                "trace_sequence": self.debugger.trace_sequence,
+                "trace_generation": self.debugger.trace_generation,
             },
         }
 
@@ -1169,6 +1124,10 @@ class CPUARM(BaseCPU):
                     target=item.get("target", item.get("address")),
                     space=item.get("space", "xram"),
                     enabled=bool(item.get("enabled", True)),
+                    end=item.get("end"),
+                    access=item.get("access", "write"),
+                    equals=item.get("equals"),
+                    crosses=item.get("crosses"),
                 )
                 for item in debugger.get("watchpoints", [])
             ]
@@ -1189,37 +1148,9 @@ class CPUARM(BaseCPU):
                     interrupt=item.get("interrupt"),
                 )
             )
-        self.debugger.history.clear()
-        for item in debugger.get("history", []):
-            trace = dict(item.get("trace", {}))
-            self.debugger.history.append(
-                ReverseDelta(
-                    trace=TraceEntry(
-                        pc=int(trace["pc"]),
-                        opcode=int(trace["opcode"]),
-                        mnemonic=str(trace["mnemonic"]),
-                        bytes_=[int(value) for value in trace.get("bytes", [])],
-                        cycles=int(trace.get("cycles", 0)),
-                        line=trace.get("line"),
-                        text=trace.get("text"),
-                        changes={key: [tuple(change) for change in value] for key, value in dict(trace.get("changes", {})).items()},
-                        register_diff={key: dict(value) for key, value in dict(trace.get("register_diff", {})).items()},
-                        interrupt=trace.get("interrupt"),
-                    ),
-                    cycles_before=int(item.get("cycles_before", 0)),
-                    cycles_after=int(item.get("cycles_after", 0)),
-                    halted_before=bool(item.get("halted_before", False)),
-                    halted_after=bool(item.get("halted_after", False)),
-                    last_error_before=item.get("last_error_before"),
-                    last_error_after=item.get("last_error_after"),
-                    last_interrupt_before=item.get("last_interrupt_before"),
-                    last_interrupt_after=item.get("last_interrupt_after"),
-                    call_stack_before=[int(value) for value in item.get("call_stack_before", [])],
-                    call_stack_after=[int(value) for value in item.get("call_stack_after", [])],
-                    extra_before=dict(item.get("extra_before", {})),
-                    extra_after=dict(item.get("extra_after", {})),
-                )
-            )
+        self.debugger.trace_sequence = int(debugger.get("trace_sequence", len(self.debugger.trace)))
+        self.debugger.trace_generation = int(debugger.get("trace_generation", 0))
+        self._import_history(debugger.get("history"))
 
     def _restore_register_values(self, values: dict[str, int]) -> None:
         aliases = {"SP": 13, "LR": 14, "PC": 15}
@@ -1623,7 +1623,7 @@ def apply_hardware_inputs(session: Any, hardware: VirtualHardwareManager, previo
                 bit = int(pin_name.split(".", 1)[1])
                 if level:
                     value |= 1 << bit
-            session.cpu.memory.write32(_ARM_GPIO_IN, value, space="xram", endian=session.endian)
+            session.cpu.memory.write_xram32(_ARM_GPIO_IN, value, session.endian)
         return bindings
     for pin_name in previous.keys() - bindings.keys():
         if not pin_name.startswith("P") or "." not in pin_name:
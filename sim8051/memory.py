@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import secrets
+import weakref
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import Callable, Iterable, Literal
 
 from .exceptions import MemoryAccessError
 
@@ -11,6 +14,7 @@ MemorySpace = Literal["code", "xram", "direct", "indirect", "sfr"]
 # ARM virtual GPIO block (mirrors the low XRAM region used by the simplified GPIO model).
 GPIOA_MMIO_BASE = 0x40000000
 GPIOA_MMIO_SIZE = 0x40
+SNAPSHOT_PAGE_SIZE = 0x100
 
 BIT_ADDRESSABLE_SFRS = {0x80, 0x88, 0x90, 0x98, 0xA0, 0xA8, 0xB0, 0xB8, 0xC8, 0xD0, 0xE0, 0xF0}
 
@@ -107,37 +111,226 @@ BIT_ALIASES["EI.7"] = BIT_ALIASES["IE.7"]
 BIT_ALIASES["EI.1"] = BIT_ALIASES["IE.1"]
 
 
-@dataclass
 class PortState:
-    latch: int = 0xFF
-    external_mask: int = 0x00
-    external_value: int = 0xFF
-    open_drain: bool = False
+    """Port latch plus externally driven pins; the resolved pin byte is kept up to date on every change."""
+
+    __slots__ = ("_latch", "_external_mask", "_external_value", "_pin", "open_drain")
+
+    def __init__(
+        self,
+        latch: int = 0xFF,
+        external_mask: int = 0x00,
+        external_value: int = 0xFF,
+        open_drain: bool = False,
+    ) -> None:
+        self._latch = latch & 0xFF
+        self._external_mask = external_mask & 0xFF
+        self._external_value = external_value & 0xFF
+        self.open_drain = open_drain
+        self._resolve()
+
+    @property
+    def latch(self) -> int:
+        return self._latch
+
+    @latch.setter
+    def latch(self, value: int) -> None:
+        self._latch = value & 0xFF
+        self._resolve()
+
+    @property
+    def external_mask(self) -> int:
+        return self._external_mask
+
+    @external_mask.setter
+    def external_mask(self, value: int) -> None:
+        self._external_mask = value & 0xFF
+        self._resolve()
+
+    @property
+    def external_value(self) -> int:
+        return self._external_value
+
+    @external_value.setter
+    def external_value(self, value: int) -> None:
+        self._external_value = value & 0xFF
+        self._resolve()
+
+    def _resolve(self) -> None:
+        driven = self._external_mask
+        self._pin = (self._external_value & driven) | (self._latch & ~driven & 0xFF)
 
     def read_pin(self) -> int:
-        value = 0
-        for bit in range(8):
-            mask = 1 << bit
-            if self.external_mask & mask:
-                bit_value = 1 if self.external_value & mask else 0
-            elif self.latch & mask:
-                bit_value = 1
-            else:
-                bit_value = 0
-            value |= bit_value << bit
-        return value & 0xFF
+        return self._pin
+
+    def read_pin_bit(self, bit: int) -> int:
+        return (self._pin >> bit) & 0x01
 
     def set_input(self, bit: int, level: int | bool | None) -> None:
         mask = 1 << bit
         if level is None:
-            self.external_mask &= ~mask & 0xFF
-            self.external_value |= mask
-            return
-        self.external_mask |= mask
-        if level:
-            self.external_value |= mask
+            self._external_mask &= ~mask & 0xFF
+            self._external_value |= mask
         else:
-            self.external_value &= ~mask & 0xFF
+            self._external_mask |= mask
+            if level:
+                self._external_value |= mask
+            else:
+                self._external_value &= ~mask & 0xFF
+        self._resolve()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PortState):
+            return NotImplemented
+        return (self._latch, self._external_mask, self._external_value, self.open_drain) == (
+            other._latch,
+            other._external_mask,
+            other._external_value,
+            other.open_drain,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PortState(latch={self._latch}, external_mask={self._external_mask}, "
+            f"external_value={self._external_value}, open_drain={self.open_drain})"
+        )
+
+
+CHANGE_SPACES = ("iram", "sfr", "xram", "code")
+
+
+class ChangeJournal:
+    """Ring of write records addressed by absolute sequence numbers.
+
+    Slot ``sequence & mask`` holds the space name in ``spaces`` and the ``(address, old, new)`` entry
+    in ``entries``. Records below the consume cursor are overwritten once the ring fills up; views
+    that still refer to them copy their records out first, and the ring doubles instead when most
+    of it is unconsumed.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.head = 0
+        self.cursor = 0
+        self.floor = 0
+        self.mask = capacity - 1
+        self.spaces: list[str | None] = [None] * capacity
+        self.entries: list[tuple[int, int, int] | None] = [None] * capacity
+        self._views: list[weakref.ref[ChangeView]] = []
+
+    def consume(self) -> ChangeView:
+        start = self.cursor
+        if start == self.head:
+            return _NO_CHANGES
+        self.cursor = self.head
+        return self._track(ChangeView(self, start, self.head))
+
+    def discard_pending(self) -> None:
+        self.cursor = self.head
+
+    def open_window(self) -> ChangeView:
+        return self._track(ChangeView(self, self.cursor, None))
+
+    def copy_into(self, payload: dict[str, list[tuple[int, int, int]]], start: int, end: int) -> None:
+        if start >= end:
+            return
+        mask = self.mask
+        spaces = self.spaces
+        entries = self.entries
+        columns: dict[str, list[tuple[int, int, int]]] = {space: [] for space in CHANGE_SPACES}
+        for sequence in range(start, end):
+            index = sequence & mask
+            columns[spaces[index]].append(entries[index])
+        for space, values in columns.items():
+            if values:
+                payload.setdefault(space, []).extend(values)
+
+    def _track(self, view: ChangeView) -> ChangeView:
+        self._views.append(weakref.ref(view))
+        return view
+
+    def reclaim(self) -> None:
+        capacity = self.mask + 1
+        if (self.head - self.cursor) * 2 > capacity:
+            self._grow(capacity * 2)
+            return
+        live: list[weakref.ref[ChangeView]] = []
+        for reference in self._views:
+            view = reference()
+            if view is not None:
+                view._materialize()
+                if view._journal is not None:
+                    live.append(reference)
+        self._views = live
+        self.floor = self.cursor
+
+    def _grow(self, capacity: int) -> None:
+        old_mask = self.mask
+        old_spaces = self.spaces
+        old_entries = self.entries
+        self.mask = capacity - 1
+        self.spaces = [None] * capacity
+        self.entries = [None] * capacity
+        for sequence in range(self.floor, self.head):
+            self.spaces[sequence & self.mask] = old_spaces[sequence & old_mask]
+            self.entries[sequence & self.mask] = old_entries[sequence & old_mask]
+
+
+class ChangeView(Mapping):
+    """Read-only ``{space: [(address, old, new), ...]}`` mapping over a journal range.
+
+    Records are only copied into lists when the view is first read. A view opened with
+    ``ChangeJournal.open_window`` keeps growing with each consume until ``close`` is called.
+    """
+
+    __slots__ = ("_journal", "start", "end", "_payload", "__weakref__")
+
+    def __init__(self, journal: ChangeJournal | None, start: int, end: int | None) -> None:
+        self._journal = journal
+        self.start = start
+        self.end = end
+        self._payload: dict[str, list[tuple[int, int, int]]] = {}
+
+    def _materialize(self) -> dict[str, list[tuple[int, int, int]]]:
+        journal = self._journal
+        if journal is not None:
+            end = journal.cursor if self.end is None else self.end
+            journal.copy_into(self._payload, self.start, end)
+            self.start = end
+            if self.end is not None:
+                self._journal = None
+        return self._payload
+
+    def close(self) -> dict[str, list[tuple[int, int, int]]]:
+        journal = self._journal
+        if journal is not None and self.end is None:
+            self.end = journal.cursor
+        return self.to_dict()
+
+    def to_dict(self) -> dict[str, list[tuple[int, int, int]]]:
+        return dict(self._materialize())
+
+    def __bool__(self) -> bool:
+        if self._payload:
+            return True
+        journal = self._journal
+        if journal is None:
+            return False
+        return (journal.cursor if self.end is None else self.end) > self.start
+
+    def __getitem__(self, space: str) -> list[tuple[int, int, int]]:
+        return self._materialize()[space]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._materialize())
+
+    def __len__(self) -> int:
+        return len(self._materialize())
+
+    def __repr__(self) -> str:
+        return repr(self._materialize())
+
+
+_NO_CHANGES = ChangeView(None, 0, 0)
 
 
 @dataclass
@@ -164,7 +357,20 @@ class MemoryMap:
             0xA0: PortState(),
             0xB0: PortState(),
         }
-        self._changes: dict[str, list[tuple[int, int, int]]] = {"iram": [], "sfr": [], "xram": [], "code": []}
+        self._journal = ChangeJournal()
+        self._code_write_listeners: list[Callable[[int, int], None]] = []
+        self._sfr_read_listeners: dict[int, Callable[[int], None]] = {}
+        self._sfr_write_listeners: dict[int, Callable[[int], None]] = {}
+        # (space, address) -> [(mask, shift, equals, crosses, watchpoint)]; hits collect until the CPU drains them.
+        self._watch_writes: dict[tuple[str, int], list[tuple[int, int, int | None, int | None, object]]] = {}
+        self._watch_reads: dict[tuple[str, int], list[tuple[int, int, int | None, int | None, object]]] = {}
+        self.watch_hits: list[tuple[object, str, int, int, int]] = []
+        # Snapshot pages are versioned lazily: each snapshot compares the regions against the bytes sent last
+        # time and stamps changed pages with a new version, so the write path pays nothing for it.
+        self.snapshot_epoch = secrets.token_hex(4)
+        self.snapshot_version = 0
+        self._snapshot_pages: dict[str, list[int]] = {}
+        self._snapshot_shadow: dict[str, bytes] = {}
         self.reset()
 
     def reset(self) -> None:
@@ -180,7 +386,81 @@ class MemoryMap:
             port.external_value = 0xFF
             self.sfr[address - 0x80] = 0xFF
         self.write_direct(0x81, 0x07)
-        self._changes = {"iram": [], "sfr": [], "xram": [], "code": []}
+        self._journal.discard_pending()
+        self._notify_code_write(0, len(self.rom))
+
+    def add_code_write_listener(self, listener: Callable[[int, int], None]) -> None:
+        self._code_write_listeners.append(listener)
+
+    def add_sfr_read_listener(self, addresses: Iterable[int], listener: Callable[[int], None]) -> None:
+        for address in addresses:
+            self._sfr_read_listeners[address & 0xFF] = listener
+
+    def add_sfr_write_listener(self, addresses: Iterable[int], listener: Callable[[int], None]) -> None:
+        for address in addresses:
+            self._sfr_write_listeners[address & 0xFF] = listener
+
+    def set_watchpoints(self, watchpoints: Iterable[object]) -> None:
+        self._watch_writes.clear()
+        self._watch_reads.clear()
+        self.watch_hits.clear()
+        for watch in watchpoints:
+            space = str(watch.space)
+            start = int(watch.target)
+            end = start if watch.end is None else max(start, int(watch.end))
+            for address in range(start, end + 1):
+                if space == "bit":
+                    byte_address, bit, byte_space = self._decode_bit_address(address)
+                    key, mask, shift = (byte_space, byte_address), 1 << bit, bit
+                else:
+                    key, mask, shift = (space, address), 0xFF, 0
+                entry = (mask, shift, watch.equals, watch.crosses, watch)
+                if watch.access in {"write", "access"}:
+                    self._watch_writes.setdefault(key, []).append(entry)
+                if watch.access in {"read", "access"}:
+                    self._watch_reads.setdefault(key, []).append(entry)
+
+    @property
+    def has_watchpoints(self) -> bool:
+        return bool(self._watch_writes or self._watch_reads)
+
+    @property
+    def watching_reads(self) -> bool:
+        return bool(self._watch_reads)
+
+    def is_watched(self, space: str, address: int) -> bool:
+        key = (space, address)
+        return key in self._watch_writes or key in self._watch_reads
+
+    def _check_write_watch(self, space: str, address: int, old: int, new: int) -> None:
+        entries = self._watch_writes.get((space, address))
+        if entries is None:
+            return
+        for mask, shift, equals, crosses, watch in entries:
+            if not (old ^ new) & mask:
+                continue
+            before = (old & mask) >> shift
+            after = (new & mask) >> shift
+            if equals is not None and after != equals:
+                continue
+            if crosses is not None and (before < crosses) == (after < crosses):
+                continue
+            self.watch_hits.append((watch, space, address, old & 0xFF, new & 0xFF))
+
+    def _observe_read(self, space: str, address: int, value: int, read_mask: int = 0xFF) -> None:
+        entries = self._watch_reads.get((space, address))
+        if entries is None:
+            return
+        for mask, shift, equals, _crosses, watch in entries:
+            if not mask & read_mask:
+                continue
+            if equals is not None and (value & mask) >> shift != equals:
+                continue
+            self.watch_hits.append((watch, space, address, value & 0xFF, value & 0xFF))
+
+    def _notify_code_write(self, start: int, end: int) -> None:
+        for listener in self._code_write_listeners:
+            listener(start, end)
 
     def load_rom(self, start: int, data: bytes | bytearray) -> None:
         end = start + len(data)
@@ -193,6 +473,7 @@ class MemoryMap:
             self.rom[address] = new
             if old != new:
                 self._record_change("code", address, old, new)
+        self._notify_code_write(start, end)
 
     def read_code(self, address: int) -> int:
         if not 0 <= address < self.code_size:
@@ -265,6 +546,42 @@ class MemoryMap:
         for offset, byte in enumerate(bytes_):
             self.write8(address + offset, byte, space=space)
 
+    # Word-wide accessors for the ARM core: one slice and `int.from_bytes` when the word sits inside a single
+    # region, otherwise (and while read watchpoints need per-byte observation) the byte-wise path above.
+    def read_code32(self, address: int, endian: Endian = "little") -> int:
+        if 0 <= address <= self.code_size - 4:
+            return int.from_bytes(self.rom[address : address + 4], endian)
+        return self.read32(address, space="code", endian=endian)
+
+    def _xram_word_offset(self, address: int) -> int | None:
+        address &= 0xFFFFFFFF
+        if GPIOA_MMIO_BASE <= address <= GPIOA_MMIO_BASE + GPIOA_MMIO_SIZE - 4:
+            return address - GPIOA_MMIO_BASE
+        if address <= self.xram_size - 4:
+            return address
+        return None
+
+    def read_xram32(self, address: int, endian: Endian = "little") -> int:
+        offset = None if self._watch_reads else self._xram_word_offset(address)
+        if offset is None:
+            return self.read32(address, space="xram", endian=endian)
+        return int.from_bytes(self.xram[offset : offset + 4], endian)
+
+    def write_xram32(self, address: int, value: int, endian: Endian = "little") -> None:
+        offset = self._xram_word_offset(address)
+        if offset is None:
+            self.write32(address, value, space="xram", endian=endian)
+            return
+        data = (value & 0xFFFFFFFF).to_bytes(4, endian)
+        xram = self.xram
+        if xram[offset : offset + 4] == data:
+            return
+        for index, new in enumerate(data, offset):
+            old = xram[index]
+            if old != new:
+                xram[index] = new
+                self._record_change("xram", index, old, new)
+
     def _normalize_xram_address(self, address: int) -> int:
         address &= 0xFFFFFFFF
         if GPIOA_MMIO_BASE <= address < GPIOA_MMIO_BASE + GPIOA_MMIO_SIZE:
@@ -275,6 +592,8 @@ class MemoryMap:
 
     def read_xram(self, address: int) -> int:
         address = self._normalize_xram_address(address)
+        if self._watch_reads:
+            self._observe_read("xram", address, self.xram[address])
         return self.xram[address]
 
     def write_xram(self, address: int, value: int) -> None:
@@ -288,10 +607,16 @@ class MemoryMap:
     def read_direct(self, address: int, *, rmw: bool = False) -> int:
         address &= 0xFF
         if address < 0x80:
+            if self._watch_reads and not rmw:
+                self._observe_read("iram", address, self.iram_low[address])
             return self.iram_low[address]
-        if address in self.ports and not rmw:
-            return self.ports[address].read_pin()
-        return self.sfr[address - 0x80]
+        listener = self._sfr_read_listeners.get(address)
+        if listener is not None:
+            listener(address)
+        value = self.ports[address].read_pin() if address in self.ports and not rmw else self.sfr[address - 0x80]
+        if self._watch_reads and not rmw:
+            self._observe_read("sfr", address, value)
+        return value
 
     def write_direct(self, address: int, value: int) -> None:
         address &= 0xFF
@@ -302,6 +627,9 @@ class MemoryMap:
             if old != value:
                 self._record_change("iram", address, old, value)
             return
+        listener = self._sfr_write_listeners.get(address)
+        if listener is not None:
+            listener(address)
         old = self.sfr[address - 0x80]
         self.sfr[address - 0x80] = value
         if address in self.ports:
@@ -312,10 +640,14 @@ class MemoryMap:
     def read_indirect(self, address: int) -> int:
         address &= 0xFF
         if address < 0x80:
-            return self.iram_low[address]
-        if not self.upper_iram_enabled:
+            value = self.iram_low[address]
+        elif not self.upper_iram_enabled:
             raise MemoryAccessError(f"Indirect IRAM address 0x{address:02X} is not available on this target")
-        return self.iram_high[address - 0x80]
+        else:
+            value = self.iram_high[address - 0x80]
+        if self._watch_reads:
+            self._observe_read("iram", address, value)
+        return value
 
     def write_indirect(self, address: int, value: int) -> None:
         address &= 0xFF
@@ -382,6 +714,8 @@ class MemoryMap:
     def read_bit(self, bit_address: int) -> int:
         byte_address, bit, space = self._decode_bit_address(bit_address)
         source = self.read_direct(byte_address, rmw=(space == "sfr")) if space == "sfr" else self.iram_low[byte_address]
+        if self._watch_reads:
+            self._observe_read(space, byte_address, source, 1 << bit)
         return (source >> bit) & 0x01
 
     def write_bit(self, bit_address: int, value: int | bool) -> None:
@@ -410,19 +744,60 @@ class MemoryMap:
         self.write_direct(address, new_value)
 
     def _record_change(self, space: str, address: int, old: int, new: int) -> None:
-        self._changes[space].append((address, old & 0xFF, new & 0xFF))
+        journal = self._journal
+        head = journal.head
+        if head - journal.floor > journal.mask:
+            journal.reclaim()
+        index = head & journal.mask
+        journal.spaces[index] = space
+        journal.entries[index] = (address, old & 0xFF, new & 0xFF)
+        journal.head = head + 1
+        if self._watch_writes:
+            self._check_write_watch(space, address, old, new)
 
     def consume_changes(self) -> dict[str, list[tuple[int, int, int]]]:
-        if not any(self._changes.values()):
+        journal = self._journal
+        if journal.cursor == journal.head:
             return {}
-        payload = {}
-        for space, values in self._changes.items():
-            if not values:
-                continue
-            payload[space] = values[:]
-            values.clear()
+        payload: dict[str, list[tuple[int, int, int]]] = {}
+        journal.copy_into(payload, journal.cursor, journal.head)
+        journal.cursor = journal.head
         return payload
 
+    def consume_change_view(self) -> ChangeView:
+        return self._journal.consume()
+
+    def skip_changes(self) -> None:
+        # Pending records stay visible to open change windows; they are just not handed out one by one.
+        self._journal.discard_pending()
+
+    def open_change_window(self) -> ChangeView:
+        return self._journal.open_window()
+
+    def capture_checkpoint(self, previous: tuple | None = None) -> tuple:
+        # Unchanged regions share the previous checkpoint's bytes so mostly idle XRAM/ROM cost nothing.
+        regions = [bytes(self.rom), bytes(self.xram), bytes(self.iram_low), bytes(self.iram_high), bytes(self.sfr)]
+        if previous is not None:
+            regions = [old if old == new else new for old, new in zip(previous, regions)]
+        ports = tuple((port.latch, port.external_mask, port.external_value) for port in self.ports.values())
+        return (*regions, ports)
+
+    def restore_checkpoint(self, checkpoint: tuple) -> None:
+        rom, xram, iram_low, iram_high, sfr, ports = checkpoint
+        code_changed = self.rom != rom
+        self.rom[:] = rom
+        self.xram[:] = xram
+        self.iram_low[:] = iram_low
+        self.iram_high[:] = iram_high
+        self.sfr[:] = sfr
+        for port, (latch, external_mask, external_value) in zip(self.ports.values(), ports):
+            port.latch = latch
+            port.external_mask = external_mask
+            port.external_value = external_value
+        self._journal.discard_pending()
+        if code_changed:
+            self._notify_code_write(0, len(self.rom))
+
     def dump_iram(self) -> dict[int, int]:
         data = {addr: value for addr, value in enumerate(self.iram_low)}
         if self.upper_iram_enabled:
@@ -436,7 +811,70 @@ class MemoryMap:
         limit = len(self.rom) if size is None else min(size, len(self.rom))
         return {idx: self.rom[idx] for idx in range(limit)}
 
+    def _snapshot_region(self, space: str) -> bytearray:
+        if space == "iram":
+            return self.iram_low + self.iram_high
+        if space == "sfr":
+            return self.sfr
+        if space == "xram":
+            return self.xram
+        if space == "code":
+            return self.rom
+        raise MemoryAccessError(f"Unsupported memory space `{space}`")
+
+    def _refresh_snapshot_versions(self, limits: dict[str, int]) -> None:
+        bumped = False
+        for space, limit in limits.items():
+            current = self._snapshot_region(space)[: max(0, int(limit))]
+            shadow = self._snapshot_shadow.get(space)
+            if shadow is not None and shadow == current:
+                continue
+            if not bumped:
+                self.snapshot_version += 1
+                bumped = True
+            version = self.snapshot_version
+            page_count = -(-len(current) // SNAPSHOT_PAGE_SIZE)
+            if shadow is None or len(shadow) != len(current):
+                pages = [version] * page_count
+            else:
+                pages = self._snapshot_pages[space]
+                for index in range(page_count):
+                    start = index * SNAPSHOT_PAGE_SIZE
+                    end = start + SNAPSHOT_PAGE_SIZE
+                    if shadow[start:end] != current[start:end]:
+                        pages[index] = version
+            self._snapshot_pages[space] = pages
+            self._snapshot_shadow[space] = bytes(current)
+
+    def snapshot_regions(self, limits: dict[str, int], since: str | None = None) -> dict[str, object]:
+        """Hex pages of each region (clipped to `limits`) that changed after the `since` version token.
+
+        Tokens are `"<epoch>.<version>"`; a token from another memory map or a stale epoch returns every page.
+        """
+        self._refresh_snapshot_versions(limits)
+        epoch, _, raw_version = str(since or "").partition(".")
+        base = int(raw_version) if epoch == self.snapshot_epoch and raw_version.isdigit() else 0
+        if base > self.snapshot_version:
+            base = 0
+        regions: dict[str, object] = {}
+        for space in limits:
+            data = self._snapshot_shadow[space]
+            pages = [
+                [index * SNAPSHOT_PAGE_SIZE, data[index * SNAPSHOT_PAGE_SIZE : (index + 1) * SNAPSHOT_PAGE_SIZE].hex()]
+                for index, version in enumerate(self._snapshot_pages[space])
+                if version > base
+            ]
+            if pages:
+                regions[space] = {"base": 0x80 if space == "sfr" else 0, "size": len(data), "pages": pages}
+        return {
+            "version": f"{self.snapshot_epoch}.{self.snapshot_version}",
+            "full": base == 0,
+            "page_size": SNAPSHOT_PAGE_SIZE,
+            "regions": regions,
+        }
+
     def export_state(self) -> dict[str, object]:
+        self._refresh_snapshot_versions({space: len(shadow) for space, shadow in self._snapshot_shadow.items()})
         return {
             "code_size": self.code_size,
             "xram_size": self.xram_size,
@@ -455,6 +893,12 @@ class MemoryMap:
                 }
                 for address, port in self.ports.items()
             },
+            "snapshot_versions": {
+                "epoch": self.snapshot_epoch,
+                "version": self.snapshot_version,
+                "sizes": {space: len(shadow) for space, shadow in self._snapshot_shadow.items()},
+                "pages": {space: pages[:] for space, pages in self._snapshot_pages.items()},
+            },
         }
 
     def import_state(self, state: dict[str, object]) -> None:
@@ -480,4 +924,13 @@ class MemoryMap:
             port.external_mask = int(port_state.get("external_mask", 0x00)) & 0xFF
             port.external_value = int(port_state.get("external_value", 0xFF)) & 0xFF
             port.open_drain = bool(port_state.get("open_drain", port.open_drain))
-        self._changes = {"iram": [], "sfr": [], "xram": [], "code": []}
+        versions = state.get("snapshot_versions")
+        if isinstance(versions, dict):
+            # The exporter refreshed its versions first, so the imported bytes are exactly what was last stamped.
+            self.snapshot_epoch = str(versions.get("epoch", self.snapshot_epoch))
+            self.snapshot_version = int(versions.get("version", 0))
+            sizes = dict(versions.get("sizes", {}))
+            self._snapshot_shadow = {space: bytes(self._snapshot_region(space)[: int(size)]) for space, size in sizes.items()}
+            self._snapshot_pages = {space: [int(item) for item in pages] for space, pages in dict(versions.get("pages", {})).items()}
+        self._journal.discard_pending()
+        self._notify_code_write(0, len(self.rom))
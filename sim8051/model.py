@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Literal
+from typing import Any, Callable, Literal
 
 
 @dataclass
@@ -45,6 +45,10 @@ class Breakpoint:
     pc: int
     condition: str | None = None
     enabled: bool = True
+    ignore_count: int = 0
+    hit_count: int = 0
+    predicate: Callable[[], bool] | None = field(default=None, repr=False, compare=False)
+    last_hit_cycles: int | None = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -52,6 +56,10 @@ class Watchpoint:
     target: int | str
     space: Literal["iram", "sfr", "xram", "code", "bit", "register"] = "iram"
     enabled: bool = True
+    end: int | None = None
+    access: Literal["write", "read", "access"] = "write"
+    equals: int | None = None
+    crosses: int | None = None
 
 
 @dataclass
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+AJMP_OPCODES = {0x01, 0x21, 0x41, 0x61, 0x81, 0xA1, 0xC1, 0xE1}
+ACALL_OPCODES = {0x11, 0x31, 0x51, 0x71, 0x91, 0xB1, 0xD1, 0xF1}
+PAGE_BRANCH_OPCODES = AJMP_OPCODES | ACALL_OPCODES
+
+_THREE_BYTE_OPCODES = {0x02, 0x10, 0x12, 0x20, 0x30, 0x43, 0x53, 0x63, 0x75, 0x85, 0x90, 0xD5} | set(range(0xB4, 0xC0))
+_TWO_BYTE_OPCODES = (
+    PAGE_BRANCH_OPCODES
+    | {0x05, 0x15, 0x24, 0x25, 0x34, 0x35, 0x40, 0x42, 0x44, 0x45, 0x50, 0x52, 0x54, 0x55, 0x60, 0x62, 0x64, 0x65}
+    | {0x70, 0x72, 0x74, 0x76, 0x77, 0x80, 0x82, 0x86, 0x87, 0x92, 0x94, 0x95, 0xA0, 0xA2, 0xA6, 0xA7, 0xB0, 0xB2}
+    | {0xC0, 0xC2, 0xC5, 0xD0, 0xD2, 0xE5, 0xF5}
+    | set(range(0x78, 0x80))
+    | set(range(0x88, 0x90))
+    | set(range(0xA8, 0xB0))
+    | set(range(0xD8, 0xE0))
+)
+_TWO_CYCLE_OPCODES = (
+    PAGE_BRANCH_OPCODES
+    | {0x02, 0x10, 0x12, 0x20, 0x22, 0x30, 0x32, 0x40, 0x43, 0x50, 0x53, 0x60, 0x63, 0x70, 0x72, 0x73, 0x75}
+    | {0x80, 0x82, 0x83, 0x85, 0x86, 0x87, 0x90, 0x92, 0x93, 0xA0, 0xA2, 0xA3, 0xA6, 0xA7, 0xB0, 0xB2}
+    | {0xC0, 0xD0, 0xD5, 0xE0, 0xE2, 0xE3, 0xF0, 0xF2, 0xF3}
+    | set(range(0x88, 0x90))
+    | set(range(0xA8, 0xB0))
+    | set(range(0xB4, 0xC0))
+    | set(range(0xD8, 0xE0))
+)
+_FOUR_CYCLE_OPCODES = {0x84, 0xA4}
+# Short conditional jumps whose relative offset is the last operand byte.
+_RELATIVE_BRANCH_OPCODES = {0x10, 0x20, 0x30, 0x40, 0x50, 0x60, 0x70, 0x80, 0xD5} | set(range(0xB4, 0xC0)) | set(range(0xD8, 0xE0))
+
+OPCODE_LENGTHS = tuple(3 if op in _THREE_BYTE_OPCODES else 2 if op in _TWO_BYTE_OPCODES else 1 for op in range(256))
+OPCODE_CYCLES = tuple(4 if op in _FOUR_CYCLE_OPCODES else 2 if op in _TWO_CYCLE_OPCODES else 1 for op in range(256))
+
+_ACCUMULATOR_GROUP_NAMES = {0x2: "ADD", 0x3: "ADDC", 0x4: "ORL", 0x5: "ANL", 0x6: "XRL", 0x9: "SUBB"}
+_SHORT_JUMP_NAMES = {0x40: "JC", 0x50: "JNC", 0x60: "JZ", 0x70: "JNZ", 0x80: "SJMP"}
+_BIT_JUMP_NAMES = {0x10: "JBC", 0x20: "JB", 0x30: "JNB"}
+_DIRECT_A_NAMES = {0x42: "ORL", 0x52: "ANL", 0x62: "XRL"}
+_DIRECT_IMM_NAMES = {0x43: "ORL", 0x53: "ANL", 0x63: "XRL"}
+_BIT_OPERAND_FORMATS = {
+    0x72: "ORL C,0x{:02X}",
+    0x82: "ANL C,0x{:02X}",
+    0x92: "MOV 0x{:02X},C",
+    0xA0: "ORL C,/0x{:02X}",
+    0xA2: "MOV C,0x{:02X}",
+    0xB0: "ANL C,/0x{:02X}",
+    0xB2: "CPL 0x{:02X}",
+    0xC2: "CLR 0x{:02X}",
+    0xD2: "SETB 0x{:02X}",
+}
+_DIRECT_OPERAND_FORMATS = {
+    0x05: "INC 0x{:02X}",
+    0x15: "DEC 0x{:02X}",
+    0xC0: "PUSH 0x{:02X}",
+    0xC5: "XCH A,0x{:02X}",
+    0xD0: "POP 0x{:02X}",
+    0xD5: "DJNZ 0x{:02X},rel",
+    0xE5: "MOV A,0x{:02X}",
+    0xF5: "MOV 0x{:02X},A",
+}
+_REGISTER_FORMATS = {
+    0x0: "INC R{}",
+    0x1: "DEC R{}",
+    0xA: "MOV R{},direct",
+    0xC: "XCH A,R{}",
+    0xD: "DJNZ R{},rel",
+    0xE: "MOV A,R{}",
+    0xF: "MOV R{},A",
+}
+_FIXED_MNEMONICS = {
+    0x00: "NOP",
+    0x03: "RR A",
+    0x04: "INC A",
+    0x06: "INC @R0",
+    0x07: "INC @R1",
+    0x13: "RRC A",
+    0x14: "DEC A",
+    0x16: "DEC @R0",
+    0x17: "DEC @R1",
+    0x22: "RET",
+    0x23: "RL A",
+    0x32: "RETI",
+    0x33: "RLC A",
+    0x73: "JMP @A+DPTR",
+    0x76: "MOV @R0,#data",
+    0x77: "MOV @R1,#data",
+    0x83: "MOVC A,@A+PC",
+    0x84: "DIV AB",
+    0x93: "MOVC A,@A+DPTR",
+    0xA3: "INC DPTR",
+    0xA4: "MUL AB",
+    0xA6: "MOV @R0,direct",
+    0xA7: "MOV @R1,direct",
+    0xB3: "CPL C",
+    0xC3: "CLR C",
+    0xC4: "SWAP A",
+    0xC6: "XCH A,@R0",
+    0xC7: "XCH A,@R1",
+    0xD3: "SETB C",
+    0xD4: "DA A",
+    0xD6: "XCHD A,@R0",
+    0xD7: "XCHD A,@R1",
+    0xE0: "MOVX A,@DPTR",
+    0xE2: "MOVX A,@R0",
+    0xE3: "MOVX A,@R1",
+    0xE4: "CLR A",
+    0xE6: "MOV A,@R0",
+    0xE7: "MOV A,@R1",
+    0xF0: "MOVX @DPTR,A",
+    0xF2: "MOVX @R0,A",
+    0xF3: "MOVX @R1,A",
+    0xF4: "CPL A",
+    0xF6: "MOV @R0,A",
+    0xF7: "MOV @R1,A",
+}
+
+
+@dataclass
+class DecodedInstruction:
+    address: int
+    opcode: int
+    operands: tuple[int, ...]
+    length: int
+    cycles: int
+    mnemonic: str
+    next_pc: int
+    target: int | None
+    handler: Callable[["DecodedInstruction"], None]
+
+    @property
+    def bytes_(self) -> list[int]:
+        return [self.opcode, *self.operands]
+
+
+def branch_target(opcode: int, operands: tuple[int, ...], next_pc: int) -> int | None:
+    if opcode in PAGE_BRANCH_OPCODES:
+        return ((next_pc & 0xF800) | ((opcode & 0xE0) << 3) | operands[0]) & 0xFFFF
+    if opcode in {0x02, 0x12}:
+        return ((operands[0] << 8) | operands[1]) & 0xFFFF
+    if opcode in _RELATIVE_BRANCH_OPCODES:
+        rel = operands[-1]
+        signed = rel if rel < 0x80 else rel - 0x100
+        return (next_pc + signed) & 0xFFFF
+    return None
+
+
+def format_mnemonic(opcode: int, operands: tuple[int, ...], target: int | None) -> str:
+    if opcode in _FIXED_MNEMONICS:
+        return _FIXED_MNEMONICS[opcode]
+    high = opcode >> 4
+    low = opcode & 0x0F
+    if opcode in PAGE_BRANCH_OPCODES:
+        return f"{'ACALL' if opcode in ACALL_OPCODES else 'AJMP'} 0x{target:04X}"
+    if opcode == 0x02:
+        return f"LJMP 0x{target:04X}"
+    if opcode == 0x12:
+        return f"LCALL 0x{target:04X}"
+    if opcode in _BIT_JUMP_NAMES:
+        return f"{_BIT_JUMP_NAMES[opcode]} 0x{operands[0]:02X},0x{target:04X}"
+    if opcode in _SHORT_JUMP_NAMES:
+        return f"{_SHORT_JUMP_NAMES[opcode]} 0x{target:04X}"
+    if opcode in _BIT_OPERAND_FORMATS:
+        return _BIT_OPERAND_FORMATS[opcode].format(operands[0])
+    if opcode in _DIRECT_OPERAND_FORMATS:
+        return _DIRECT_OPERAND_FORMATS[opcode].format(operands[0])
+    if opcode in _DIRECT_A_NAMES:
+        return f"{_DIRECT_A_NAMES[opcode]} 0x{operands[0]:02X},A"
+    if opcode in _DIRECT_IMM_NAMES:
+        return f"{_DIRECT_IMM_NAMES[opcode]} 0x{operands[0]:02X},#0x{operands[1]:02X}"
+    if high in _ACCUMULATOR_GROUP_NAMES and low >= 4:
+        return f"{_ACCUMULATOR_GROUP_NAMES[high]} A,<src>"
+    if opcode == 0x74:
+        return f"MOV A,#0x{operands[0]:02X}"
+    if opcode == 0x75:
+        return f"MOV 0x{operands[0]:02X},#0x{operands[1]:02X}"
+    if opcode == 0x85:
+        return f"MOV 0x{operands[1]:02X},0x{operands[0]:02X}"
+    if opcode in {0x86, 0x87}:
+        return f"MOV 0x{operands[0]:02X},@R{opcode & 0x01}"
+    if opcode == 0x90:
+        return f"MOV DPTR,#0x{(operands[0] << 8) | operands[1]:04X}"
+    if 0xB4 <= opcode <= 0xBF:
+        return "CJNE"
+    if low >= 8:
+        reg = opcode & 0x07
+        if high == 0x7:
+            return f"MOV R{reg},#0x{operands[0]:02X}"
+        if high == 0x8:
+            return f"MOV 0x{operands[0]:02X},R{reg}"
+        if high in _REGISTER_FORMATS:
+            return _REGISTER_FORMATS[high].format(reg)
+    return f"DB 0x{opcode:02X}"
+
+
+def decode_instruction(
+    read_code: Callable[[int], int],
+    address: int,
+    handlers: tuple[Callable[[DecodedInstruction], None], ...],
+) -> DecodedInstruction:
+    address &= 0xFFFF
+    opcode = read_code(address)
+    length = OPCODE_LENGTHS[opcode]
+    operands = tuple(read_code((address + offset) & 0xFFFF) for offset in range(1, length))
+    next_pc = (address + length) & 0xFFFF
+    target = branch_target(opcode, operands, next_pc)
+    return DecodedInstruction(
+        address=address,
+        opcode=opcode,
+        operands=operands,
+        length=length,
+        cycles=OPCODE_CYCLES[opcode],
+        mnemonic=format_mnemonic(opcode, operands, target),
+        next_pc=next_pc,
+        target=target,
+        handler=handlers[opcode],
+    )
+
+
+class PredecodeCache:
+    def __init__(self, size: int) -> None:
+        self._entries: list[DecodedInstruction | None] = [None] * size
+
+    def get(self, address: int) -> DecodedInstruction | None:
+        if address < len(self._entries):
+            return self._entries[address]
+        return None
+
+    def store(self, decoded: DecodedInstruction) -> None:
+        if decoded.address < len(self._entries):
+            self._entries[decoded.address] = decoded
+
+    def invalidate(self, start: int, end: int) -> None:
+        # An instruction is at most three bytes long, so a write can affect records starting two bytes earlier.
+        first = max(0, start - 2)
+        last = min(len(self._entries), end)
+        for address in range(first, last):
+            self._entries[address] = None
+
+    def clear(self) -> None:
+        self._entries = [None] * len(self._entries)
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._entries if entry is not None)
+
+
+# Opcodes that can leave a straight-line run: jumps, calls, returns and conditional branches.
+CONTROL_FLOW_OPCODES = (
+    PAGE_BRANCH_OPCODES
+    | {0x02, 0x10, 0x12, 0x20, 0x22, 0x30, 0x32, 0x40, 0x50, 0x60, 0x70, 0x73, 0x80, 0xD5}
+    | set(range(0xB4, 0xC0))
+    | set(range(0xD8, 0xE0))
+)
+_DIRECT_WRITE_OPERAND = {
+    0x05: 0, 0x15: 0, 0x42: 0, 0x43: 0, 0x52: 0, 0x53: 0, 0x62: 0, 0x63: 0, 0x75: 0, 0x85: 1,
+    0x86: 0, 0x87: 0, 0xC5: 0, 0xD0: 0, 0xD5: 0, 0xF5: 0,
+}
+_DIRECT_WRITE_OPERAND.update({opcode: 0 for opcode in range(0x88, 0x90)})
+_BIT_WRITE_OPCODES = {0x10, 0x92, 0xB2, 0xC2, 0xD2}
+# SFRs a block may write without ending: they have no peripheral, port or interrupt side effects.
+_PLAIN_SFRS = {0x81, 0x82, 0x83, 0xD0, 0xE0, 0xF0}
+MAX_BLOCK_INSTRUCTIONS = 64
+
+
+def writes_special_function_register(decoded: DecodedInstruction) -> bool:
+    if decoded.opcode in _DIRECT_WRITE_OPERAND:
+        address = decoded.operands[_DIRECT_WRITE_OPERAND[decoded.opcode]]
+        return address >= 0x80 and address not in _PLAIN_SFRS
+    if decoded.opcode in _BIT_WRITE_OPCODES:
+        bit_address = decoded.operands[0]
+        return bit_address >= 0x80 and (bit_address & 0xF8) not in _PLAIN_SFRS
+    return False
+
+
+@dataclass
+class BasicBlock:
+    start: int
+    end: int
+    length: int
+    cycles: int
+    run: Callable[[], int]
+    # Set when the block ends on an SFR write that can change ports, peripherals or interrupt state.
+    yields: bool = False
+
+
+class BasicBlockCache:
+    def __init__(self) -> None:
+        self._blocks: dict[int, BasicBlock] = {}
+
+    def get(self, address: int) -> BasicBlock | None:
+        return self._blocks.get(address)
+
+    def store(self, block: BasicBlock) -> None:
+        self._blocks[block.start] = block
+
+    def invalidate(self, start: int, end: int) -> None:
+        stale = [address for address, block in self._blocks.items() if block.start < end and start < block.end]
+        for address in stale:
+            del self._blocks[address]
+
+    def clear(self) -> None:
+        self._blocks.clear()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
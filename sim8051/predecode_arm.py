@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Mapping
+
+COND_NAMES = {
+    0x0: "EQ",
+    0x1: "NE",
+    0x2: "CS",
+    0x3: "CC",
+    0x4: "MI",
+    0x5: "PL",
+    0x6: "VS",
+    0x7: "VC",
+    0x8: "HI",
+    0x9: "LS",
+    0xA: "GE",
+    0xB: "LT",
+    0xC: "GT",
+    0xD: "LE",
+    0xE: "AL",
+}
+SHIFT_NAMES = {0: "LSL", 1: "LSR", 2: "ASR", 3: "ROR"}
+DATA_PROCESSING_NAMES = {
+    0x0: "AND",
+    0x1: "EOR",
+    0x2: "SUB",
+    0x4: "ADD",
+    0x5: "ADC",
+    0x6: "SBC",
+    0x8: "TST",
+    0xA: "CMP",
+    0xC: "ORR",
+    0xD: "MOV",
+    0xF: "MVN",
+}
+COND_ALWAYS = 0xE
+
+# Operand2 and load/store offset forms.
+OPERAND_IMMEDIATE = 0
+OPERAND_REGISTER = 1
+OPERAND_SHIFT_IMMEDIATE = 2
+OPERAND_SHIFT_REGISTER = 3
+
+
+@dataclass
+class ArmDecodedInstruction:
+    """One ARM word with its fields pre-extracted and the executor that runs it.
+
+    A handler may return a mnemonic to use instead of `mnemonic`; register-offset loads and stores do so
+    when the offset register reads zero at run time.
+    """
+
+    address: int
+    opcode: int
+    encoded: bytes
+    cond: int
+    mnemonic: str
+    skip_mnemonic: str
+    cycles: int
+    handler: Callable[["ArmDecodedInstruction"], str | None]
+    kind: str = "undefined"
+    error: str = ""
+    writes_pc: bool = False
+    set_flags: bool = False
+    rd: int = 0
+    rn: int = 0
+    rm: int = 0
+    rs: int = 0
+    operand_kind: int = OPERAND_IMMEDIATE
+    shift_type: int = 0
+    shift_amount: int = 0
+    immediate: int = 0
+    immediate_carry: int | None = None
+    pre_index: bool = False
+    up: bool = False
+    write_back: bool = False
+    load: bool = False
+    link: bool = False
+    accumulate: bool = False
+    target: int = 0
+    alternate_mnemonic: str = ""
+
+    @property
+    def bytes_(self) -> list[int]:
+        return list(self.encoded)
+
+
+def _rotate_right(value: int, amount: int) -> int:
+    amount %= 32
+    if amount == 0:
+        return value & 0xFFFFFFFF
+    return ((value >> amount) | (value << (32 - amount))) & 0xFFFFFFFF
+
+
+def _shift_text(rm: int, shift_type: int, amount: int) -> str:
+    if amount == 0 and shift_type == 0:
+        return f"R{rm}"
+    suffix = "RRX" if shift_type == 3 and amount == 0 else f"{SHIFT_NAMES[shift_type]} #{amount}"
+    return f"R{rm}, {suffix}"
+
+
+def _decode_data_processing(ins: ArmDecodedInstruction, handlers: Mapping[str, Callable]) -> None:
+    opcode = ins.opcode
+    opcode_id = (opcode >> 21) & 0xF
+    if opcode_id not in DATA_PROCESSING_NAMES:
+        ins.error = f"ARM opcode 0x{opcode:08X} is not implemented"
+        return
+    name = DATA_PROCESSING_NAMES[opcode_id]
+    ins.set_flags = bool((opcode >> 20) & 0x1)
+    ins.rd = (opcode >> 12) & 0xF
+    ins.rn = (opcode >> 16) & 0xF
+    if opcode & (1 << 25):
+        rotate = ((opcode >> 8) & 0xF) * 2
+        ins.immediate = _rotate_right(opcode & 0xFF, rotate)
+        ins.immediate_carry = None if rotate == 0 else (ins.immediate >> 31) & 1
+        operand_text = f"#0x{ins.immediate:08X}"
+    else:
+        ins.rm = opcode & 0xF
+        ins.shift_type = (opcode >> 5) & 0x3
+        if opcode & (1 << 4):
+            if opcode & (1 << 7):
+                ins.error = "ARM register-shift form is invalid"
+                return
+            ins.operand_kind = OPERAND_SHIFT_REGISTER
+            ins.rs = (opcode >> 8) & 0xF
+            operand_text = f"R{ins.rm}, {SHIFT_NAMES[ins.shift_type]} R{ins.rs}"
+        else:
+            ins.shift_amount = (opcode >> 7) & 0x1F
+            plain = ins.shift_amount == 0 and ins.shift_type == 0
+            ins.operand_kind = OPERAND_REGISTER if plain else OPERAND_SHIFT_IMMEDIATE
+            operand_text = _shift_text(ins.rm, ins.shift_type, ins.shift_amount)
+    if name in {"MOV", "MVN"}:
+        ins.mnemonic = f"{name} R{ins.rd},{operand_text}"
+    elif name in {"TST", "CMP"}:
+        ins.mnemonic = f"{name} R{ins.rn},{operand_text}"
+    else:
+        ins.mnemonic = f"{name} R{ins.rd},R{ins.rn},{operand_text}"
+    ins.cycles = 1
+    ins.kind = "data_processing"
+    ins.writes_pc = ins.rd == 15 and name not in {"TST", "CMP"}
+    ins.handler = handlers[name]
+
+
+def _load_store_mnemonic(ins: ArmDecodedInstruction, offset_text: str, has_offset: bool) -> str:
+    suffix = f"[R{ins.rn}]"
+    if has_offset:
+        suffix = f"[R{ins.rn}, {'#' if offset_text.startswith('#') else ''}{offset_text.lstrip('#')}]"
+    if ins.pre_index and ins.write_back:
+        suffix += "!"
+    elif not ins.pre_index and has_offset:
+        suffix = f"[R{ins.rn}], {offset_text}"
+    return f"{'LDR' if ins.load else 'STR'} R{ins.rd},{suffix}"
+
+
+def _decode_load_store(ins: ArmDecodedInstruction, handlers: Mapping[str, Callable]) -> None:
+    opcode = ins.opcode
+    if (opcode >> 22) & 0x1:
+        ins.error = "ARM load/store form outside the supported subset is not implemented"
+        return
+    ins.pre_index = bool((opcode >> 24) & 0x1)
+    ins.up = bool((opcode >> 23) & 0x1)
+    ins.write_back = bool((opcode >> 21) & 0x1)
+    ins.load = bool((opcode >> 20) & 0x1)
+    ins.rn = (opcode >> 16) & 0xF
+    ins.rd = (opcode >> 12) & 0xF
+    if not (opcode >> 25) & 0x1:
+        ins.immediate = opcode & 0xFFF
+        ins.mnemonic = _load_store_mnemonic(ins, f"#{ins.immediate}", bool(ins.immediate))
+    else:
+        if opcode & (1 << 4):
+            ins.error = "ARM load/store register shifts by register are not implemented"
+            return
+        ins.rm = opcode & 0xF
+        ins.shift_type = (opcode >> 5) & 0x3
+        ins.shift_amount = (opcode >> 7) & 0x1F
+        ins.operand_kind = OPERAND_SHIFT_IMMEDIATE
+        offset_text = f"R{ins.rm}" if ins.shift_amount == 0 and ins.shift_type == 0 else f"R{ins.rm}, {SHIFT_NAMES[ins.shift_type]} #{ins.shift_amount}"
+        ins.mnemonic = _load_store_mnemonic(ins, offset_text, True)
+        ins.alternate_mnemonic = _load_store_mnemonic(ins, offset_text, False)
+    ins.cycles = 3
+    ins.kind = "load_store"
+    ins.handler = handlers["load_store"]
+
+
+def decode_arm_instruction(
+    opcode: int,
+    address: int,
+    endian: str,
+    handlers: Mapping[str, Callable[[ArmDecodedInstruction], str | None]],
+) -> ArmDecodedInstruction:
+    """Classify `opcode` once. Unsupported forms decode to the `undefined` handler, which raises when run."""
+    cond = (opcode >> 28) & 0xF
+    ins = ArmDecodedInstruction(
+        address=address,
+        opcode=opcode,
+        encoded=opcode.to_bytes(4, endian),
+        cond=cond,
+        mnemonic=f".word 0x{opcode:08X}",
+        skip_mnemonic=f"SKIP.{COND_NAMES.get(cond, '??')}",
+        cycles=1,
+        handler=handlers["undefined"],
+    )
+    if (opcode & 0x0FFFFFF0) == 0x012FFF10:
+        ins.rm = opcode & 0xF
+        ins.mnemonic = f"BX R{ins.rm}"
+        ins.cycles = 3
+        ins.kind = "bx"
+        ins.handler = handlers["bx"]
+    elif ((opcode >> 23) & 0x1F) == 0x01 and ((opcode >> 4) & 0xF) == 0x9:
+        if (opcode >> 22) & 0x1:
+            ins.error = "Signed ARM multiply-long instructions are not implemented"
+        else:
+            ins.accumulate = bool((opcode >> 21) & 0x1)
+            ins.set_flags = bool((opcode >> 20) & 0x1)
+            ins.rn = (opcode >> 16) & 0xF
+            ins.rd = (opcode >> 12) & 0xF
+            ins.rs = (opcode >> 8) & 0xF
+            ins.rm = opcode & 0xF
+            ins.mnemonic = f"{'UMLAL' if ins.accumulate else 'UMULL'} R{ins.rd},R{ins.rn},R{ins.rm},R{ins.rs}"
+            ins.cycles = 2
+            ins.kind = "multiply_long"
+            ins.handler = handlers["multiply_long"]
+    elif ((opcode >> 25) & 0x7) == 0b101:
+        ins.link = bool((opcode >> 24) & 0x1)
+        imm24 = opcode & 0x00FFFFFF
+        if imm24 & 0x00800000:
+            imm24 -= 0x01000000
+        ins.target = (address + 8 + ((imm24 << 2) & 0xFFFFFFFF)) & 0xFFFFFFFF
+        ins.mnemonic = f"{'BL' if ins.link else 'B'} 0x{ins.target:08X}"
+        ins.cycles = 3
+        ins.kind = "branch"
+        ins.handler = handlers["branch"]
+    elif ((opcode >> 26) & 0x3) == 0b01:
+        _decode_load_store(ins, handlers)
+    elif ((opcode >> 26) & 0x3) == 0b00:
+        _decode_data_processing(ins, handlers)
+    else:
+        ins.error = f"Unsupported ARM opcode 0x{opcode:08X}"
+    return ins
+
+
+# Longest loop body, closing branch included, that the loop accelerator compiles.
+MAX_LOOP_INSTRUCTIONS = 32
+
+
+@dataclass
+class ArmLoop:
+    """A loop of register-only data-processing ops closed by a branch back to `start`.
+
+    `run(iterations)` executes up to that many whole iterations and returns how many ran and whether the
+    closing branch fell through on the last one.
+    """
+
+    start: int
+    exit_pc: int
+    length: int
+    run: Callable[[int], tuple[int, bool]]
+
+
+class ArmPredecodeCache:
+    def __init__(self) -> None:
+        self._entries: dict[int, ArmDecodedInstruction] = {}
+
+    def get(self, address: int) -> ArmDecodedInstruction | None:
+        return self._entries.get(address)
+
+    def store(self, decoded: ArmDecodedInstruction) -> None:
+        self._entries[decoded.address] = decoded
+
+    def invalidate(self, start: int, end: int) -> None:
+        # A word starting up to three bytes before `start` overlaps the write.
+        stale = [address for address in self._entries if start - 4 < address < end]
+        for address in stale:
+            del self._entries[address]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+# Checkpoints are taken every `interval` tracked steps. Once `max_checkpoints` is exceeded every other
+# checkpoint in the older half is dropped, so reachable depth keeps growing while memory stays bounded and
+# replay cost grows only for distant targets.
+DEFAULT_CHECKPOINT_INTERVAL = 1024
+DEFAULT_MAX_CHECKPOINTS = 64
+# Persisted sessions keep the newest checkpoint plus one at least this many steps back, so stepping back
+# still works that far after a session round trip.
+PERSISTED_HISTORY_DEPTH = 512
+
+
+@dataclass
+class Checkpoint:
+    position: int
+    state: Any
+
+
+@dataclass
+class ExternalInput:
+    position: int
+    method: str
+    args: tuple[Any, ...]
+
+
+@dataclass
+class ReverseHistory:
+    """Bookkeeping for checkpoint-and-replay reverse execution.
+
+    `position` counts tracked steps since the history was (re)started. A checkpoint holds the CPU state at
+    its position, captured just before the step leaving that position, and external inputs are logged
+    with the position they were applied at so replay can re-apply them deterministically.
+    """
+
+    interval: int = DEFAULT_CHECKPOINT_INTERVAL
+    max_checkpoints: int = DEFAULT_MAX_CHECKPOINTS
+    position: int = 0
+    checkpoints: list[Checkpoint] = field(default_factory=list)
+    inputs: list[ExternalInput] = field(default_factory=list)
+    anchor: tuple[int, int] | None = None
+    checkpoint_due: bool = True
+
+    def __len__(self) -> int:
+        if not self.checkpoints:
+            return 0
+        return self.position - self.checkpoints[0].position
+
+    def clear(self) -> None:
+        self.position = 0
+        self.checkpoints.clear()
+        self.inputs.clear()
+        self.anchor = None
+        self.checkpoint_due = True
+
+    def matches(self, anchor: tuple[int, int]) -> bool:
+        return self.anchor is None or self.anchor == anchor
+
+    def needs_checkpoint(self) -> bool:
+        if self.checkpoint_due or not self.checkpoints:
+            return True
+        return self.position - self.checkpoints[-1].position >= self.interval
+
+    def add_checkpoint(self, state: Any, position: int | None = None) -> None:
+        position = self.position if position is None else position
+        if self.checkpoints and self.checkpoints[-1].position == position:
+            self.checkpoints[-1] = Checkpoint(position, state)
+        else:
+            self.checkpoints.append(Checkpoint(position, state))
+        self.checkpoint_due = False
+        if len(self.checkpoints) > self.max_checkpoints:
+            older = len(self.checkpoints) // 2
+            self.checkpoints = self.checkpoints[:older:2] + self.checkpoints[older:]
+            oldest = self.checkpoints[0].position
+            self.inputs = [item for item in self.inputs if item.position >= oldest]
+
+    def log_input(self, method: str, args: tuple[Any, ...]) -> None:
+        if not self.checkpoints:
+            return
+        self.inputs.append(ExternalInput(self.position, method, args))
+        if self.checkpoints[-1].position == self.position:
+            self.checkpoint_due = True
+
+    def checkpoint_at_or_before(self, position: int) -> Checkpoint | None:
+        for checkpoint in reversed(self.checkpoints):
+            if checkpoint.position <= position:
+                return checkpoint
+        return None
+
+    def inputs_between(self, start: int, end: int) -> list[ExternalInput]:
+        """Inputs applied at positions in (start, end]; those at `start` are already part of its checkpoint."""
+        return [item for item in self.inputs if start < item.position <= end]
+
+    def rewind_to(self, position: int) -> None:
+        self.position = position
+        self.checkpoints = [item for item in self.checkpoints if item.position <= position]
+        self.inputs = [item for item in self.inputs if item.position <= position]
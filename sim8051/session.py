@@ -5,15 +5,30 @@ import math
 import os
 import secrets
 import time
-from collections import deque
+from collections import OrderedDict, deque
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from threading import RLock
 from typing import Any, Protocol
 
-from .exceptions import AssemblyError, ExecutionError
+from .base_cpu import CAPTURE_COUNTERS, CAPTURE_FULL, CAPTURE_PAYLOAD
+from .exceptions import AssemblyError, ExecutionError, ValidationError
 from .factory import architecture_metadata, create_assembler, create_cpu, normalize_architecture
 from .hardware import VirtualHardwareManager, apply_hardware_inputs
 from .model import ProgramImage, ReverseDelta, RunResult, SourceLocation, Watchpoint
+from .session_codec import (
+    SessionState,
+    apply_session_delta,
+    decode_session,
+    decode_session_delta,
+    diff_session,
+    encode_session,
+    encode_session_delta,
+    is_session_blob,
+    join_session,
+    normalize_session,
+    split_session,
+)
 from .version import API_VERSION, CPU_MODEL_VERSIONS, SESSION_FORMAT_VERSION
 
 try:  # pragma: no cover - optional dependency
@@ -24,9 +39,39 @@ except Exception:  # pragma: no cover - optional dependency
 
 _DEBUG_TIMING = os.environ.get("HEXLOGIC_DEBUG_TIMING", "").strip().lower() in {"1", "true", "yes", "on"}
 _MAX_RETURNED_RUN_STEPS = 256
+# Memory and trace version tokens of the client behind the current request. Sessions are shared (and cached
+# by the Redis backend), so the tokens live in the request's context instead of on the session.
+_SNAPSHOT_SINCE: ContextVar[tuple[str | None, str | None]] = ContextVar("hexlogic_snapshot_since", default=(None, None))
 _REALTIME_RUN_SLICE_SECONDS = 0.1
 _REALTIME_COMPACT_STEP_BUDGET = 2_000_000
 _REALTIME_COMPACT_CYCLE_CAP = 8_000_000
+_SESSION_SERIALIZATIONS = {"json", "binary", "delta"}
+# Per-run capture requested by clients; "compact" returns step payloads and "counters" returns none.
+_RUN_CAPTURES = ("full", "compact", "counters")
+# With `delta` serialization a session is stored as a binary base blob plus a Redis list of delta records
+# under `<key>:deltas`; the base is rewritten after `delta_compact_every` records or once the records add up
+# to the size of the base itself.
+_DELTA_KEY_SUFFIX = ":deltas"
+DEFAULT_DELTA_COMPACT_EVERY = 64
+# Every save bumps `<key>:version`; a worker keeps the live sessions it last loaded or saved and reuses one
+# while that counter still matches, so polling the same session never re-deserializes it.
+_VERSION_KEY_SUFFIX = ":version"
+DEFAULT_SESSION_CACHE_SIZE = 128
+# A delta is appended only while `<key>:version` still holds the version this worker last loaded or saved;
+# otherwise another worker has saved since and the caller rewrites the base, so the last writer wins.
+# Returns the new version, or 0 on conflict.
+_APPEND_DELTA_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+if ARGV[2] ~= '' then
+    redis.call('RPUSH', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+local version = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return version
+"""
 
 
 def _program_to_dict(program: ProgramImage | None) -> dict[str, Any] | None:
@@ -105,6 +150,8 @@ class SimulatorSession:
     _simulated_time_sec: float = field(init=False, default=0.0)
     _target_sim_time_sec: float = field(init=False, default=0.0)
     _last_wall_time_sec: float = field(init=False, default=0.0)
+    # What a delta-persisting backend last stored for this session, so the next save only ships changes.
+    _persisted: _PersistedSession | None = field(init=False, default=None, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         self.architecture = normalize_architecture(self.architecture)
@@ -174,7 +221,15 @@ class SimulatorSession:
         self._target_sim_time_sec += elapsed
         return elapsed
 
-    def _run_realtime(self, *, max_steps: int) -> RunResult:
+    def _run_capture(self, capture: str | None) -> str:
+        requested = str(capture or "compact").lower()
+        if requested not in _RUN_CAPTURES:
+            raise ValidationError("Unsupported run capture", context={"supported": list(_RUN_CAPTURES), "provided": requested})
+        if requested == "full" or not self.cpu.compact_execution_allowed():
+            return CAPTURE_FULL
+        return CAPTURE_COUNTERS if requested == "counters" else CAPTURE_PAYLOAD
+
+    def _run_realtime(self, *, max_steps: int, capture: str = CAPTURE_PAYLOAD) -> RunResult:
         steps: deque[Any] = deque(maxlen=_MAX_RETURNED_RUN_STEPS)
         reason = "max_steps"
         start_cycles = int(self.cpu.cycles)
@@ -182,10 +237,10 @@ class SimulatorSession:
         effective_hz = self._effective_execution_hz()
         step_count = 0
         register_diff: dict[str, dict[str, int]] = {}
-        memory_changes: dict[str, list[tuple[int, int, int]]] = {}
+        change_window = self.cpu.memory.open_change_window()
         interrupts: list[str] = []
-        compact_mode = self.cpu.compact_execution_allowed()
-        compact_payload_mode = compact_mode and callable(getattr(self.cpu, "step_compact_payload", None))
+        compact_mode = capture != CAPTURE_FULL
+        counters_mode = capture == CAPTURE_COUNTERS
         runtime_before = dict(self._runtime_payload().get("registers", {})) if compact_mode else {}
         has_breakpoints = bool(getattr(self.cpu.debugger, "breakpoints", {}))
         step_budget = max_steps if not compact_mode else max(int(max_steps), _REALTIME_COMPACT_STEP_BUDGET)
@@ -193,6 +248,7 @@ class SimulatorSession:
         if compact_mode:
             realtime_cycles = int(math.ceil(effective_hz * _REALTIME_RUN_SLICE_SECONDS * 1.5))
             cycle_cap = max(cycle_cap, min(_REALTIME_COMPACT_CYCLE_CAP, realtime_cycles))
+        self.cpu._clear_watch_hits()
         while self._simulated_time_sec < self._target_sim_time_sec:
             if step_count >= step_budget:
                 reason = "max_steps"
@@ -220,39 +276,51 @@ class SimulatorSession:
                     step_count += int(fast_slice.get("steps", 0) or 0)
                     fast_cycles = int(fast_slice.get("cycles", 0) or 0)
                     self._simulated_time_sec += max(0.0, float(fast_cycles) / effective_hz)
-                    for space, changes in dict(fast_slice.get("memory_changes", {})).items():
-                        memory_changes.setdefault(space, []).extend(changes)
                     interrupts.extend(str(item) for item in list(fast_slice.get("interrupts", [])))
-                    for item in list(fast_slice.get("steps_payloads", [])):
-                        steps.append(item)
+                    if not counters_mode:
+                        steps.extend(fast_slice.get("steps_payloads", []))
                     if fast_slice.get("hardware_sync"):
                         self._sync_hardware_after_instruction(None)
+                    if self.cpu._check_watchpoints(None):
+                        reason = "watchpoint"
+                        break
                     if self.cpu.halted:
                         reason = "halted"
                         break
                     continue
-            trace = self.cpu.step_compact_payload() if compact_payload_mode else (self.cpu.step_compact() if compact_mode else self.cpu.step_into())
-            step_count += 1
-            steps.append(trace)
-            trace_register_diff = trace.get("register_diff", {}) if isinstance(trace, dict) else trace.register_diff
-            trace_changes = trace.get("changes", {}) if isinstance(trace, dict) else trace.changes
-            trace_interrupt = trace.get("interrupt") if isinstance(trace, dict) else trace.interrupt
-            trace_cycles = int(trace.get("cycles", 0)) if isinstance(trace, dict) else int(trace.cycles)
-            if trace_register_diff:
-                register_diff.update(trace_register_diff)
-            if trace_changes:
-                for space, changes in trace_changes.items():
-                    memory_changes.setdefault(space, []).extend(changes)
+            if counters_mode:
+                cycles_before = self.cpu.cycles
+                self.cpu.step_counters()
+                step_count += 1
+                trace = None
+                trace_interrupt = self.cpu.last_interrupt
+                trace_cycles = int(self.cpu.cycles - cycles_before)
+            else:
+                trace = self.cpu.step_compact_payload() if compact_mode else self.cpu.step_into()
+                step_count += 1
+                steps.append(trace)
+                trace_register_diff = trace.get("register_diff", {}) if isinstance(trace, dict) else trace.register_diff
+                trace_interrupt = trace.get("interrupt") if isinstance(trace, dict) else trace.interrupt
+                trace_cycles = int(trace.get("cycles", 0)) if isinstance(trace, dict) else int(trace.cycles)
+                if trace_register_diff:
+                    register_diff.update(trace_register_diff)
             if trace_interrupt:
                 interrupts.append(trace_interrupt)
             self._sync_hardware_after_instruction(trace)
             self._simulated_time_sec += max(0.0, float(trace_cycles) / effective_hz)
-            if not compact_mode and self.cpu._check_watchpoints(trace):
+            if self.cpu._check_watchpoints(trace):
                 reason = "watchpoint"
                 break
             if self.cpu.halted:
                 reason = "halted"
                 break
+        self.cpu.sync_peripherals()
+        memory_changes = change_window.close()
+        for trace in steps:
+            if isinstance(trace, dict):
+                trace["changes"] = dict(trace.get("changes", {}))
+            else:
+                trace.changes = dict(trace.changes)
         if compact_mode:
             runtime_after = dict(self._runtime_payload().get("registers", {}))
             register_diff = {
@@ -366,6 +434,18 @@ class SimulatorSession:
             "reason": "step_back",
         }
 
+    def reverse_continue(self) -> dict:
+        reason, steps = self.cpu.reverse_continue()
+        self.touch()
+        self._hardware_input_cache = None
+        if not steps:
+            return {"steps": 0, "state": self.snapshot(), "reason": reason}
+        self._live_hardware_payload = None
+        self._live_hardware_diff = None
+        self._reinitialize_realtime_state()
+        state, hardware_diff = self._snapshot_payload()
+        return {"steps": steps, "diff": {"hardware": hardware_diff}, "state": state, "reason": reason}
+
     def assemble(self, source_code: str) -> dict:
         self.source_code = source_code
         self.program = self.assembler.assemble(source_code)
@@ -408,7 +488,8 @@ class SimulatorSession:
         state, hardware_diff = self._snapshot_payload(compact=True, use_live_hardware=(self.execution_mode == "realtime"))
         return {"trace": trace_payload, "diff": {**self._trace_diff(trace_payload), "hardware": hardware_diff}, "state": state}
 
-    def run(self, max_steps: int = 1000, *, speed_multiplier: float | None = None) -> dict:
+    def run(self, max_steps: int = 1000, *, speed_multiplier: float | None = None, capture: str | None = None) -> dict:
+        run_capture = self._run_capture(capture)
         self._prime_hardware_inputs()
         if speed_multiplier is not None:
             self.cpu.set_speed_multiplier(speed_multiplier)
@@ -417,7 +498,7 @@ class SimulatorSession:
         audit_elapsed_seconds = 0.0
         if self.execution_mode == "realtime":
             audit_elapsed_seconds = self._advance_realtime_target()
-            result = self._run_realtime(max_steps=max_steps)
+            result = self._run_realtime(max_steps=max_steps, capture=run_capture)
         else:
             result = self.cpu.run(max_steps=max_steps, after_step=self._sync_hardware_after_instruction)
             self._simulated_time_sec += self._cycles_to_simulated_seconds(int(self.cpu.cycles) - start_cycles)
@@ -518,6 +599,10 @@ class SimulatorSession:
                     target=target,
                     space=space,
                     enabled=bool(item.get("enabled", True)),
+                    end=int(item["end"]) if item.get("end") is not None else None,
+                    access=str(item.get("access", "write")),
+                    equals=int(item["equals"]) if item.get("equals") is not None else None,
+                    crosses=int(item["crosses"]) if item.get("crosses") is not None else None,
                 )
             )
         self.cpu.set_watchpoints(watchpoints)
@@ -547,6 +632,7 @@ class SimulatorSession:
             self.cpu.memory.write8(address, value, space="code")
         else:
             raise ExecutionError(f"Unsupported memory space `{space}`")
+        self.cpu.mark_external_change()
         self.touch()
         return self.snapshot()
 
@@ -565,8 +651,25 @@ class SimulatorSession:
         state, hardware_diff = self._snapshot_payload()
         return {"hardware_test": result, "diff": {"hardware": hardware_diff}, "state": state}
 
-    def _snapshot_payload(self, *, include_program: bool = False, compact: bool = False, use_live_hardware: bool = False) -> tuple[dict[str, Any], dict[str, Any]]:
-        payload = self._runtime_payload() if compact else self.cpu.snapshot()
+    def _snapshot_payload(
+        self,
+        *,
+        include_program: bool = False,
+        compact: bool = False,
+        use_live_hardware: bool = False,
+        memory_since: str | None = None,
+        trace_since: str | None = None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        # With a `memory_since` token, changed pages go out as hex blobs under `memory` (instead of the
+        # int-keyed iram/sfr/rom/xram_sample dicts) and only trace entries newer than `trace_since` under
+        # `trace_delta`. Without explicit tokens, those of the current request are used.
+        if memory_since is None and trace_since is None:
+            memory_since, trace_since = _SNAPSHOT_SINCE.get()
+        incremental = not compact and memory_since is not None and bool(self.cpu._snapshot_memory_limits())
+        payload = self._runtime_payload() if compact else self.cpu.snapshot(include_memory=not incremental, include_trace=not incremental)
+        if incremental:
+            payload["memory"] = self.cpu.snapshot_memory(memory_since)
+            payload["trace_delta"] = self.cpu.snapshot_trace(trace_since)
         hw_diff = self._live_hardware_diff
         hw_full = self._live_hardware_payload.get("hardware") if self._live_hardware_payload is not None else None
         if hw_full is None:
@@ -615,9 +718,9 @@ class SimulatorSession:
         self._live_hardware_diff = None
         return payload, hw_diff or {}
 
-    def snapshot(self, *, include_program: bool = False) -> dict:
+    def snapshot(self, *, include_program: bool = False, memory_since: str | None = None, trace_since: str | None = None) -> dict:
         self._align_realtime_state()
-        payload, _ = self._snapshot_payload(include_program=include_program)
+        payload, _ = self._snapshot_payload(include_program=include_program, memory_since=memory_since, trace_since=trace_since)
         return payload
 
     def runtime_state(self) -> dict[str, Any]:
@@ -693,6 +796,13 @@ class SimulatorSession:
         session._align_realtime_state()
         return session
 
+    def to_bytes(self, *, compress: bool = True) -> bytes:
+        return encode_session(self.to_dict(), compress=compress)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "SimulatorSession":
+        return cls.from_dict(decode_session(blob))
+
     def export_state(self) -> dict[str, Any]:
         return self.to_dict()
 
@@ -813,6 +923,7 @@ class SessionBackend(Protocol):
     def get(self, session_id: str) -> SimulatorSession | None: ...
     def save(self, session: SimulatorSession) -> None: ...
     def delete(self, session_id: str) -> None: ...
+    def discard(self, session_id: str) -> None: ...
     def cleanup(self, ttl_seconds: int) -> None: ...
     def count(self) -> int: ...
     def estimate_bytes(self) -> int: ...
@@ -846,6 +957,11 @@ class SessionStore:
     def delete(self, session_id: str) -> None:
         self.backend.delete(session_id)
 
+    def discard(self, session_id: str | None) -> None:
+        """Forget unsaved changes after a failed request; the next get() returns the last saved state."""
+        if session_id:
+            self.backend.discard(session_id)
+
     def cleanup(self) -> None:
         self.backend.cleanup(self.ttl_seconds)
 
@@ -870,6 +986,10 @@ class InMemorySessionBackend:
         with self._lock:
             self._sessions.pop(session_id, None)
 
+    def discard(self, session_id: str) -> None:
+        # Sessions are kept live rather than saved copies, so there is nothing older to fall back to.
+        _ = session_id
+
     def cleanup(self, ttl_seconds: int) -> None:
         now = time.time()
         with self._lock:
@@ -890,6 +1010,23 @@ class InMemorySessionBackend:
             return sum(session.serialized_size() for session in self._sessions.values())
 
 
+@dataclass
+class _PersistedSession:
+    state: SessionState
+    base_id: str
+    base_bytes: int
+    sequence: int = 0
+    delta_bytes: int = 0
+    # Value of `<key>:version` when this state was last read from or written to Redis.
+    version: int = 0
+    # True while `state` is the decoded Redis copy rather than this process's own `to_dict()` output.
+    decoded: bool = False
+
+
+def _key_name(key: str | bytes) -> str:
+    return key.decode("utf-8") if isinstance(key, bytes) else key
+
+
 class RedisSessionBackend:
     def __init__(
         self,
@@ -899,14 +1036,24 @@ class RedisSessionBackend:
         fallback: InMemorySessionBackend | None = None,
         client: Any | None = None,
         key_prefix: str = "hexlogic:session:",
+        serialization: str = "json",
+        delta_compact_every: int = DEFAULT_DELTA_COMPACT_EVERY,
+        cache_size: int = DEFAULT_SESSION_CACHE_SIZE,
     ) -> None:
+        if serialization not in _SESSION_SERIALIZATIONS:
+            raise ValueError(f"Unsupported session serialization `{serialization}`")
         self.ttl_seconds = ttl_seconds
         self.fallback = fallback or InMemorySessionBackend()
         self.key_prefix = key_prefix
+        self.serialization = serialization
+        self.delta_compact_every = max(1, int(delta_compact_every))
+        self.cache_size = max(0, int(cache_size))
+        self._cache: OrderedDict[str, tuple[int, SimulatorSession]] = OrderedDict()
         self._lock = RLock()
         self._client = client
+        # Responses stay raw bytes whatever `serialization` is, since any format may already be stored.
         if self._client is None and redis_module is not None and redis_url:
-            self._client = redis_module.Redis.from_url(redis_url, decode_responses=True)
+            self._client = redis_module.Redis.from_url(redis_url, decode_responses=False)
 
     @property
     def available(self) -> bool:
@@ -915,30 +1062,144 @@ class RedisSessionBackend:
     def _key(self, session_id: str) -> str:
         return f"{self.key_prefix}{session_id}"
 
+    def _delta_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}{_DELTA_KEY_SUFFIX}"
+
+    def _version_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}{_VERSION_KEY_SUFFIX}"
+
+    def _remember(self, session_id: str, version: int, session: SimulatorSession) -> None:
+        if not self.cache_size or not version:
+            self._cache.pop(session_id, None)
+            return
+        self._cache[session_id] = (version, session)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
     def get(self, session_id: str) -> SimulatorSession | None:
         with self._lock:
             if not self.available:
                 return self.fallback.get(session_id)
+            version = int(self._client.get(self._version_key(session_id)) or 0)
+            cached = self._cache.get(session_id)
+            if cached is not None and version and cached[0] == version:
+                self._cache.move_to_end(session_id)
+                self._client.expire(self._key(session_id), self.ttl_seconds)
+                self._client.expire(self._version_key(session_id), self.ttl_seconds)
+                if cached[1]._persisted is not None:
+                    self._client.expire(self._delta_key(session_id), self.ttl_seconds)
+                return cached[1]
             payload = self._client.get(self._key(session_id))
             if payload is None:
+                self._cache.pop(session_id, None)
                 return None
-            session = SimulatorSession.from_dict(json.loads(payload))
+            # Every format is accepted so switching `serialization` does not orphan stored sessions.
+            if not is_session_blob(payload):
+                session = SimulatorSession.from_dict(json.loads(payload.decode("utf-8") if isinstance(payload, (bytes, bytearray)) else payload))
+            else:
+                session = self._load_blob(session_id, payload)
+                if session._persisted is not None:
+                    session._persisted.version = version
             self._client.expire(self._key(session_id), self.ttl_seconds)
+            self._remember(session_id, version, session)
             return session
 
+    def _load_blob(self, session_id: str, blob: bytes) -> SimulatorSession:
+        payload = decode_session(blob)
+        persistence = payload.pop("persistence", None)
+        if not isinstance(persistence, dict):
+            return SimulatorSession.from_dict(payload)
+        # Only the unbroken run of deltas written against this base counts; records left over from an
+        # interrupted compaction are ignored.
+        persisted = _PersistedSession(split_session(payload), str(persistence.get("base_id")), len(blob), decoded=True)
+        for record in self._client.lrange(self._delta_key(session_id), 0, -1):
+            delta = decode_session_delta(record)
+            if delta.get("base") != persisted.base_id or delta.get("seq") != persisted.sequence + 1:
+                break
+            apply_session_delta(persisted.state, delta)
+            persisted.sequence += 1
+            persisted.delta_bytes += len(record)
+        self._client.expire(self._delta_key(session_id), self.ttl_seconds)
+        session = SimulatorSession.from_dict(join_session(persisted.state))
+        session._persisted = persisted
+        return session
+
     def save(self, session: SimulatorSession) -> None:
         with self._lock:
             if not self.available:
                 self.fallback.save(session)
                 return
-            self._client.setex(self._key(session.session_id), self.ttl_seconds, json.dumps(session.to_dict(), separators=(",", ":")))
+            version_key = self._version_key(session.session_id)
+            version = 0
+            if self.serialization == "delta":
+                version = self._save_delta(session)
+            else:
+                payload = session.to_bytes() if self.serialization == "binary" else json.dumps(session.to_dict(), separators=(",", ":"))
+                self._client.setex(self._key(session.session_id), self.ttl_seconds, payload)
+            if not version:
+                version = int(self._client.incr(version_key))
+                self._client.expire(version_key, self.ttl_seconds)
+            if session._persisted is not None:
+                session._persisted.version = version
+            self._remember(session.session_id, version, session)
+
+    def _save_delta(self, session: SimulatorSession) -> int:
+        """Append a delta record when possible; returns the bumped version, or 0 after writing a fresh base."""
+        payload = session.to_dict()
+        state = split_session(payload)
+        persisted = session._persisted
+        if (
+            persisted is not None
+            and persisted.sequence < self.delta_compact_every
+            and persisted.delta_bytes < persisted.base_bytes
+        ):
+            # A decoded baseline only compares equal to `to_dict()` output once tuples and int keys are normalized.
+            delta = diff_session(persisted.state, normalize_session(state) if persisted.decoded else state)
+            record = b"" if delta is None else encode_session_delta(delta, base_id=persisted.base_id, sequence=persisted.sequence + 1)
+            version = int(
+                self._client.eval(
+                    _APPEND_DELTA_SCRIPT,
+                    2,
+                    self._delta_key(session.session_id),
+                    self._version_key(session.session_id),
+                    persisted.version,
+                    record,
+                    self.ttl_seconds,
+                )
+                or 0
+            )
+            if version:
+                persisted.state = state
+                persisted.decoded = False
+                if record:
+                    persisted.sequence += 1
+                    persisted.delta_bytes += len(record)
+                self._client.expire(self._key(session.session_id), self.ttl_seconds)
+                return version
+        base_id = secrets.token_hex(8)
+        blob = encode_session({**payload, "persistence": {"base_id": base_id}})
+        self._client.setex(self._key(session.session_id), self.ttl_seconds, blob)
+        self._client.delete(self._delta_key(session.session_id))
+        session._persisted = _PersistedSession(state, base_id, len(blob))
+        return 0
 
     def delete(self, session_id: str) -> None:
         with self._lock:
             if not self.available:
                 self.fallback.delete(session_id)
                 return
+            self._cache.pop(session_id, None)
             self._client.delete(self._key(session_id))
+            self._client.delete(self._delta_key(session_id))
+            self._client.delete(self._version_key(session_id))
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            if not self.available:
+                self.fallback.discard(session_id)
+                return
+            self._cache.pop(session_id, None)
 
     def cleanup(self, ttl_seconds: int) -> None:
         if not self.available:
@@ -948,7 +1209,7 @@ class RedisSessionBackend:
         with self._lock:
             if not self.available:
                 return self.fallback.count()
-            return sum(1 for _ in self._client.scan_iter(match=f"{self.key_prefix}*"))
+            return sum(1 for key in self._client.scan_iter(match=f"{self.key_prefix}*") if not _key_name(key).endswith((_DELTA_KEY_SUFFIX, _VERSION_KEY_SUFFIX)))
 
     def estimate_bytes(self) -> int:
         with self._lock:
@@ -956,15 +1217,34 @@ class RedisSessionBackend:
                 return self.fallback.estimate_bytes()
             total = 0
             for key in self._client.scan_iter(match=f"{self.key_prefix}*"):
+                name = _key_name(key)
+                if name.endswith(_VERSION_KEY_SUFFIX):
+                    continue
+                if name.endswith(_DELTA_KEY_SUFFIX):
+                    total += sum(len(record) for record in self._client.lrange(key, 0, -1))
+                    continue
                 payload = self._client.get(key)
-                total += len(payload.encode("utf-8")) if payload else 0
+                if payload:
+                    total += len(payload.encode("utf-8")) if isinstance(payload, str) else len(payload)
             return total
 
 
+def set_snapshot_tokens(memory_since: str | None, trace_since: str | None) -> None:
+    """Set the client's memory/trace version tokens used by snapshots built for the current request."""
+    _SNAPSHOT_SINCE.set((memory_since, trace_since))
+
+
 def build_session_store_from_env(*, ttl_seconds: int = 3600) -> SessionStore:
     backend_name = os.environ.get("HEXLOGIC_SESSION_BACKEND", "memory").strip().lower()
     if backend_name == "redis":
-        backend = RedisSessionBackend(redis_url=os.environ.get("REDIS_URL"), ttl_seconds=ttl_seconds)
+        serialization = os.environ.get("HEXLOGIC_SESSION_SERIALIZATION", "json").strip().lower()
+        cache_size = os.environ.get("HEXLOGIC_SESSION_CACHE_SIZE", "").strip()
+        backend = RedisSessionBackend(
+            redis_url=os.environ.get("REDIS_URL"),
+            ttl_seconds=ttl_seconds,
+            serialization=serialization if serialization in _SESSION_SERIALIZATIONS else "json",
+            cache_size=int(cache_size) if cache_size.isdigit() else DEFAULT_SESSION_CACHE_SIZE,
+        )
         if backend.available:
             return SessionStore(ttl_seconds=ttl_seconds, backend=backend)
     return SessionStore(ttl_seconds=ttl_seconds, backend=InMemorySessionBackend())
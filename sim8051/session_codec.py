@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import struct
+import zlib
+from typing import Any
+
+from .exceptions import ValidationError
+from .version import SESSION_FORMAT_VERSION
+
+# Layout: header | skeleton | region count | (region header | region bytes)*
+# The skeleton is the session dict as JSON with every long hex string under a `*_hex` key replaced by
+# {"$blob": index}; the referenced bytes are stored raw, or zlib-compressed when that is smaller (idle
+# XRAM and unused ROM shrink to a few bytes).
+SESSION_BLOB_MAGIC = b"HXSB"
+SESSION_BLOB_CODEC_VERSION = 1
+_HEADER = struct.Struct(">4sBHBI")
+_REGION_COUNT = struct.Struct(">I")
+_REGION = struct.Struct(">BII")
+_FLAG_ZLIB = 0x01
+_BLOB_KEY = "$blob"
+_MIN_BLOB_CHARS = 64
+_ZLIB_LEVEL = 1
+
+# Delta records: header | JSON operations | page bytes. Operations address the session dict by key path;
+# memory regions are keyed by the path of their `*_hex` entry and patched in runs of changed pages.
+SESSION_DELTA_MAGIC = b"HXSD"
+_DELTA_HEADER = struct.Struct(">4sBBIII")
+_FLAG_PAGES_ZLIB = 0x02
+_DELTA_PAGE_SIZE = 0x100
+_MAX_SHIFT_PROBES = 8
+
+
+def is_session_blob(data: object) -> bool:
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:4]) == SESSION_BLOB_MAGIC
+
+
+def _hex_bytes(value: str) -> bytes | None:
+    try:
+        data = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return data if len(data) * 2 == len(value) else None
+
+
+def _extract_blob(value: Any, regions: list[bytes]) -> Any:
+    if isinstance(value, list):
+        return [_extract_blob(item, regions) for item in value]
+    if isinstance(value, str) and len(value) >= _MIN_BLOB_CHARS:
+        data = _hex_bytes(value)
+        if data is not None:
+            regions.append(data)
+            return {_BLOB_KEY: len(regions) - 1}
+    return value
+
+
+def _extract_regions(node: dict[str, Any], regions: list[bytes]) -> dict[str, Any]:
+    # Memory images only ever sit under `*_hex` keys of nested dicts, so lists (trace, io logs) are
+    # passed through untouched instead of being walked entry by entry.
+    result: dict[str, Any] = {}
+    for name, value in node.items():
+        if isinstance(value, dict):
+            value = _extract_regions(value, regions)
+        elif isinstance(name, str) and name.endswith("_hex"):
+            value = _extract_blob(value, regions)
+        result[name] = value
+    return result
+
+
+def _restore_blob(value: Any, regions: list[bytes]) -> Any:
+    if isinstance(value, list):
+        return [_restore_blob(item, regions) for item in value]
+    if isinstance(value, dict) and len(value) == 1 and _BLOB_KEY in value:
+        return regions[int(value[_BLOB_KEY])].hex()
+    return value
+
+
+def _restore_regions(node: dict[str, Any], regions: list[bytes]) -> dict[str, Any]:
+    for name, value in node.items():
+        if name.endswith("_hex"):
+            node[name] = _restore_blob(value, regions)
+        elif isinstance(value, dict):
+            _restore_regions(value, regions)
+    return node
+
+
+def _pack(data: bytes, compress: bool) -> tuple[int, bytes]:
+    if compress:
+        packed = zlib.compress(data, _ZLIB_LEVEL)
+        if len(packed) < len(data):
+            return _FLAG_ZLIB, packed
+    return 0, data
+
+
+def _unpack(flags: int, data: bytes, size: int) -> bytes:
+    if flags & _FLAG_ZLIB:
+        data = zlib.decompress(data)
+    if len(data) != size:
+        raise ValidationError("Corrupt session blob region", context={"expected": size, "actual": len(data)})
+    return data
+
+
+def encode_session(payload: dict[str, Any], *, compress: bool = True) -> bytes:
+    regions: list[bytes] = []
+    skeleton = json.dumps(_extract_regions(payload, regions), separators=(",", ":")).encode("utf-8")
+    flags, skeleton = _pack(skeleton, compress)
+    parts = [_HEADER.pack(SESSION_BLOB_MAGIC, SESSION_BLOB_CODEC_VERSION, SESSION_FORMAT_VERSION, flags, len(skeleton)), skeleton]
+    parts.append(_REGION_COUNT.pack(len(regions)))
+    for region in regions:
+        region_flags, stored = _pack(region, compress)
+        parts.append(_REGION.pack(region_flags, len(region), len(stored)))
+        parts.append(stored)
+    return b"".join(parts)
+
+
+def decode_session(blob: bytes | bytearray | memoryview) -> dict[str, Any]:
+    data = memoryview(blob)
+    if len(data) < _HEADER.size or not is_session_blob(data):
+        raise ValidationError("Not a binary session blob")
+    _magic, codec_version, format_version, flags, skeleton_size = _HEADER.unpack_from(data)
+    if codec_version != SESSION_BLOB_CODEC_VERSION:
+        raise ValidationError("Unsupported session blob codec", context={"codec_version": codec_version})
+    if format_version > SESSION_FORMAT_VERSION:
+        raise ValidationError(
+            "Session blob was written by a newer session format",
+            context={"session_format_version": format_version, "supported": SESSION_FORMAT_VERSION},
+        )
+    offset = _HEADER.size
+    skeleton = bytes(data[offset : offset + skeleton_size])
+    offset += skeleton_size
+    if flags & _FLAG_ZLIB:
+        skeleton = zlib.decompress(skeleton)
+    (count,) = _REGION_COUNT.unpack_from(data, offset)
+    offset += _REGION_COUNT.size
+    regions: list[bytes] = []
+    for _ in range(count):
+        region_flags, size, stored_size = _REGION.unpack_from(data, offset)
+        offset += _REGION.size
+        regions.append(_unpack(region_flags, bytes(data[offset : offset + stored_size]), size))
+        offset += stored_size
+    return _restore_regions(json.loads(skeleton), regions)
+
+
+@dataclass
+class SessionState:
+    """A session dict split into a JSON-normal skeleton and its memory regions keyed by path."""
+
+    skeleton: dict[str, Any]
+    regions: dict[str, bytes]
+
+
+def _split_blob(value: Any, path: str, regions: dict[str, bytes]) -> Any:
+    if isinstance(value, list):
+        return [_split_blob(item, f"{path}/{index}", regions) for index, item in enumerate(value)]
+    if isinstance(value, str) and len(value) >= _MIN_BLOB_CHARS:
+        data = _hex_bytes(value)
+        if data is not None:
+            regions[path] = data
+            return {_BLOB_KEY: path}
+    return value
+
+
+def _split_regions(node: dict[str, Any], path: str, regions: dict[str, bytes]) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for name, value in node.items():
+        child = f"{path}/{name}"
+        if isinstance(value, dict):
+            value = _split_regions(value, child, regions)
+        elif isinstance(name, str) and name.endswith("_hex"):
+            value = _split_blob(value, child, regions)
+        result[name] = value
+    return result
+
+
+def _join_blob(value: Any, regions: dict[str, bytes]) -> Any:
+    if isinstance(value, list):
+        return [_join_blob(item, regions) for item in value]
+    if isinstance(value, dict) and len(value) == 1 and _BLOB_KEY in value:
+        return regions[str(value[_BLOB_KEY])].hex()
+    return value
+
+
+def _join_regions(node: dict[str, Any], regions: dict[str, bytes]) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for name, value in node.items():
+        if name.endswith("_hex"):
+            value = _join_blob(value, regions)
+        elif isinstance(value, dict):
+            value = _join_regions(value, regions)
+        result[name] = value
+    return result
+
+
+def split_session(payload: dict[str, Any]) -> SessionState:
+    regions: dict[str, bytes] = {}
+    return SessionState(_split_regions(payload, "", regions), regions)
+
+
+def normalize_session(state: SessionState) -> SessionState:
+    """Return `state` shaped exactly as a reader decodes it (lists for tuples, string keys)."""
+    return SessionState(json.loads(json.dumps(state.skeleton, separators=(",", ":"))), state.regions)
+
+
+def join_session(state: SessionState) -> dict[str, Any]:
+    return _join_regions(state.skeleton, state.regions)
+
+
+def _list_shift(old: list[Any], new: list[Any]) -> tuple[int, list[Any]] | None:
+    """Return `(drop, appended)` when `new == old[drop:] + appended`, probing a few candidate offsets."""
+    if not old or not new:
+        return None
+    probes = 0
+    for drop in range(len(old)):
+        if old[drop] != new[0]:
+            continue
+        kept = len(old) - drop
+        if old[drop:] == new[:kept]:
+            return drop, new[kept:]
+        probes += 1
+        if probes >= _MAX_SHIFT_PROBES:
+            break
+    return None
+
+
+def _diff_node(old: dict[str, Any], new: dict[str, Any], path: list[str], delta: dict[str, list]) -> None:
+    for name, value in new.items():
+        if name not in old:
+            delta["set"].append([path + [name], value])
+            continue
+        previous = old[name]
+        if isinstance(value, dict) and isinstance(previous, dict):
+            _diff_node(previous, value, path + [name], delta)
+            continue
+        if previous == value:
+            continue
+        shift = _list_shift(previous, value) if isinstance(value, list) and isinstance(previous, list) else None
+        if shift is not None and (shift[0] or shift[1]):
+            delta["extend"].append([path + [name], shift[0], shift[1]])
+        else:
+            delta["set"].append([path + [name], value])
+    for name in old:
+        if name not in new:
+            delta["unset"].append(path + [name])
+
+
+def _changed_runs(old: bytes, new: bytes) -> list[tuple[int, bytes]]:
+    runs: list[tuple[int, bytes]] = []
+    start = None
+    for offset in range(0, len(new), _DELTA_PAGE_SIZE):
+        end = offset + _DELTA_PAGE_SIZE
+        if old[offset:end] != new[offset:end]:
+            if start is None:
+                start = offset
+        elif start is not None:
+            runs.append((start, new[start:offset]))
+            start = None
+    if start is not None:
+        runs.append((start, new[start:]))
+    return runs
+
+
+def diff_session(old: SessionState, new: SessionState) -> dict[str, list] | None:
+    delta: dict[str, list] = {"set": [], "unset": [], "extend": [], "regions": [], "drop_regions": []}
+    _diff_node(old.skeleton, new.skeleton, [], delta)
+    for name, data in new.regions.items():
+        previous = old.regions.get(name)
+        if previous == data:
+            continue
+        if previous is None or len(previous) != len(data):
+            delta["regions"].append([name, len(data), [(0, data)]])
+        else:
+            delta["regions"].append([name, len(data), _changed_runs(previous, data)])
+    delta["drop_regions"] = [name for name in old.regions if name not in new.regions]
+    return delta if any(delta.values()) else None
+
+
+def _container(root: dict[str, Any], path: list[str]) -> dict[str, Any]:
+    node = root
+    for name in path[:-1]:
+        node = node[name]
+    return node
+
+
+def apply_session_delta(state: SessionState, delta: dict[str, Any]) -> None:
+    for path, value in delta.get("set", []):
+        _container(state.skeleton, path)[path[-1]] = value
+    for path in delta.get("unset", []):
+        _container(state.skeleton, path).pop(path[-1], None)
+    for path, drop, appended in delta.get("extend", []):
+        container = _container(state.skeleton, path)
+        container[path[-1]] = container[path[-1]][drop:] + appended
+    for name, size, runs in delta.get("regions", []):
+        previous = state.regions.get(name)
+        data = bytearray(previous) if previous is not None and len(previous) == size else bytearray(size)
+        for offset, chunk in runs:
+            data[offset : offset + len(chunk)] = chunk
+        state.regions[name] = bytes(data)
+    for name in delta.get("drop_regions", []):
+        state.regions.pop(name, None)
+
+
+def _key_path(path: list[Any]) -> list[str]:
+    return [name if isinstance(name, str) else json.dumps(name) for name in path]
+
+
+def encode_session_delta(delta: dict[str, list], *, base_id: str, sequence: int) -> bytes:
+    chunks: list[bytes] = []
+    regions = []
+    for name, size, runs in delta["regions"]:
+        regions.append([name, size, [[offset, len(chunk)] for offset, chunk in runs]])
+        chunks.extend(chunk for _, chunk in runs)
+    operations = {
+        "set": [[_key_path(path), value] for path, value in delta["set"]],
+        "unset": [_key_path(path) for path in delta["unset"]],
+        "extend": [[_key_path(path), drop, appended] for path, drop, appended in delta["extend"]],
+        "regions": regions,
+        "drop_regions": delta["drop_regions"],
+        "base": base_id,
+        "seq": sequence,
+    }
+    skeleton_flags, skeleton = _pack(json.dumps(operations, separators=(",", ":")).encode("utf-8"), True)
+    pages = b"".join(chunks)
+    page_flags, stored_pages = _pack(pages, True)
+    flags = skeleton_flags | (_FLAG_PAGES_ZLIB if page_flags else 0)
+    header = _DELTA_HEADER.pack(SESSION_DELTA_MAGIC, SESSION_BLOB_CODEC_VERSION, flags, len(skeleton), len(stored_pages), len(pages))
+    return b"".join((header, skeleton, stored_pages))
+
+
+def decode_session_delta(blob: bytes | bytearray | memoryview) -> dict[str, Any]:
+    data = memoryview(blob)
+    if len(data) < _DELTA_HEADER.size or bytes(data[:4]) != SESSION_DELTA_MAGIC:
+        raise ValidationError("Not a session delta record")
+    _magic, codec_version, flags, skeleton_size, stored_size, pages_size = _DELTA_HEADER.unpack_from(data)
+    if codec_version != SESSION_BLOB_CODEC_VERSION:
+        raise ValidationError("Unsupported session delta codec", context={"codec_version": codec_version})
+    offset = _DELTA_HEADER.size
+    skeleton = bytes(data[offset : offset + skeleton_size])
+    if flags & _FLAG_ZLIB:
+        skeleton = zlib.decompress(skeleton)
+    offset += skeleton_size
+    pages = _unpack(_FLAG_ZLIB if flags & _FLAG_PAGES_ZLIB else 0, bytes(data[offset : offset + stored_size]), pages_size)
+    delta = json.loads(skeleton)
+    position = 0
+    regions = []
+    for name, size, runs in delta.get("regions", []):
+        chunks = []
+        for run_offset, length in runs:
+            chunks.append((int(run_offset), pages[position : position + length]))
+            position += length
+        regions.append([name, int(size), chunks])
+    delta["regions"] = regions
+    return delta
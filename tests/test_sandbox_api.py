@@ -1,4 +1,6 @@
 from api.index import app
+from sim8051 import InMemorySessionBackend, RedisSessionBackend, SessionStore
+from tests.test_sim8051_core import _FakeRedisClient
 
 
 def _read_first_sse_chunk(client, path: str) -> tuple[int, str]:
@@ -50,6 +52,51 @@ def test_v2_api_reports_structured_assembly_errors():
         assert payload["error"]["context"]["line"] == 1
 
 
+def test_v2_api_failed_request_does_not_keep_cached_session_changes():
+    app.testing = True
+    store = SessionStore(backend=RedisSessionBackend(client=_FakeRedisClient(), fallback=InMemorySessionBackend(), serialization="binary"))
+    previous = app.extensions.get("hexlogic_session_store")
+    app.extensions["hexlogic_session_store"] = store
+
+    try:
+        with app.test_client() as client:
+            assert client.post("/api/v2/assemble", json={"code": "MOV A,#01H\nEND"}).status_code == 200
+            assert client.post("/api/v2/assemble", json={"code": "MOVX @DPTR\nEND"}).status_code == 400
+            state = client.get("/api/v2/state").get_json()
+
+            assert state["source_code"] == "MOV A,#01H\nEND"
+    finally:
+        app.extensions["hexlogic_session_store"] = previous
+
+
+def test_v2_api_unexpected_error_does_not_keep_cached_session_changes():
+    app.testing = True
+    store = SessionStore(backend=RedisSessionBackend(client=_FakeRedisClient(), fallback=InMemorySessionBackend(), serialization="binary"))
+    previous = app.extensions.get("hexlogic_session_store")
+    app.extensions["hexlogic_session_store"] = store
+
+    try:
+        with app.test_client() as client:
+            session_id = client.post("/api/v2/assemble", json={"code": "MOV A,#01H\nEND"}).get_json()["session_id"]
+            cached = store.get(session_id)
+
+            def _fail():
+                cached.source_code = "half-applied"
+                raise RuntimeError("unexpected")
+
+            cached.step = _fail
+            try:
+                client.post("/api/v2/step")
+            except RuntimeError:
+                pass
+            state = client.get("/api/v2/state").get_json()
+
+            assert state["source_code"] == "MOV A,#01H\nEND"
+            assert store.get(session_id) is not cached
+    finally:
+        app.extensions["hexlogic_session_store"] = previous
+
+
 def test_v2_api_validates_input_ranges():
     app.testing = True
 
@@ -61,6 +108,13 @@ def test_v2_api_validates_input_ranges():
         assert payload["error"]["type"] == "validation"
         assert payload["error"]["context"]["field"] == "port"
 
+        assert client.post("/api/v2/assemble", json={"code": "MOV A,#01H\nEND"}).status_code == 200
+        response = client.post("/api/v2/run", json={"max_steps": 4, "capture": "Trace"})
+
+        assert response.status_code == 400
+        assert response.get_json()["error"]["context"] == {"supported": ["full", "compact", "counters"], "provided": "trace"}
+        assert client.post("/api/v2/run", json={"max_steps": 4, "capture": "COUNTERS"}).status_code == 200
+
 
 def test_v2_api_supports_architecture_switch_endian_debug_and_metrics():
     app.testing = True
@@ -1,4 +1,9 @@
+import contextvars
+import json
+
 from sim8051 import (
+    SESSION_FORMAT_VERSION,
+    AssemblyError,
     BaseCPU,
     Assembler8051,
     AssemblerARM,
@@ -11,8 +16,11 @@ from sim8051 import (
     architecture_metadata,
     register_plugin,
 )
+from sim8051.batch import BatchJob, run_batch, run_program
 from sim8051.model import ProgramImage, TraceEntry, Watchpoint
-from sim8051.memory import MemoryMap
+from sim8051.memory import MemoryMap, PortState, SFR_ADDRESSES
+import sim8051.session as session_module
+from sim8051.session import set_snapshot_tokens
 
 
 def test_two_pass_assembler_resolves_relative_branch_and_call_pages():
@@ -124,6 +132,23 @@ def test_timer0_mode1_sets_tf0_and_triggers_interrupt_vector():
     assert any(entry.interrupt == "T0" for entry in cpu.debugger.trace)
 
 
+def test_pending_interrupts_resolve_by_priority_then_interrupt_order():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble("NOP\nNOP\nNOP\nEND")
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+    cpu.memory.write_sfr("IE", 0x8F)
+    cpu.memory.write_sfr("TCON", 0xA0)
+
+    assert cpu._pending_interrupt() == ("T0", 0x000B)
+
+    cpu.memory.write_named_bit("PT1", 1)
+
+    assert cpu._pending_interrupt() == ("T1", 0x001B)
+    assert cpu.step().interrupt == "T1"
+    assert cpu._pending_interrupt() is None
+
+
 def test_timer0_interrupt_entry_charges_two_machine_cycles_before_first_isr_instruction():
     assembler = Assembler8051(code_size=0x1000)
     program = assembler.assemble(
@@ -560,6 +585,20 @@ def test_timer2_baud_mode_forces_auto_reload_even_if_cp_rl2_is_set():
     assert cpu.memory.read_sfr("TL2") == 0x34
 
 
+def test_timer0_mode2_large_tick_counts_reloads_arithmetically():
+    cpu = CPU8051(code_size=0x1000)
+    cpu.memory.write_sfr("TMOD", 0x02)
+    cpu.memory.write_sfr("TH0", 0x9C)
+    cpu.memory.write_sfr("TL0", 0x00)
+    cpu.memory.write_sfr("TCON", 0x10)
+
+    overflows = cpu._tick_timer_mode(0, 1_000_000)
+
+    assert overflows == 1 + (1_000_000 - 0x100) // 100
+    assert cpu.memory.read_sfr("TL0") == 0x9C + (1_000_000 - 0x100) % 100
+    assert cpu._get_flag("TF0") == 1
+
+
 def test_8051_fast_realtime_slice_collapses_djnz_spin_loop():
     assembler = Assembler8051(code_size=0x1000)
     program = assembler.assemble(
@@ -585,6 +624,219 @@ def test_8051_fast_realtime_slice_collapses_djnz_spin_loop():
     assert cpu.pc == 0x0004
 
 
+def test_8051_fast_realtime_slice_runs_compiled_basic_blocks_until_port_write():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV R0,#30H
+        MOV R2,#04H
+        FILL:
+        MOV A,R2
+        ADD A,#03H
+        MOV @R0,A
+        INC R0
+        DJNZ R2,FILL
+        CPL P1.0
+        SJMP $
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+
+    burst = cpu.try_fast_realtime_slice(max_steps=64, max_cycles=128)
+
+    assert burst is not None
+    assert burst["steps"] == 23
+    assert burst["cycles"] == 28
+    assert burst["hardware_sync"] is True
+    assert [cpu.memory.read_direct(address) for address in range(0x30, 0x34)] == [0x07, 0x06, 0x05, 0x04]
+    assert cpu.memory.read_sfr("P1") == 0xFE
+    assert cpu.pc == 0x000D
+
+
+def test_8051_compact_steps_defer_timer_updates_until_counter_is_read():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV TMOD,#01H
+        SETB TR0
+        NOP
+        NOP
+        NOP
+        MOV A,TL0
+        SJMP $
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+
+    for _ in range(5):
+        cpu.step_compact_payload()
+
+    assert cpu.memory.sfr[SFR_ADDRESSES["TL0"] - 0x80] == 0x00
+    assert cpu._deferred_peripheral_cycles == 4
+
+    cpu.step_compact_payload()
+
+    assert cpu.a == 0x04
+    assert cpu.memory.read_sfr("TL0") == 0x05
+
+
+def test_8051_fast_realtime_slice_skips_to_timer_overflow_in_polling_loop():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV TMOD,#01H
+        MOV TH0,#0FFH
+        MOV TL0,#00H
+        SETB TR0
+        WAIT:
+        JNB TF0,WAIT
+        NOP
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+    for _ in range(4):
+        cpu.step()
+
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+
+    assert burst is not None
+    assert burst["steps"] == 128
+    assert burst["cycles"] == 256
+    assert cpu.pc == 0x000B
+    assert cpu._get_flag("TF0") == 1
+    assert cpu.memory.read_sfr("TH0") == 0x00
+    assert cpu.memory.read_sfr("TL0") == 0x01
+    assert cpu.memory.read_code(cpu.pc) == 0x30
+
+
+def test_8051_fast_realtime_slice_stops_exactly_at_breakpoints():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        LOOP:
+        INC A
+        MOV R1,A
+        HIT:
+        INC R2
+        MOV R7,#10
+        DJNZ R7,$
+        SJMP LOOP
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+    cpu.set_breakpoints([program.labels["HIT"], program.labels["HIT"] + 3])
+
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+
+    assert burst is not None
+    assert burst["steps"] == 2
+    assert cpu.pc == program.labels["HIT"]
+    assert cpu._active_breakpoint()
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+    assert burst["steps"] == 2
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+    assert burst["steps"] == 1
+    assert cpu.pc == program.labels["HIT"] + 3
+
+    cpu.set_breakpoints([])
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+    assert burst["steps"] == 9
+    assert cpu._read_r(7) == 0
+
+
+def test_8051_fast_realtime_slice_stops_at_timer_interrupt_when_ea_is_set():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        LJMP MAIN
+        ORG 000BH
+        INC R5
+        RETI
+        ORG 0030H
+        MAIN:
+        MOV TMOD,#02H
+        MOV TH0,#0F0H
+        MOV TL0,#0F0H
+        SETB ET0
+        SETB EA
+        SETB TR0
+        SJMP $
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+    for _ in range(7):
+        cpu.step()
+
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+
+    assert burst is not None
+    assert burst["steps"] == 8
+    assert burst["cycles"] == 16
+    assert cpu._get_flag("TF0") == 1
+    assert cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000) is None
+    trace = cpu.step()
+    assert trace.interrupt == "T0"
+    assert trace.pc == 0x000B
+    assert cpu._read_r(5) == 1
+
+
+def test_8051_port_reads_are_coalesced_and_expanded_per_pin_on_snapshot():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV A,P1
+        MOV A,P1
+        MOV A,P3
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+    cpu.set_pin(1, 0, 0)
+
+    cpu.run(max_steps=3)
+
+    assert [(address, value) for address, value, _cycles in cpu._port_reads] == [(0x90, 0xFE), (0xB0, 0xFF)]
+    delta = cpu.hardware_tick_snapshot()["io_reads_delta"]
+    assert len(delta) == 16
+    assert delta[0] == {"signal": "P1.0", "value": 0, "time_ms": round(1 / cpu.effective_clock_hz() * 1000.0, 6), "source": "cpu"}
+    assert delta[8]["signal"] == "P3.0"
+    assert cpu.hardware_tick_snapshot() == {}
+
+    restored = CPU8051(code_size=0x1000)
+    restored.load_state(cpu.serialize_state())
+    assert restored.io_reads == cpu.io_reads
+
+
+def test_8051_code_edit_invalidates_predecoded_instruction():
+    session = SimulatorSession(session_id="predecode-8051")
+    session.assemble("MOV A,#01H\nMOV A,#02H\nSJMP $\nEND")
+    session.step()
+    session.edit_memory(space="code", address=0x0003, value=0x55)
+
+    trace = session.cpu.step()
+
+    assert trace.mnemonic == "MOV A,#0x55"
+    assert trace.bytes_ == [0x74, 0x55]
+    assert session.cpu.a == 0x55
+
+
 def test_session_store_isolates_simulator_instances():
     store = SessionStore()
     first = store.create()
@@ -693,6 +945,61 @@ def test_memory_map_read16_write16_supports_endian_switching():
     assert memory.read_xram(0x21) == 0x34
 
 
+def test_memory_map_word_accessors_match_byte_path_and_journal_each_byte():
+    memory = MemoryMap(code_size=0x100, xram_size=0x100)
+    memory.load_rom(0xFC, bytes([0x01, 0x02, 0x03, 0x04]))
+    memory.consume_changes()
+    memory.write_xram32(0x40000008, 0x11223344, "big")
+    memory.write_xram32(0x10, 0x000000AA, "little")
+    memory.write_xram32(0x10, 0x000000AA, "little")
+
+    assert memory.read_code32(0xFC, "little") == memory.read32(0xFC, space="code", endian="little") == 0x04030201
+    assert memory.read_code32(0xFC, "big") == 0x01020304
+    assert memory.read_xram32(0x08, "big") == 0x11223344
+    assert memory.read_xram32(0x40000008, "little") == 0x44332211
+    assert memory.consume_changes() == {
+        "xram": [(0x08, 0x00, 0x11), (0x09, 0x00, 0x22), (0x0A, 0x00, 0x33), (0x0B, 0x00, 0x44), (0x10, 0x00, 0xAA)]
+    }
+
+
+def test_port_state_tracks_resolved_pins_across_latch_and_input_changes():
+    port = PortState()
+    port.latch = 0x0F
+    assert port.read_pin() == 0x0F
+
+    port.set_input(7, 1)
+    port.set_input(0, 0)
+    assert port.read_pin() == 0x8E
+    assert port.read_pin_bit(7) == 1
+    assert port.read_pin_bit(0) == 0
+
+    port.set_input(0, None)
+    port.latch = 0x00
+    assert port.read_pin() == 0x80
+    assert port == PortState(latch=0x00, external_mask=0x80, external_value=0xFF)
+
+
+def test_memory_map_change_views_survive_journal_reuse():
+    memory = MemoryMap(code_size=0x100, xram_size=0x2000)
+    window = memory.open_change_window()
+    first = memory.consume_change_view()
+    assert not first
+
+    memory.write_xram(0x10, 0x01)
+    memory.write_direct(0x30, 0x02)
+    first = memory.consume_change_view()
+    for address in range(0x1800):
+        memory.write_xram(address, 0xAA)
+        memory.consume_change_view()
+    memory.write_direct(0xE0, 0x05)
+
+    assert first == {"iram": [(0x30, 0x00, 0x02)], "xram": [(0x10, 0x00, 0x01)]}
+    assert memory.consume_changes() == {"sfr": [(0xE0, 0x00, 0x05)]}
+    changes = window.close()
+    assert len(changes["xram"]) == 0x1801
+    assert changes["sfr"] == [(0xE0, 0x00, 0x05)]
+
+
 def test_arm_cpu_executes_minimal_program_with_branch_and_memory_access():
     assembler = AssemblerARM(code_size=0x200, endian="little")
     program = assembler.assemble(
@@ -722,6 +1029,89 @@ def test_arm_cpu_executes_minimal_program_with_branch_and_memory_access():
     assert cpu.memory.read32(0, space="xram", endian="little") == 16
 
 
+def test_arm_predecoded_instructions_are_reused_and_invalidated_by_code_writes():
+    program = AssemblerARM(code_size=0x100, endian="little").assemble("MOV R0, #1\nADD R0, R0, #2\nMOV R1, #7\nEND")
+    patch = AssemblerARM(code_size=0x100, endian="little").assemble("SUB R0, R0, #1")
+    cpu = CPUARM(code_size=0x100, data_size=0x100, endian="little")
+    cpu.load_program(program)
+    first = [cpu.step().mnemonic for _ in range(2)]
+    cached = cpu._decode_at(4)
+
+    cpu.memory.load_rom(4, patch.rom[:4])
+    cpu._set_pc(0)
+    second = [cpu.step().mnemonic for _ in range(3)]
+
+    assert first == ["MOV R0,#0x00000001", "ADD R0,R0,#0x00000002"]
+    assert cpu._decode_at(4) is not cached
+    assert second == ["MOV R0,#0x00000001", "SUB R0,R0,#0x00000001", "MOV R1,#0x00000007"]
+    assert cpu.registers[0] == 0
+
+
+def test_arm_fast_realtime_slice_runs_register_loops_like_single_steps():
+    source = """
+        MOV R0, #40
+        MOV R1, #3
+        LOOP:
+        ADD R2, R2, R1
+        EOR R3, R2, R0
+        SUBS R0, R0, #1
+        BNE LOOP
+        MOV R4, #1
+        END
+        """.strip()
+    program = AssemblerARM(code_size=0x100, endian="little").assemble(source)
+    stepped = CPUARM(code_size=0x100, data_size=0x100, endian="little")
+    stepped.load_program(program)
+    for _ in range(2 + 40 * 4):
+        stepped.step()
+    cpu = CPUARM(code_size=0x100, data_size=0x100, endian="little")
+    cpu.load_program(program)
+    cpu.set_debug_mode(False)
+    cpu.step()
+    cpu.step()
+
+    burst = cpu.try_fast_realtime_slice(max_steps=1000, max_cycles=1000)
+
+    assert burst is not None
+    assert burst["steps"] == 40 * 4
+    assert cpu.cycles == stepped.cycles
+    assert cpu.pc == stepped.pc == program.labels["LOOP"] + 16
+    assert cpu.registers == stepped.registers
+    assert (cpu.flag_n, cpu.flag_z, cpu.flag_c, cpu.flag_v) == (stepped.flag_n, stepped.flag_z, stepped.flag_c, stepped.flag_v)
+    assert cpu.registers[4] == 0
+
+
+def test_counters_capture_executes_like_payload_steps_without_returning_them():
+    programs = [
+        (
+            lambda: CPU8051(code_size=0x1000),
+            Assembler8051(code_size=0x1000).assemble("MOV DPTR,#0010H\nMOV R7,#8\nLOOP: INC A\nMOVX @DPTR,A\nINC DPTR\nDJNZ R7,LOOP\nEND"),
+        ),
+        (
+            lambda: CPUARM(code_size=0x100, data_size=0x100, endian="little"),
+            AssemblerARM(code_size=0x100, endian="little").assemble(
+                "MOV R0, #0\nMOV R1, #5\nLOOP:\nSTR R1, [R0, #0x20]\nADD R0, R0, #4\nSUBS R1, R1, #1\nBNE LOOP\nEND"
+            ),
+        ),
+    ]
+    for factory, program in programs:
+        payload_cpu, counters_cpu = factory(), factory()
+        windows = []
+        for cpu in (payload_cpu, counters_cpu):
+            cpu.load_program(program)
+            windows.append(cpu.memory.open_change_window())
+
+        payloads = [payload_cpu.step_compact_payload() for _ in range(20)]
+        counters = [counters_cpu.step_counters() for _ in range(20)]
+
+        assert all(isinstance(item, dict) for item in payloads)
+        assert counters == [None] * 20
+        assert (counters_cpu.pc, counters_cpu.cycles) == (payload_cpu.pc, payload_cpu.cycles)
+        assert counters_cpu.snapshot()["registers"] == payload_cpu.snapshot()["registers"]
+        assert windows[1].close() == windows[0].close()
+        assert not counters_cpu.debugger.trace
+
+
 def test_arm_big_endian_memory_access_round_trips_value():
     assembler = AssemblerARM(code_size=0x100, endian="big")
     program = assembler.assemble(
@@ -858,7 +1248,40 @@ def test_session_round_trip_preserves_arm_state_and_program():
     assert restored.cpu.registers[:3] == session.cpu.registers[:3]
 
 
+def test_incremental_snapshot_sends_only_changed_pages_and_new_trace_entries():
+    session = SimulatorSession(session_id="incremental")
+    session.assemble("MOV DPTR,#0010H\nMOV A,#5AH\nMOVX @DPTR,A\nINC A\nEND")
+    first = session.snapshot(memory_since="")
+
+    assert first["memory"]["full"] is True
+    assert "iram" not in first and "trace" not in first
+    assert set(first["memory"]["regions"]) == {"iram", "sfr", "code", "xram"}
+
+    session.step()
+    session.step()
+    session.step()
+    second = session.snapshot(memory_since=first["memory"]["version"], trace_since=first["trace_delta"]["version"])
+
+    assert second["memory"]["full"] is False
+    assert set(second["memory"]["regions"]) == {"sfr", "xram"}
+    assert second["memory"]["regions"]["xram"]["pages"] == [[0, "00" * 0x10 + "5a" + "00" * 0x0F]]
+    assert [entry["mnemonic"] for entry in second["trace_delta"]["entries"]] == ["MOV DPTR,#0x0010", "MOV A,#0x5A", "MOVX @DPTR,A"]
+
+    restored = SimulatorSession.from_dict(session.to_dict())
+    session.step_back()
+    restored.step()
+    third = restored.snapshot(memory_since=second["memory"]["version"], trace_since=second["trace_delta"]["version"])
+
+    assert set(third["memory"]["regions"]) == {"sfr"}
+    assert [entry["mnemonic"] for entry in third["trace_delta"]["entries"]] == ["INC A"]
+    assert session.snapshot(memory_since=second["memory"]["version"], trace_since=second["trace_delta"]["version"])["trace_delta"]["full"] is True
+    requested = contextvars.copy_context().run(lambda: set_snapshot_tokens("", None) or session.snapshot())
+    assert requested["memory"]["full"] is True
+    assert "iram" in session.snapshot() and "memory" not in session.snapshot()
+
+
 class _FakeRedisClient:
+    # Like redis-py with decode_responses=False: strings are stored and returned as UTF-8 bytes.
     def __init__(self):
         self.storage = {}
         self.expirations = {}
@@ -867,7 +1290,7 @@ class _FakeRedisClient:
         return self.storage.get(key)
 
     def setex(self, key, ttl, value):
-        self.storage[key] = value
+        self.storage[key] = value.encode("utf-8") if isinstance(value, str) else value
         self.expirations[key] = ttl
 
     def delete(self, key):
@@ -878,6 +1301,28 @@ class _FakeRedisClient:
         if key in self.storage:
             self.expirations[key] = ttl
 
+    def incr(self, key):
+        self.storage[key] = int(self.storage.get(key, 0)) + 1
+        return self.storage[key]
+
+    def rpush(self, key, value):
+        self.storage.setdefault(key, []).append(value)
+
+    def lrange(self, key, start, end):
+        return list(self.storage.get(key, []))
+
+    def eval(self, script, numkeys, *args):
+        # Emulates the conditional delta append script run by the delta serialization.
+        (delta_key, version_key), (expected, record, ttl) = args[:numkeys], args[numkeys:]
+        if int(self.storage.get(version_key, 0)) != int(expected):
+            return 0
+        if record:
+            self.rpush(delta_key, record)
+            self.expire(delta_key, ttl)
+        version = self.incr(version_key)
+        self.expire(version_key, ttl)
+        return version
+
     def scan_iter(self, match=None):
         prefix = (match or "").rstrip("*")
         for key in list(self.storage):
@@ -902,6 +1347,173 @@ def test_redis_session_backend_round_trips_serialized_sessions():
     assert backend.get("redis-session") is None
 
 
+def test_redis_session_backend_binary_format_round_trips_and_reads_json_sessions():
+    client = _FakeRedisClient()
+    session = SimulatorSession(session_id="binary-session")
+    session.assemble("MOV DPTR,#0200H\nMOV A,#7EH\nMOVX @DPTR,A\nEND")
+    for _ in range(3):
+        session.step()
+    RedisSessionBackend(client=client, fallback=InMemorySessionBackend()).save(session)
+    backend = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="binary")
+
+    legacy = backend.get("binary-session")
+    backend.save(legacy)
+    blob = client.storage["hexlogic:session:binary-session"]
+    restored = backend.get("binary-session")
+
+    assert blob[:4] == b"HXSB"
+    assert int.from_bytes(blob[5:7], "big") == SESSION_FORMAT_VERSION
+    assert len(blob) * 10 < len(json.dumps(session.to_dict()))
+    assert restored.cpu.memory.read_xram(0x0200) == 0x7E
+    assert restored.cpu.dptr == 0x0200
+    assert restored.program.intel_hex == session.program.intel_hex
+    assert [item.mnemonic for item in restored.cpu.debugger.trace] == [item.mnemonic for item in session.cpu.debugger.trace]
+
+
+def test_redis_session_backend_switches_between_json_and_binary_with_raw_responses():
+    client = _FakeRedisClient()
+    json_backend = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), cache_size=0)
+    binary_backend = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="binary", cache_size=0)
+    session = SimulatorSession(session_id="switching-session")
+    session.assemble("MOV A,#01H\nINC A\nINC A\nEND")
+    session.step()
+    json_backend.save(session)
+
+    from_json = binary_backend.get("switching-session")
+    loaded_from_json = from_json.cpu.a
+    from_json.step()
+    binary_backend.save(from_json)
+    from_binary = json_backend.get("switching-session")
+    loaded_from_binary = from_binary.cpu.a
+    from_binary.step()
+    json_backend.save(from_binary)
+
+    assert (loaded_from_json, loaded_from_binary) == (0x01, 0x02)
+    assert client.storage["hexlogic:session:switching-session"][:1] == b"{"
+    assert binary_backend.get("switching-session").cpu.a == 0x03
+
+    calls = []
+
+    class _RedisFactory:
+        @staticmethod
+        def from_url(url, **options):
+            calls.append(options)
+            return client
+
+    original = session_module.redis_module
+    session_module.redis_module = type("redis", (), {"Redis": _RedisFactory})
+    try:
+        for serialization in ("json", "binary", "delta"):
+            RedisSessionBackend(redis_url="redis://localhost:6379/0", serialization=serialization)
+    finally:
+        session_module.redis_module = original
+
+    assert calls == [{"decode_responses": False}] * 3
+
+
+def test_redis_session_backend_delta_format_appends_small_records_and_compacts():
+    client = _FakeRedisClient()
+    backend = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta", delta_compact_every=4)
+    session = SimulatorSession(session_id="delta-session")
+    session.assemble("MOV DPTR,#0200H\nLOOP: INC R0\nMOV A,R0\nMOVX @DPTR,A\nINC DPTR\nSJMP LOOP\nEND")
+    for _ in range(100):
+        session.step()
+    backend.save(session)
+    base = client.storage["hexlogic:session:delta-session"]
+
+    for _ in range(4):
+        session = backend.get("delta-session")
+        session.step()
+        backend.save(session)
+    deltas = client.storage["hexlogic:session:delta-session:deltas"]
+    reader = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta", delta_compact_every=4, cache_size=0)
+    restored = reader.get("delta-session")
+
+    assert len(deltas) == 4
+    assert max(len(record) for record in deltas) * 4 < len(base)
+    assert restored.cpu.pc == session.cpu.pc
+    assert [restored.cpu.memory.read_xram(0x0200 + offset) for offset in range(32)] == [
+        session.cpu.memory.read_xram(0x0200 + offset) for offset in range(32)
+    ]
+    assert restored.cpu.memory.read_xram(0x0200) == 0x01
+    assert [item.mnemonic for item in restored.cpu.debugger.trace] == [item.mnemonic for item in session.cpu.debugger.trace]
+    assert backend.count() == 1
+
+    reader.save(restored)
+
+    assert "hexlogic:session:delta-session:deltas" not in client.storage
+    assert client.storage["hexlogic:session:delta-session"] != base
+    assert reader.get("delta-session").cpu.pc == restored.cpu.pc
+
+
+def test_redis_session_backend_delta_format_keeps_last_writer_when_workers_save_concurrently():
+    client = _FakeRedisClient()
+    session = SimulatorSession(session_id="racing-session")
+    session.assemble("LOOP: INC A\nSJMP LOOP\nEND")
+    RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta").save(session)
+    first = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta")
+    second = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta")
+    reader = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="delta", cache_size=0)
+    mine = first.get("racing-session")
+    theirs = second.get("racing-session")
+
+    mine.step()
+    first.save(mine)
+    for _ in range(3):
+        theirs.step()
+    second.save(theirs)
+
+    assert reader.get("racing-session").cpu.a == theirs.cpu.a == 2
+
+    theirs.step()
+    second.save(theirs)
+
+    restored = reader.get("racing-session")
+    assert (restored.cpu.a, restored.cpu.pc, restored.cpu.cycles) == (theirs.cpu.a, theirs.cpu.pc, theirs.cpu.cycles)
+    assert len(client.storage["hexlogic:session:racing-session:deltas"]) == 1
+
+
+def test_redis_session_backend_reuses_cached_sessions_until_another_worker_saves():
+    client = _FakeRedisClient()
+    worker = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="binary")
+    other = RedisSessionBackend(client=client, fallback=InMemorySessionBackend(), serialization="binary")
+    session = SimulatorSession(session_id="cached-session")
+    session.assemble("MOV A,#01H\nINC A\nEND")
+    worker.save(session)
+    client.storage["hexlogic:session:cached-session"] = b"not a session"
+
+    assert worker.get("cached-session") is session
+
+    session.step()
+    other.save(session)
+    reloaded = worker.get("cached-session")
+
+    assert reloaded is not session
+    assert reloaded.cpu.a == 0x01
+    assert worker.get("cached-session") is reloaded
+    assert worker.count() == 1
+
+
+def test_session_store_discard_drops_cached_session_changed_by_failed_request():
+    store = SessionStore(backend=RedisSessionBackend(client=_FakeRedisClient(), fallback=InMemorySessionBackend(), serialization="binary"))
+    session = store.create()
+    session.assemble("MOV A,#01H\nEND")
+    session.step()
+    store.save(session)
+
+    failed = store.get(session.session_id)
+    try:
+        failed.assemble("MOVX @DPTR\nEND")
+    except AssemblyError:
+        store.discard(session.session_id)
+    restored = store.get(session.session_id)
+
+    assert failed.source_code == "MOVX @DPTR\nEND"
+    assert restored is not failed
+    assert restored.source_code == "MOV A,#01H\nEND"
+    assert restored.cpu.a == 0x01
+
+
 def test_step_back_reverses_8051_execution_delta():
     session = SimulatorSession(session_id="rewind-8051")
     session.assemble("MOV A,#01H\nINC A\nEND")
@@ -929,6 +1541,61 @@ def test_step_back_reverses_arm_execution_delta():
     assert response["state"]["registers"]["R1"] == 12
 
 
+def test_step_back_replays_from_checkpoints_with_logged_pin_inputs():
+    session = SimulatorSession(session_id="rewind-deep")
+    session.assemble("LOOP: MOV A,P1\nADD A,30H\nMOV 30H,A\nINC R0\nSJMP LOOP\nEND")
+    cpu = session.cpu
+    cpu.debugger.history.interval = 64
+    snapshots = []
+    for index in range(900):
+        if index % 50 == 0:
+            cpu.set_pin(1, 0, (index // 50) % 2)
+        snapshots.append((cpu.pc, cpu.cycles, bytes(cpu.memory.iram_low), bytes(cpu.memory.sfr)))
+        session.step()
+
+    for _ in range(800):
+        assert session.step_back()["reason"] == "step_back"
+
+    assert (cpu.pc, cpu.cycles, bytes(cpu.memory.iram_low), bytes(cpu.memory.sfr)) == snapshots[100]
+    assert session.snapshot()["history_depth"] == 100
+
+
+def test_step_back_depth_survives_session_round_trip():
+    session = SimulatorSession(session_id="rewind-persisted")
+    session.assemble("LOOP: MOV A,P1\nADD A,30H\nMOV 30H,A\nINC R0\nSJMP LOOP\nEND")
+    snapshots = []
+    for index in range(2100):
+        if index % 50 == 0:
+            session.cpu.set_pin(1, 0, (index // 50) % 2)
+        snapshots.append((session.cpu.pc, session.cpu.cycles, bytes(session.cpu.memory.iram_low)))
+        session.step()
+
+    restored = SimulatorSession.from_bytes(SimulatorSession.from_dict(session.to_dict()).to_bytes())
+    depth = restored.snapshot()["history_depth"]
+    for _ in range(600):
+        assert restored.step_back()["reason"] == "step_back"
+
+    assert depth == 2100 - 1024
+    cpu = restored.cpu
+    assert (cpu.pc, cpu.cycles, bytes(cpu.memory.iram_low)) == snapshots[1500]
+
+
+def test_session_reverse_continue_stops_at_latest_breakpoint_hit():
+    session = SimulatorSession(session_id="reverse-continue")
+    session.assemble("LOOP: INC A\nMOV 30H,A\nSJMP LOOP\nEND")
+    for _ in range(30):
+        session.step()
+    session.set_breakpoints([0x0001])
+
+    response = session.reverse_continue()
+
+    assert response["reason"] == "breakpoint"
+    assert response["steps"] == 2
+    assert response["state"]["registers"]["A"] == 10
+    assert session.reverse_continue()["steps"] == 3
+    assert session.reverse_continue()["state"]["registers"]["A"] == 8
+
+
 def test_8051_bit_addressed_instructions_and_rotation_aliases_work_with_numeric_bits():
     assembler = Assembler8051()
     program = assembler.assemble(
@@ -958,6 +1625,63 @@ def test_8051_bit_addressed_instructions_and_rotation_aliases_work_with_numeric_
     assert cpu.memory.read_bit(0x20) == 0
 
 
+def test_8051_add_addc_subb_update_psw_flags_from_tables():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV A,#7FH
+        ADD A,#01H
+        MOV A,#0FFH
+        SETB C
+        ADDC A,#00H
+        MOV A,#10H
+        SETB C
+        SUBB A,#20H
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+
+    cpu.run(max_steps=2)
+    assert cpu.a == 0x80
+    assert [cpu._get_flag(name) for name in ("CY", "AC", "OV", "P")] == [0, 1, 1, 1]
+
+    cpu.run(max_steps=3)
+    assert cpu.a == 0x00
+    assert [cpu._get_flag(name) for name in ("CY", "AC", "OV", "P")] == [1, 1, 0, 0]
+
+    cpu.run(max_steps=3)
+    assert cpu.a == 0xEF
+    assert [cpu._get_flag(name) for name in ("CY", "AC", "OV", "P")] == [1, 1, 0, 1]
+
+
+def test_8051_register_diff_follows_bank_switch_and_net_changes():
+    assembler = Assembler8051(code_size=0x1000)
+    program = assembler.assemble(
+        """
+        ORG 0000H
+        MOV R0,#11H
+        MOV 08H,#22H
+        SETB RS0
+        INC A
+        DEC A
+        END
+        """.strip()
+    )
+    cpu = CPU8051(code_size=0x1000)
+    cpu.load_program(program)
+
+    assert cpu.step().register_diff == {"PC": {"before": 0x0000, "after": 0x0002}, "R0": {"before": 0x00, "after": 0x11}}
+    assert cpu.step().register_diff == {"PC": {"before": 0x0002, "after": 0x0005}}
+    bank_switch = cpu.step().register_diff
+    assert bank_switch["PSW"] == {"before": 0x00, "after": 0x08}
+    assert bank_switch["R0"] == {"before": 0x11, "after": 0x22}
+    assert set(cpu.step().register_diff) == {"A", "PC", "PSW"}
+    assert cpu.step().register_diff["A"] == {"before": 0x01, "after": 0x00}
+
+
 def test_8051_djnz_and_cjne_follow_coursework_control_flow():
     assembler = Assembler8051()
     program = assembler.assemble(
@@ -1154,6 +1878,48 @@ def test_conditional_breakpoint_stops_only_when_condition_matches():
     assert cpu.a == 0x01
 
 
+def test_conditional_breakpoint_honours_ignore_count_and_memory_operands():
+    assembler = Assembler8051()
+    program = assembler.assemble("LOOP: INC A\nMOV 30H,A\nSJMP LOOP\nEND")
+    cpu = CPU8051()
+    cpu.load_program(program)
+    cpu.set_breakpoints([{"pc": 0x0001, "condition": "IRAM[0x30] & 1 and not CY", "ignore_count": 2}])
+
+    result = cpu.run(max_steps=64)
+    resumed = cpu.run(max_steps=64)
+
+    assert result.reason == "breakpoint"
+    assert cpu.debugger.breakpoints[0x0001].hit_count == 3
+    assert cpu.memory.iram_low[0x30] == 5 and cpu.a == 6
+    assert resumed.reason == "breakpoint" and not resumed.steps
+
+
+def test_arm_conditional_breakpoint_reads_registers_and_aliases():
+    program = AssemblerARM(code_size=0x100, endian="little").assemble("MOV R1, #0\nMOV SP, #0x80\nLOOP:\nADD R1, R1, #1\nB LOOP\nEND")
+    cpu = CPUARM(code_size=0x100, data_size=0x100, endian="little")
+    cpu.load_program(program)
+    cpu.set_breakpoints([{"pc": 0x0008, "condition": "R1 == 3 and SP == R13 == 0x80 and LR == 0 and PC == 8"}])
+
+    result = cpu.run(max_steps=64)
+
+    assert result.reason == "breakpoint"
+    assert cpu.pc == 0x0008
+    assert cpu.registers[1] == 3
+
+
+def test_breakpoint_condition_memory_reads_do_not_fire_read_watchpoints():
+    program = Assembler8051().assemble("MOV 40H,#63H\nLOOP: INC A\nNOP\nSJMP LOOP\nEND")
+    cpu = CPU8051()
+    cpu.load_program(program)
+    cpu.set_watchpoints([Watchpoint(target=0x40, space="iram", access="read")])
+    cpu.set_breakpoints([{"pc": program.labels["LOOP"] + 1, "condition": "IRAM[0x40] == 99 and A == 3 and SFR[0x90] == 0xFF"}])
+
+    result = cpu.run(max_steps=64)
+
+    assert result.reason == "breakpoint"
+    assert cpu.pc == program.labels["LOOP"] + 1 and cpu.a == 3
+
+
 def test_register_watchpoint_triggers_on_register_diff():
     assembler = Assembler8051()
     program = assembler.assemble("MOV A,#01H\nEND")
@@ -1167,6 +1933,28 @@ def test_register_watchpoint_triggers_on_register_diff():
     assert cpu.a == 0x01
 
 
+def test_memory_watchpoint_range_honours_value_condition_and_reads():
+    assembler = Assembler8051()
+    program = assembler.assemble(
+        "MOV DPTR,#0100H\nMOV A,#00H\nLOOP: INC A\nMOVX @DPTR,A\nINC DPTR\nMOV R1,40H\nSJMP LOOP\nEND"
+    )
+    cpu = CPU8051()
+    cpu.load_program(program)
+    cpu.set_watchpoints([Watchpoint(target=0x0100, end=0x01FF, space="xram", equals=0x05)])
+
+    result = cpu.run(max_steps=200)
+
+    assert result.reason == "watchpoint"
+    assert cpu.memory.read_xram(0x0104) == 0x05
+    assert cpu.memory.read_xram(0x0105) == 0x00
+
+    cpu.set_watchpoints([Watchpoint(target=0x40, space="iram", access="read")])
+    result = cpu.run(max_steps=200)
+
+    assert result.reason == "watchpoint"
+    assert cpu.pc == program.labels["LOOP"] + 5
+
+
 class _TestPlugin:
     def register(self, registry):
         class _DummyCPU(BaseCPU):
@@ -1231,3 +2019,44 @@ def test_plugin_registration_adds_new_architecture():
     register_plugin(_TestPlugin())
 
     assert "dummy-test" in architecture_metadata()
+
+
+def test_batch_run_program_reports_final_state_serial_output_and_pin_traces():
+    source = """
+        ORG 0000H
+        MOV SCON,#40H
+        MOV SBUF,#'H'
+        WAIT: JNB TI,WAIT
+        CLR P1.0
+        SETB P1.0
+        MOV A,P3
+        MOV DPTR,#0002H
+        MOVX @DPTR,A
+        END
+        """.strip()
+
+    result = run_program(source, "8051", 10_000, inputs={"P3.2": 0}, probes=["P1.0"])
+
+    assert result.ok and result.reason == "halted"
+    assert result.serial_output == [ord("H")]
+    assert [level for _cycle, level in result.pin_traces["P1.0"]] == [1, 0, 1]
+    assert result.registers["A"] == 0xFB
+    assert bytes.fromhex(result.memory["xram"])[:3] == bytes([0, 0, 0xFB])
+    assert result.cycles == result.pin_traces["P1.0"][-1][0] + 5
+
+
+def test_batch_runner_keeps_job_order_and_reports_faults_per_job():
+    jobs = [
+        BatchJob(source="MOV R0, #7\nMOV R1, #0x80\nSTR R0, [R1]\nEND", arch="arm", job_id="arm"),
+        BatchJob(source="MOV A,#1\nBOGUS\nEND", job_id="broken"),
+        BatchJob(source="LOOP: INC A\nSJMP LOOP\nEND", max_cycles=300, job_id="spin"),
+    ]
+
+    results = run_batch(jobs, workers=2)
+
+    assert [result.job_id for result in results] == ["arm", "broken", "spin"]
+    assert results[0].ok and results[0].registers["R0"] == 7
+    assert bytes.fromhex(results[0].memory["xram"])[0x80:0x84] == bytes([7, 0, 0, 0])
+    assert not results[1].ok and results[1].reason == "assembly_error" and "Line 2" in results[1].error
+    assert results[2].ok and results[2].reason == "cycle_cap" and not results[2].halted
+    assert (results[2].cycles, results[2].steps, results[2].registers["A"]) == (300, 200, 100)
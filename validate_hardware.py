@@ -255,6 +255,8 @@ def _run_cpu_with_hw(
             fast_slice = cpu.try_fast_realtime_slice(max_steps=max_steps - steps, max_cycles=1_000_000)
             if fast_slice:
                 steps += int(fast_slice.get("steps", 0) or 0)
+                if fast_slice.get("hardware_sync"):
+                    _sync_tick(hw, cpu)
                 continue
         cpu.step()
         steps += 1